@@ -1,3 +1,10 @@
+from typing import (
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
 from eth2spec.altair.mainnet import (
     AttestationData,
     BeaconBlock,
@@ -7,8 +14,15 @@ from .utils.types import (
     BLSSignature,
     AttestationDuty,
     ProposerDuty,
+    SigningContext,
     SlashingDB,
 )
+from .utils.helpers.async_helpers import (
+    run_blocking,
+)
+from .utils.helpers.attestation_data import (
+    get_attestation_data_for_duty,
+)
 from .utils.helpers.slashing_db import (
     is_slashable_attestation_data,
     is_slashable_block,
@@ -21,34 +35,70 @@ Consensus Specification
 
 
 def consensus_is_valid_attestation_data(slashing_db: SlashingDB,
-                                        attestation_data: AttestationData, attestation_duty: AttestationDuty) -> bool:
+                                        attestation_data: AttestationData, attestation_duty: AttestationDuty,
+                                        context: Optional[SigningContext] = None) -> bool:
     """Determines if the given attestation is valid for the attestation duty.
     """
     return \
         attestation_data.slot == attestation_duty.slot and \
         attestation_data.index == attestation_duty.committee_index and \
-        not is_slashable_attestation_data(slashing_db, attestation_data, attestation_duty.pubkey)
+        not is_slashable_attestation_data(slashing_db, attestation_data, attestation_duty.pubkey, context)
 
 
 def consensus_on_attestation(slashing_db: SlashingDB, attestation_duty: AttestationDuty) -> AttestationData:
     """Consensus protocol between distributed validator nodes for attestation values.
     Returns the decided value.
-    If this DV is the leader, it must use `bn_produce_attestation_data` for the proposed value.
+    If this DV is the leader, it must use `get_attestation_data` for the proposed value.
     The consensus protocol must use `consensus_is_valid_attestation_data` to determine
     validity of the proposed attestation value.
     """
     pass
 
 
+def get_valid_slot_attestation_duties(attestation_duties: Sequence[Tuple[SlashingDB, AttestationDuty]],
+                                      attestation_data: AttestationData) -> List[Tuple[SlashingDB, AttestationDuty]]:
+    """Get the attestation duties of the cluster in a slot, each with the slashing DB of its validator,
+    for which the attestation data decided for the slot is valid, each duty being checked on its own.
+    """
+    return [
+        (slashing_db, duty) for slashing_db, duty in attestation_duties
+        if consensus_is_valid_attestation_data(slashing_db, get_attestation_data_for_duty(attestation_data, duty), duty)
+    ]
+
+
+def consensus_is_valid_slot_attestation_data(attestation_duties: Sequence[Tuple[SlashingDB, AttestationDuty]],
+                                             attestation_data: AttestationData) -> bool:
+    """Determines if the attestation data decided for a slot is valid for any attestation duty
+    of the cluster in the slot, each with the slashing DB of its validator.
+    Duties whose slashing DB refuses it, e.g. those of a stale validator, are dropped from the signing set
+    of the slot instead of blocking the attestations of the whole cluster.
+    """
+    return any(
+        consensus_is_valid_attestation_data(slashing_db, get_attestation_data_for_duty(attestation_data, duty), duty)
+        for slashing_db, duty in attestation_duties
+    )
+
+
+def consensus_on_slot_attestation(attestation_duties: Sequence[Tuple[SlashingDB, AttestationDuty]]) -> AttestationData:
+    """Single consensus instance between distributed validator nodes for the attestation data
+    of all the attestation duties of the cluster in a slot.
+    Returns the decided value, from which `get_attestation_data_for_duty` derives the value of each duty.
+    If this DV is the leader, it must use `get_attestation_data` for the proposed value.
+    The consensus protocol must use `consensus_is_valid_slot_attestation_data` to determine
+    validity of the proposed attestation value.
+    """
+    pass
+
+
 def consensus_is_valid_block(slashing_db: SlashingDB,
                              block: BeaconBlock, proposer_duty: ProposerDuty,
-                             randao_reveal: BLSSignature) -> bool:
+                             randao_reveal: BLSSignature, context: Optional[SigningContext] = None) -> bool:
     """Determines if the given block is valid for the proposer duty.
     """
     # TODO: Add correct block.proposer_index check
     return block.slot == proposer_duty.slot and \
            block.body.randao_reveal == randao_reveal and \
-           not is_slashable_block(slashing_db, block, proposer_duty.pubkey)
+           not is_slashable_block(slashing_db, block, proposer_duty.pubkey, context)
 
 
 def consensus_on_block(slashing_db: SlashingDB,
@@ -60,3 +110,25 @@ def consensus_on_block(slashing_db: SlashingDB,
     validity of the proposed block value.
     """
     pass
+
+
+async def consensus_on_attestation_async(slashing_db: SlashingDB, attestation_duty: AttestationDuty) -> AttestationData:
+    """Async version of `consensus_on_attestation`.
+    Implementations should override it with a native async protocol. By default, it runs the blocking version
+    without blocking the event loop.
+    """
+    return await run_blocking(consensus_on_attestation, slashing_db, attestation_duty)
+
+
+async def consensus_on_slot_attestation_async(
+        attestation_duties: Sequence[Tuple[SlashingDB, AttestationDuty]]) -> AttestationData:
+    """Async version of `consensus_on_slot_attestation`.
+    """
+    return await run_blocking(consensus_on_slot_attestation, attestation_duties)
+
+
+async def consensus_on_block_async(slashing_db: SlashingDB,
+                                   proposer_duty: ProposerDuty, randao_reveal: BLSSignature) -> BeaconBlock:
+    """Async version of `consensus_on_block`.
+    """
+    return await run_blocking(consensus_on_block, slashing_db, proposer_duty, randao_reveal)
@@ -1,14 +1,16 @@
-from typing import List
+from typing import List, Tuple
 from eth2spec.altair.mainnet import (
     Attestation,
     AttestationData,
     BeaconBlock,
+    Fork,
     SignedBeaconBlock,
     Version,
 )
 
 from .utils.types import (
     AttestationDuty,
+    BLSPubkey,
     BLSSignature,
     Bytes32,
     CommitteeIndex,
@@ -18,6 +20,9 @@ from .utils.types import (
     Slot,
     ValidatorIndex,
 )
+from .utils.helpers.async_helpers import (
+    run_blocking,
+)
 
 
 # Beacon Node Interface
@@ -37,10 +42,25 @@ def bn_get_fork_version(slot: Slot) -> Version:
     pass
 
 
+def bn_get_fork_schedule() -> List[Fork]:
+    """Fetch the schedule of all forks, past & future, of the current chain.
+    Uses https://ethereum.github.io/beacon-APIs/#/Config/getForkSchedule
+    """
+    pass
+
+
 def bn_get_attestation_duties_for_epoch(validator_indices: List[ValidatorIndex], epoch: Epoch) -> List[AttestationDuty]:
-    # TODO: Define typing here:
-    # What's the size of validator_indices & the returned attestation_duties?
     """Fetch attestation duties for the validator indices in the epoch.
+    BNs limit the size of requests, see `get_attestation_duties` for large sets of validator indices.
+    Uses https://ethereum.github.io/beacon-APIs/#/ValidatorRequiredApi/getAttesterDuties
+    """
+    pass
+
+
+def bn_get_attestation_duties_and_dependent_root_for_epoch(validator_indices: List[ValidatorIndex],
+                                                           epoch: Epoch) -> Tuple[Root, List[AttestationDuty]]:
+    """Fetch attestation duties for the validator indices in the epoch, along with the dependent_root
+    of the response, i.e. the block root on which the duties depend.
     Uses https://ethereum.github.io/beacon-APIs/#/ValidatorRequiredApi/getAttesterDuties
     """
     pass
@@ -95,6 +115,17 @@ def rs_sign_attestation(attestation_data: AttestationData, fork_version: Version
     pass
 
 
+def rs_sign_attestations(attestations: List[Tuple[BLSPubkey, AttestationData, Root]],
+                         fork_version: Version) -> List[BLSSignature]:
+    """Instruct RS to sign the attestation data of all attestation duties in a slot, each given with the
+    pubkey of its validator & its signing root, using method:
+    /api/v1/eth2/sign/attestation
+    The requests are made concurrently over pooled connections, see `rs_sign_bulk`.
+    Returns the signatures in order.
+    """
+    pass
+
+
 def rs_sign_randao_reveal(epoch: Epoch, fork_version: Version, signing_root: Root) -> BLSSignature:
     """Instruct RS to sign block using method:
     /api/v1/eth2/sign/randao_reveal
@@ -107,3 +138,62 @@ def rs_sign_block(block: BeaconBlock, fork_version: Version, signing_root: Root)
     /api/v1/eth2/sign/block_v2
     """
     pass
+
+
+# Async Interface
+
+"""
+Async versions of the interface functions used by the duty flows, so that their I/O can overlap on an event loop.
+Implementations should override them with native async I/O. By default, they run the blocking versions
+without blocking the event loop.
+"""
+
+
+async def bn_produce_attestation_data_async(slot: Slot, committee_index: CommitteeIndex) -> AttestationData:
+    """Async version of `bn_produce_attestation_data`.
+    """
+    return await run_blocking(bn_produce_attestation_data, slot, committee_index)
+
+
+async def bn_submit_attestation_async(attestation: Attestation) -> None:
+    """Async version of `bn_submit_attestation`.
+    """
+    await run_blocking(bn_submit_attestation, attestation)
+
+
+async def bn_produce_block_async(slot: Slot, randao_reveal: BLSSignature, graffiti: Bytes32) -> BeaconBlock:
+    """Async version of `bn_produce_block`.
+    """
+    return await run_blocking(bn_produce_block, slot, randao_reveal, graffiti)
+
+
+async def bn_submit_block_async(block: SignedBeaconBlock) -> None:
+    """Async version of `bn_submit_block`.
+    """
+    await run_blocking(bn_submit_block, block)
+
+
+async def rs_sign_attestation_async(attestation_data: AttestationData, fork_version: Version,
+                                    signing_root: Root) -> BLSSignature:
+    """Async version of `rs_sign_attestation`.
+    """
+    return await run_blocking(rs_sign_attestation, attestation_data, fork_version, signing_root)
+
+
+async def rs_sign_attestations_async(attestations: List[Tuple[BLSPubkey, AttestationData, Root]],
+                                     fork_version: Version) -> List[BLSSignature]:
+    """Async version of `rs_sign_attestations`.
+    """
+    return await run_blocking(rs_sign_attestations, attestations, fork_version)
+
+
+async def rs_sign_randao_reveal_async(epoch: Epoch, fork_version: Version, signing_root: Root) -> BLSSignature:
+    """Async version of `rs_sign_randao_reveal`.
+    """
+    return await run_blocking(rs_sign_randao_reveal, epoch, fork_version, signing_root)
+
+
+async def rs_sign_block_async(block: BeaconBlock, fork_version: Version, signing_root: Root) -> BLSSignature:
+    """Async version of `rs_sign_block`.
+    """
+    return await run_blocking(rs_sign_block, block, fork_version, signing_root)
@@ -1,9 +1,13 @@
 from typing import List
 
-from eth2spec.altair.mainnet import Attestation, SignedBeaconBlock
-
 from .utils.types import (
-    BLSSignature
+    BLSPubkey,
+    BLSSignature,
+    Epoch,
+    ValidatorIndex,
+)
+from .utils.helpers.async_helpers import (
+    run_blocking,
 )
 
 """
@@ -11,22 +15,25 @@ Networking Specification
 """
 
 
-def broadcast_attestation_signature_share(attestation_signature_share: Attestation) -> None:
-    """Broadcasts attestation signature shares among DV peer nodes.
+def get_co_validator_index(validator_pubkey: BLSPubkey) -> ValidatorIndex:
+    """Returns the index of the co-validator run by this node in the distributed validator with validator_pubkey.
     """
     pass
 
 
-def listen_for_randao_reveal_signature_shares() -> List[BLSSignature]:
-    """Returns a list of any randao reveal signature shares that can be combined to construct
-    a complete signed value.
+def send_signature_share_batch(peer_index: ValidatorIndex, signature_share_batch: bytes) -> None:
+    """Sends a framed batch of attestation & block signature shares of this node, as SSZ-encoded
+    `SignatureShareMessage`s, to the DV peer node running the co-validator with index peer_index.
+    The peer passes the batch to `receive_signature_share_batch` with the verifier of its share combiner,
+    which pairs each share with the value the peer decided locally.
     """
     pass
 
 
-def listen_for_attestation_signature_shares() -> List[Attestation]:
-    """Returns a list of any attestations signature shares that can be combined to construct
-    a complete signed attestation.
+def listen_for_randao_reveal_signature_shares(validator_pubkey: BLSPubkey, epoch: Epoch) -> List[BLSSignature]:
+    """Returns a list of any randao reveal signature shares for the validator with validator_pubkey in epoch
+    that can be combined to construct a complete signed value. The randao reveals of several validators & epochs
+    may be exchanged concurrently, so only the shares of this exchange are returned.
     """
     pass
 
@@ -37,32 +44,32 @@ def construct_signed_randao_reveal(value_signature_shares: List[BLSSignature]) -
     pass
 
 
-def construct_signed_attestation(attestation_signature_shares: List[Attestation]) -> Attestation:
-    """Construct a complete signed attestation from attestation signature shares.
+def broadcast_randao_reveal_signature_share(validator_pubkey: BLSPubkey, epoch: Epoch,
+                                            randao_reveal_signature_share: BLSSignature) -> None:
+    """Broadcasts the randao reveal signature share for the validator with validator_pubkey in epoch
+    among DV peer nodes.
     """
     pass
 
 
-def broadcast_randao_reveal_signature_share(randao_reveal_signature_share: BLSSignature) -> None:
-    """Broadcasts randao reveal signature shares among DV peer nodes.
-    """
-    pass
-
+# Async Networking
 
-def broadcast_block_signature_share(block_signature_share: SignedBeaconBlock) -> None:
-    """Broadcasts beacon block signature shares among DV peer nodes.
-    """
-    pass
+"""
+Async versions of the networking functions used by the duty flows, so that their I/O can overlap on an event loop.
+Implementations should override them with native async I/O. By default, they run the blocking versions
+without blocking the event loop.
+"""
 
 
-def listen_for_block_signature_shares() -> List[SignedBeaconBlock]:
-    """Returns a list of any block signature shares that can be combined to construct
-    a complete signed block.
+async def broadcast_randao_reveal_signature_share_async(validator_pubkey: BLSPubkey, epoch: Epoch,
+                                                        randao_reveal_signature_share: BLSSignature) -> None:
+    """Async version of `broadcast_randao_reveal_signature_share`.
     """
-    pass
+    await run_blocking(broadcast_randao_reveal_signature_share, validator_pubkey, epoch, randao_reveal_signature_share)
 
 
-def construct_signed_block(block_signature_shares: List[SignedBeaconBlock]) -> SignedBeaconBlock:
-    """Construct a complete signed block from block signature shares.
+async def listen_for_randao_reveal_signature_shares_async(validator_pubkey: BLSPubkey,
+                                                          epoch: Epoch) -> List[BLSSignature]:
+    """Async version of `listen_for_randao_reveal_signature_shares`.
     """
-    pass
+    return await run_blocking(listen_for_randao_reveal_signature_shares, validator_pubkey, epoch)
@@ -0,0 +1,212 @@
+from concurrent.futures import (
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+)
+from functools import partial
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from eth2spec.altair.mainnet import (
+    SLOTS_PER_EPOCH,
+    compute_epoch_at_slot,
+    config,
+)
+
+from .eth_node_interface import (
+    bn_get_proposer_duties_for_epoch,
+)
+from .spec import (
+    DistributedValidator,
+    State,
+    presign_randao_reveals,
+    route_duties,
+    serve_proposer_duty,
+    serve_slot_duties,
+)
+from .utils.helpers.attestation_duties import (
+    get_attestation_duties,
+)
+from .utils.helpers.slashing_db import (
+    compact_slashing_db,
+)
+from .utils.types import (
+    AttestationDuty,
+    Clock,
+    DutyScheduler,
+    Epoch,
+    ProposerDuty,
+    ScheduledDuty,
+    Slot,
+    TimingWheel,
+)
+
+"""
+Duty Scheduler
+"""
+
+
+# Proposer duties are due at the start of the slot & attestation duties 1/3rd way through it
+TICKS_PER_SLOT = 3
+PROPOSER_DUTY_TICK_OFFSET = 0
+ATTESTATION_DUTY_TICK_OFFSET = 1
+PROPOSER_DUTY_PRIORITY = 0
+ATTESTATION_DUTY_PRIORITY = 1
+# Duties are fetched at the start of the epoch before theirs, so the wheel spans two epochs
+TIMING_WHEEL_BUCKETS = 2 * int(SLOTS_PER_EPOCH) * TICKS_PER_SLOT
+# The slashing DBs are compacted halfway through each epoch, away from the duty fetches at its start,
+# on a worker of their own so that compaction never holds up the workers serving duties
+COMPACTION_TICK_OFFSET = int(SLOTS_PER_EPOCH) * TICKS_PER_SLOT // 2
+COMPACTION_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slashing-db-compaction")
+
+
+def create_timing_wheel(num_buckets: int = TIMING_WHEEL_BUCKETS) -> TimingWheel:
+    return TimingWheel(buckets=[[] for _ in range(num_buckets)])
+
+
+def schedule_duty(wheel: TimingWheel, tick: int, priority: int, duty: Union[AttestationDuty, ProposerDuty]) -> None:
+    """Schedule the duty at tick. A duty whose tick has already been reached is due at the current tick.
+    """
+    with wheel.lock:
+        tick = max(tick, wheel.current_tick)
+        assert tick < wheel.current_tick + len(wheel.buckets)
+        wheel.buckets[tick % len(wheel.buckets)].append(ScheduledDuty(
+            tick=tick, priority=priority, sequence=wheel.num_scheduled, duty=duty))
+        wheel.num_scheduled += 1
+
+
+def advance_timing_wheel(wheel: TimingWheel, tick: int) -> List[ScheduledDuty]:
+    """Advance the wheel through tick. Returns the duties that became due, by tick & priority.
+    """
+    with wheel.lock:
+        due: List[ScheduledDuty] = []
+        # Every scheduled duty is within one revolution, so each bucket is visited at most once
+        for bucket_tick in range(wheel.current_tick, min(tick + 1, wheel.current_tick + len(wheel.buckets))):
+            bucket = wheel.buckets[bucket_tick % len(wheel.buckets)]
+            due += bucket
+            bucket.clear()
+        wheel.current_tick = max(wheel.current_tick, tick + 1)
+    return sorted(due)
+
+
+def create_duty_scheduler(genesis_time: int, executor: Executor, clock: Optional[Clock] = None,
+                          compaction_executor: Executor = COMPACTION_EXECUTOR) -> DutyScheduler:
+    return DutyScheduler(genesis_time=genesis_time, clock=clock if clock is not None else Clock(),
+                         executor=executor, wheel=create_timing_wheel(), compaction_executor=compaction_executor)
+
+
+def compute_tick_at_time(scheduler: DutyScheduler, time: float) -> int:
+    return int((time - scheduler.genesis_time) * TICKS_PER_SLOT // config.SECONDS_PER_SLOT)
+
+
+def compute_time_at_tick(scheduler: DutyScheduler, tick: int) -> float:
+    return scheduler.genesis_time + tick * int(config.SECONDS_PER_SLOT) / TICKS_PER_SLOT
+
+
+def fetch_epoch_duties(state: State,
+                       epoch: Epoch) -> List[Tuple[DistributedValidator, Union[AttestationDuty, ProposerDuty]]]:
+    """Fetch the attestation & proposer duties of the validators of state for epoch from the BN,
+    each routed to the distributed validator that serves it.
+    """
+    duties: List[Tuple[DistributedValidator, Union[AttestationDuty, ProposerDuty]]] = []
+    # Proposer duties are returned for all validators
+    duties += route_duties(state, bn_get_proposer_duties_for_epoch(epoch))
+    duties += route_duties(state, get_attestation_duties(list(state.index_to_distributed_validator), epoch))
+    return duties
+
+
+def schedule_epoch_duties(scheduler: DutyScheduler, state: State, epoch: Epoch) -> None:
+    """Fetch the duties of the validators of state for epoch & schedule each one at its offset in its slot.
+    The randao reveals of the proposer duties are signed right away, as they only depend on the epoch,
+    on the presign pool rather than the executor of the scheduler.
+    """
+    proposer_duties = []
+    for _, duty in fetch_epoch_duties(state, epoch):
+        # Duties of past slots are missed
+        if int(duty.slot) < scheduler.wheel.current_tick // TICKS_PER_SLOT:
+            continue
+        if isinstance(duty, ProposerDuty):
+            tick, priority = int(duty.slot) * TICKS_PER_SLOT + PROPOSER_DUTY_TICK_OFFSET, PROPOSER_DUTY_PRIORITY
+            proposer_duties.append(duty)
+        else:
+            tick, priority = int(duty.slot) * TICKS_PER_SLOT + ATTESTATION_DUTY_TICK_OFFSET, ATTESTATION_DUTY_PRIORITY
+        schedule_duty(scheduler.wheel, tick, priority, duty)
+    presign_randao_reveals(proposer_duties)
+
+
+def on_duties_done(scheduler: DutyScheduler, num_duties: int, future: 'Future[None]') -> None:
+    if future.exception() is not None:
+        with scheduler.lock:
+            scheduler.num_failed += num_duties
+
+
+def dispatch_duties(scheduler: DutyScheduler, state: State, scheduled_duties: List[ScheduledDuty]) -> None:
+    """Serve the scheduled duties on the executor, in order. Proposer duties are served one by one,
+    while the attestation duties of a slot are served together, deciding & signing their attestation data once.
+    """
+    attestation_duties: Dict[int, List[AttestationDuty]] = {}
+    dispatched: List[Tuple[int, 'Future[None]']] = []
+    for scheduled_duty in scheduled_duties:
+        duty = scheduled_duty.duty
+        if isinstance(duty, ProposerDuty):
+            dispatched.append((1, scheduler.executor.submit(serve_proposer_duty, state, duty)))
+        else:
+            attestation_duties.setdefault(int(duty.slot), []).append(duty)
+    for slot_attestation_duties in attestation_duties.values():
+        dispatched.append((len(slot_attestation_duties),
+                           scheduler.executor.submit(serve_slot_duties, state, slot_attestation_duties, [])))
+    for num_duties, future in dispatched:
+        with scheduler.lock:
+            scheduler.num_dispatched += num_duties
+        future.add_done_callback(partial(on_duties_done, scheduler, num_duties))
+
+
+def compact_slashing_dbs(state: State, epoch: Epoch) -> None:
+    """Compact the slashing DBs of the distributed validators of state, each once, for epoch.
+    """
+    slashing_dbs = {id(distributed_validator.slashing_db): distributed_validator.slashing_db
+                    for distributed_validator in state.distributed_validators}
+    for slashing_db in slashing_dbs.values():
+        compact_slashing_db(slashing_db, epoch)
+
+
+def run_duty_scheduler(scheduler: DutyScheduler, state: State, end_slot: Slot) -> None:
+    """Serve the duties of the validators of state from the current slot until end_slot, or until stopped.
+    The duties of each epoch are fetched at the start of the previous one, once the duties that became due
+    at that tick are dispatched, so that fetching them never delays a duty. At each tick, the duties that
+    became due are dispatched, proposer duties first. Once per epoch, from its middle on, the slashing DBs
+    are compacted on the compaction executor. Dispatched duties & compactions may still be running on return.
+    """
+    tick = compute_tick_at_time(scheduler, scheduler.clock.get_time())
+    end_tick = int(end_slot) * TICKS_PER_SLOT
+    with scheduler.wheel.lock:
+        scheduler.wheel.current_tick = max(scheduler.wheel.current_tick, tick)
+    while tick < end_tick and not scheduler.stop.is_set():
+        epoch = compute_epoch_at_slot(Slot(tick // TICKS_PER_SLOT))
+        if scheduler.next_epoch is None:
+            scheduler.next_epoch = int(epoch)
+        # Only the duties of the epoch the scheduler starts in are fetched before dispatching
+        while scheduler.next_epoch <= epoch:
+            schedule_epoch_duties(scheduler, state, Epoch(scheduler.next_epoch))
+            scheduler.next_epoch += 1
+        dispatch_duties(scheduler, state, advance_timing_wheel(scheduler.wheel, tick))
+        while scheduler.next_epoch <= epoch + 1:
+            schedule_epoch_duties(scheduler, state, Epoch(scheduler.next_epoch))
+            scheduler.next_epoch += 1
+        if tick % (int(SLOTS_PER_EPOCH) * TICKS_PER_SLOT) >= COMPACTION_TICK_OFFSET and \
+                (scheduler.compaction_epoch is None or scheduler.compaction_epoch < epoch):
+            scheduler.compaction_epoch = int(epoch)
+            scheduler.compaction_executor.submit(compact_slashing_dbs, state, epoch)
+        tick += 1
+        scheduler.clock.sleep(max(compute_time_at_tick(scheduler, tick) - scheduler.clock.get_time(), 0.0))
+        # Catch up with the clock if the dispatch overran
+        tick = max(tick, compute_tick_at_time(scheduler, scheduler.clock.get_time()))
+
+
+def stop_duty_scheduler(scheduler: DutyScheduler) -> None:
+    scheduler.stop.set()
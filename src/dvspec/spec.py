@@ -1,15 +1,30 @@
-from dataclasses import dataclass
+import asyncio
+import threading
+from concurrent.futures import (
+    Executor,
+    Future,
+    ThreadPoolExecutor,
+)
+from dataclasses import dataclass, field, replace
+from functools import partial
 from typing import (
+    Dict,
+    Iterable,
     List,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
 )
 
 from eth2spec.altair.mainnet import (
-    AttestationData,
     Attestation,
+    AttestationData,
     BeaconBlock,
     SignedBeaconBlock,
     compute_start_slot_at_epoch,
     compute_epoch_at_slot,
+    config,
 )
 
 from dvspec.utils.helpers.signing import (
@@ -18,48 +33,112 @@ from dvspec.utils.helpers.signing import (
     compute_randao_reveal_signing_root,
 )
 
+from .utils.helpers.async_helpers import (
+    run_async,
+    run_blocking,
+)
+from .utils.helpers.attestation_data import (
+    get_attestation_data_for_duty,
+)
+from .utils.helpers.fork_schedule import (
+    get_fork_version,
+)
+from .utils.helpers.share_aggregator import (
+    add_signature_share,
+    create_share_aggregator,
+    set_share_aggregator_slot,
+)
+from .utils.helpers.share_batching import (
+    create_share_batcher,
+    queue_signature_share_messages,
+)
+from .utils.helpers.share_messages import (
+    DUTY_TYPE_ATTESTATION,
+    DUTY_TYPE_BLOCK,
+    DUTY_TYPES,
+    decode_signature_share_message,
+    encode_signature_share_message,
+    get_signature_share_batch_offsets,
+)
+from .utils.helpers.share_verification import (
+    find_invalid_signature_sets,
+    queue_signature_share,
+    take_pending_signature_shares,
+)
+from .utils.helpers.threshold_signature import (
+    combine_bls_signature_shares,
+    compute_lagrange_coefficients,
+)
 from .utils.helpers.slashing_db import (
+    append_signed_attestation,
+    append_signed_block,
     get_slashing_db_data_for_pubkey,
+    get_slashing_db_lock_for_pubkey,
     is_slashable_attestation_data,
     is_slashable_block,
+    stage_slashing_db_write,
+)
+from .utils.helpers.slashing_db_store import (
+    commit_slashing_db,
 )
 from .eth_node_interface import (
     AttestationDuty,
     ProposerDuty,
-    bn_get_fork_version,
     bn_submit_attestation,
     bn_submit_block,
-    rs_sign_attestation,
-    rs_sign_randao_reveal,
-    rs_sign_block,
+    rs_sign_attestation_async,
+    rs_sign_attestations_async,
+    rs_sign_randao_reveal_async,
+    rs_sign_block_async,
 )
 from .consensus import (
     consensus_is_valid_attestation_data,
     consensus_is_valid_block,
-    consensus_on_attestation,
-    consensus_on_block,
+    consensus_on_attestation_async,
+    consensus_on_block_async,
+    consensus_on_slot_attestation_async,
 )
 from .networking import (
-    broadcast_attestation_signature_share,
-    broadcast_block_signature_share,
-    broadcast_randao_reveal_signature_share,
-    construct_signed_attestation,
+    broadcast_randao_reveal_signature_share_async,
     construct_signed_randao_reveal,
-    construct_signed_block,
-    listen_for_attestation_signature_shares,
-    listen_for_block_signature_shares,
-    listen_for_randao_reveal_signature_shares,
+    get_co_validator_index,
+    listen_for_randao_reveal_signature_shares_async,
 )
 from .utils.types import (
     BLSPubkey,
+    Clock,
+    DecidedValue,
+    Epoch,
     SlashingDB,
     SlashingDBAttestation,
     SlashingDBBlock,
     ValidatorIndex,
-    BLSSignature
+    BLSSignature,
+    RandaoRevealCache,
+    Root,
+    ShareAggregator,
+    ShareBatcher,
+    ShareCombiner,
+    ShareVerifier,
+    SignatureShare,
+    SigningContext,
+    Slot,
 )
 
 
+# The randao reveals of the current & the next epoch are kept
+RANDAO_REVEAL_CACHE_EPOCHS = 2
+RANDAO_REVEAL_CACHE = RandaoRevealCache()
+# Randao reveals are presigned on a bounded pool of their own, so that waiting for the DV peers
+# never holds up the workers serving duties
+RANDAO_REVEAL_PRESIGN_MAX_WORKERS = 4
+RANDAO_REVEAL_PRESIGN_EXECUTOR = ThreadPoolExecutor(max_workers=RANDAO_REVEAL_PRESIGN_MAX_WORKERS,
+                                                    thread_name_prefix="randao-reveal-presign")
+# The shares received from the DV peers are verified in one batch per window, e.g. those of every attestation duty
+# of a slot, at a negligible latency
+SHARE_COMBINER_WINDOW_SECONDS = 0.05
+
+
 @dataclass
 class ValidatorIdentity:
     """Identity of the Ethereum validator.
@@ -94,137 +173,632 @@ class DistributedValidator:
 @dataclass
 class State:
     distributed_validators: List[DistributedValidator]
+    # Distributed validators by validator index & by pubkey, for routing duties
+    index_to_distributed_validator: Dict[int, DistributedValidator] = field(init=False, repr=False, compare=False)
+    pubkey_to_distributed_validator: Dict[bytes, DistributedValidator] = field(init=False, repr=False, compare=False)
+    # Signature share messages of this node, batched for the DV peer nodes
+    share_batcher: ShareBatcher = field(default_factory=create_share_batcher, repr=False, compare=False)
+    # Combination of the signature shares of the DV peer nodes, see `create_share_combiner`
+    share_combiner: Optional[ShareCombiner] = field(default=None, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.index_to_distributed_validator = {}
+        self.pubkey_to_distributed_validator = {}
+        for distributed_validator in self.distributed_validators:
+            index_distributed_validator(self, distributed_validator)
 
 
-def update_attestation_slashing_db(slashing_db: SlashingDB,
-                                   attestation_data: AttestationData, pubkey: BLSPubkey) -> None:
+def index_distributed_validator(state: State, distributed_validator: DistributedValidator) -> None:
+    validator_identity = distributed_validator.validator_identity
+    assert int(validator_identity.index) not in state.index_to_distributed_validator
+    assert bytes(validator_identity.pubkey) not in state.pubkey_to_distributed_validator
+    state.index_to_distributed_validator[int(validator_identity.index)] = distributed_validator
+    state.pubkey_to_distributed_validator[bytes(validator_identity.pubkey)] = distributed_validator
+
+
+def add_distributed_validator(state: State, distributed_validator: DistributedValidator) -> None:
+    index_distributed_validator(state, distributed_validator)
+    state.distributed_validators.append(distributed_validator)
+
+
+def get_distributed_validator_for_index(state: State,
+                                        validator_index: ValidatorIndex) -> Optional[DistributedValidator]:
+    return state.index_to_distributed_validator.get(int(validator_index))
+
+
+def get_distributed_validator_for_pubkey(state: State, pubkey: BLSPubkey) -> Optional[DistributedValidator]:
+    return state.pubkey_to_distributed_validator.get(bytes(pubkey))
+
+
+Duty = TypeVar("Duty", AttestationDuty, ProposerDuty)
+
+
+def route_duty(state: State, duty: Duty) -> Tuple[DistributedValidator, Duty]:
+    """Route the duty, which must be one of a validator of state, see `route_duties`.
+    """
+    routed_duties = route_duties(state, [duty])
+    assert len(routed_duties) == 1
+    return routed_duties[0]
+
+
+def route_duties(state: State, duties: Iterable[Duty]) -> List[Tuple[DistributedValidator, Duty]]:
+    """Route each duty to the distributed validator of its validator index in a single pass,
+    dropping the duties of other validators, e.g. the proposer duties of the whole chain.
+    The pubkey of a routed duty is that of its distributed validator. Duties are copied rather than
+    modified to fill it, as they may be shared.
+    """
+    routed_duties = []
+    for duty in duties:
+        distributed_validator = state.index_to_distributed_validator.get(int(duty.validator_index))
+        if distributed_validator is None:
+            continue
+        pubkey = distributed_validator.validator_identity.pubkey
+        if duty.pubkey != pubkey:
+            duty = replace(duty, pubkey=pubkey)
+        routed_duties.append((distributed_validator, duty))
+    return routed_duties
+
+
+def update_attestation_slashing_db(slashing_db: SlashingDB, attestation_data: AttestationData, pubkey: BLSPubkey,
+                                   context: Optional[SigningContext] = None) -> None:
     """Update slashing DB for the validator with pubkey with new attestation data.
+    The root of the attestation data is memoized in the context, if given.
     """
-    assert not is_slashable_attestation_data(slashing_db, attestation_data, pubkey)
+    if context is None:
+        context = SigningContext(attestation_data)
     slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
-    slashing_db_attestation = SlashingDBAttestation(source_epoch=attestation_data.source.epoch,
-                                                    target_epoch=attestation_data.target.epoch,
-                                                    signing_root=attestation_data.hash_tree_root())
-    slashing_db_data.signed_attestations.append(slashing_db_attestation)
+    with slashing_db_data.lock:
+        assert not is_slashable_attestation_data(slashing_db, attestation_data, pubkey, context)
+        slashing_db_attestation = SlashingDBAttestation(source_epoch=attestation_data.source.epoch,
+                                                        target_epoch=attestation_data.target.epoch,
+                                                        signing_root=context.get_root())
+        append_signed_attestation(slashing_db_data, slashing_db_attestation)
+        stage_slashing_db_write(slashing_db, pubkey, slashing_db_attestation)
 
 
-def update_block_slashing_db(slashing_db: SlashingDB, block: BeaconBlock, pubkey: BLSPubkey) -> None:
+def update_block_slashing_db(slashing_db: SlashingDB, block: BeaconBlock, pubkey: BLSPubkey,
+                             context: Optional[SigningContext] = None) -> None:
     """Update slashing DB for the validator with pubkey with new block.
+    The root of the block is memoized in the context, if given.
     """
-    assert not is_slashable_block(slashing_db, block, pubkey)
+    if context is None:
+        context = SigningContext(block)
     slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
-    slashing_db_block = SlashingDBBlock(slot=block.slot,
-                                        signing_root=block.hash_tree_root())
-    slashing_db_data.signed_blocks.append(slashing_db_block)
+    with slashing_db_data.lock:
+        assert not is_slashable_block(slashing_db, block, pubkey, context)
+        slashing_db_block = SlashingDBBlock(slot=block.slot,
+                                            signing_root=context.get_root())
+        append_signed_block(slashing_db_data, slashing_db_block)
+        stage_slashing_db_write(slashing_db, pubkey, slashing_db_block)
 
 
-def serve_attestation_duty(slashing_db: SlashingDB, attestation_duty: AttestationDuty) -> None:
+def serve_attestation_duty(state: State, attestation_duty: AttestationDuty) -> None:
     """
     Attestation Production Process:
     1. At the start of every epoch, get attestation duties for epoch+1 by running
         bn_get_attestation_duties_for_epoch(validator_indices, epoch+1)
     2. For each attestation_duty received in Step 1, schedule
-        serve_attestation_duty(slashing_db, attestation_duty) at 1/3rd way through the slot
+        serve_attestation_duty(state, attestation_duty) at 1/3rd way through the slot
         attestation_duty.slot
     See notes here:
     https://github.com/ethereum/beacon-APIs/blob/05c1bc142e1a3fb2a63c79098743776241341d08/validator-flow.md#attestation
+    Runs `serve_attestation_duty_async` on the event loop of the current thread.
+    """
+    run_async(serve_attestation_duty_async(state, attestation_duty))
+
+
+async def serve_attestation_duty_async(state: State, attestation_duty: AttestationDuty) -> None:
+    """Async version of `serve_attestation_duty`, so that many duties can be served on one event loop.
+    """
+    distributed_validator, attestation_duty = route_duty(state, attestation_duty)
+    slashing_db = distributed_validator.slashing_db
+    # Consensus instances for different validators, and for the same validator, run concurrently
+    attestation_data = await consensus_on_attestation_async(slashing_db, attestation_duty)
+    await sign_attestation_data_async(state, slashing_db, attestation_duty, attestation_data)
+
+
+async def sign_attestation_data_async(state: State, slashing_db: SlashingDB, attestation_duty: AttestationDuty,
+                                      attestation_data: AttestationData) -> None:
+    """Add the attestation data decided for the attestation duty to the slashing DB & commit it,
+    then sign it using the RS & send the signature share to the DV peers.
     """
-    # TODO: Is lock on consensus the best way to do this? Does lock on slashing DB work?
-    # Obtain lock on consensus_on_attestation here.
-    # Only a single consensus_on_attestation instance should be
-    # running at any given time
-    attestation_data = consensus_on_attestation(slashing_db, attestation_duty)
-    assert consensus_is_valid_attestation_data(slashing_db, attestation_data, attestation_duty)
-    # Release lock on consensus_on_attestation here.
-    # Add attestation to slashing DB
-    update_attestation_slashing_db(slashing_db, attestation_data, attestation_duty.pubkey)
+    # The decided attestation data is merkleized once for the checks, the slashing DB & the signing root
+    context = SigningContext(attestation_data)
+    # The fork version is resolved while the attestation data is recorded
+    _, fork_version = await asyncio.gather(
+        run_blocking(record_attestation_data, slashing_db, attestation_duty, attestation_data, context),
+        run_blocking(get_fork_version, compute_start_slot_at_epoch(attestation_data.target.epoch)))
+    # The signature share is only requested once the slashing DB is persisted
+    await run_blocking(commit_slashing_db, slashing_db)
     # Sign attestation using RS
-    # TODO: Reuse fork version from here in compute_domain
-    fork_version = bn_get_fork_version(compute_start_slot_at_epoch(attestation_data.target.epoch))
-    attestation_signing_root = compute_attestation_signing_root(attestation_data)
-    attestation_signature_share = rs_sign_attestation(attestation_data, attestation_signing_root, fork_version)
-    # TODO: What is attestation_signature_share.aggregation_bits?
-    attestation_signature_share = Attestation(data=attestation_data, signature=attestation_signature_share)
-    # TODO: Should we just gossip & recombine the signature shares without attestation data?
-    broadcast_attestation_signature_share(attestation_signature_share)
+    attestation_signing_root = compute_attestation_signing_root(attestation_data, context)
+    attestation_signature_share = await rs_sign_attestation_async(attestation_data, fork_version,
+                                                                  attestation_signing_root)
+    # Only the signing root travels with the signature share, the DV peers decided the attestation data too.
+    # The share is batched with the other shares of this node for the DV peers
+    await run_blocking(queue_signature_share_messages, [build_signature_share_message(
+        attestation_duty, DUTY_TYPE_ATTESTATION, attestation_signing_root, attestation_signature_share)],
+        state.share_batcher)
+    await run_blocking(record_decided_values, state, DUTY_TYPE_ATTESTATION, [
+        (attestation_duty, attestation_data, attestation_signing_root, attestation_signature_share)])
+
+
+def record_attestation_data(slashing_db: SlashingDB, attestation_duty: AttestationDuty,
+                            attestation_data: AttestationData, context: SigningContext) -> None:
+    """Add the attestation data decided for the attestation duty to the slashing DB.
+    The signature share may only leave the node once the slashing DB is committed.
+    """
+    assert record_attestation_data_if_valid(slashing_db, attestation_duty, attestation_data, context)
+
+
+def record_attestation_data_if_valid(slashing_db: SlashingDB, attestation_duty: AttestationDuty,
+                                     attestation_data: AttestationData, context: SigningContext) -> bool:
+    """Add the attestation data decided for the attestation duty to the slashing DB if it is still valid
+    for the duty. Returns whether it was added.
+    """
+    # Only the slashing DB records of this validator are locked from the final validity check until the update,
+    # so that no concurrently decided attestation can slip in between
+    with get_slashing_db_lock_for_pubkey(slashing_db, attestation_duty.pubkey):
+        if not consensus_is_valid_attestation_data(slashing_db, attestation_data, attestation_duty, context):
+            return False
+        # Add attestation to slashing DB
+        update_attestation_slashing_db(slashing_db, attestation_data, attestation_duty.pubkey, context)
+        return True
 
 
-def serve_proposer_duty(slashing_db: SlashingDB, proposer_duty: ProposerDuty) -> None:
+def serve_proposer_duty(state: State, proposer_duty: ProposerDuty) -> None:
     """"
     Block Production Process:
     1. At the start of every epoch, get proposer duties for epoch+1 by running
         bn_get_proposer_duties_for_epoch(epoch+1)
     2. For each proposer_duty received in Step 1 for our validators, schedule
-        serve_proposer_duty(proposer_duty) at beginning of slot proposer_duty.slot
+        serve_proposer_duty(state, proposer_duty) at beginning of slot proposer_duty.slot
     See notes here:
     https://github.com/ethereum/beacon-APIs/blob/05c1bc142e1a3fb2a63c79098743776241341d08/validator-flow.md#block-proposing
+    Runs `serve_proposer_duty_async` on the event loop of the current thread.
     """
-    # TODO: Is lock on consensus the best way to do this? Does lock on slashing DB work?
-    # Obtain lock on consensus_on_block here.
-    # Only a single consensus_on_block instance should be
-    # running at any given time
-    fork_version = bn_get_fork_version(proposer_duty.slot)
+    run_async(serve_proposer_duty_async(state, proposer_duty))
+
+
+async def serve_proposer_duty_async(state: State, proposer_duty: ProposerDuty) -> None:
+    """Async version of `serve_proposer_duty`, so that many duties can be served on one event loop.
+    """
+    distributed_validator, proposer_duty = route_duty(state, proposer_duty)
+    slashing_db = distributed_validator.slashing_db
+    # The fork version is resolved while the randao reveal is signed, unless it was signed ahead of the duty
+    fork_version, randao_reveal = await asyncio.gather(
+        run_blocking(get_fork_version, proposer_duty.slot),
+        get_randao_reveal_async(proposer_duty))
+    # Consensus instances for different validators, and for the same validator, run concurrently
+    block = await consensus_on_block_async(slashing_db, proposer_duty, randao_reveal)
+    # The decided block is merkleized once for the checks, the slashing DB & the signing root
+    context = SigningContext(block)
+    await run_blocking(record_block, slashing_db, proposer_duty, block, randao_reveal, context)
+    # The signature share is only requested once the slashing DB is persisted
+    await run_blocking(commit_slashing_db, slashing_db)
+    # Sign block using RS
+    block_signing_root = compute_block_signing_root(block, context)
+    block_signature_share = await rs_sign_block_async(block, fork_version, block_signing_root)
+    # Only the signing root travels with the signature share, the DV peers decided the block too
+    await run_blocking(queue_signature_share_messages, [build_signature_share_message(
+        proposer_duty, DUTY_TYPE_BLOCK, block_signing_root, block_signature_share)], state.share_batcher)
+    await run_blocking(record_decided_values, state, DUTY_TYPE_BLOCK, [
+        (proposer_duty, block, block_signing_root, block_signature_share)])
+
+
+def presign_randao_reveals(proposer_duties: Iterable[ProposerDuty],
+                           executor: Executor = RANDAO_REVEAL_PRESIGN_EXECUTOR,
+                           cache: RandaoRevealCache = RANDAO_REVEAL_CACHE) -> List[Future[BLSSignature]]:
+    """Sign, exchange & combine the randao reveals of the proposer duties on the executor once the duties are known,
+    e.g. at the start of the epoch before theirs, so that `serve_proposer_duty` can start consensus right away.
+    Each presign holds a worker of the executor until the exchange completes, so the default executor is
+    a small pool of its own rather than the one serving the duties.
+    """
+    return [executor.submit(run_async, get_randao_reveal_async(proposer_duty, cache))
+            for proposer_duty in proposer_duties]
+
+
+async def get_randao_reveal_async(proposer_duty: ProposerDuty,
+                                  cache: RandaoRevealCache = RANDAO_REVEAL_CACHE) -> BLSSignature:
+    """Get the randao reveal of the validator of the proposer duty for the epoch of the duty.
+    It is signed, exchanged & combined once per validator & epoch, possibly ahead of the duty.
+    Concurrent callers, on any event loop, wait for the single signing.
+    """
+    epoch = int(compute_epoch_at_slot(proposer_duty.slot))
+    key = (bytes(proposer_duty.pubkey), epoch)
+    with cache.lock:
+        future = cache.randao_reveals.get(key)
+        sign = future is None
+        if future is None:
+            cache.misses += 1
+            future = cache.randao_reveals[key] = Future()
+            # Evict the randao reveals of past epochs
+            for past_key in [past_key for past_key in cache.randao_reveals
+                             if past_key[1] + RANDAO_REVEAL_CACHE_EPOCHS <= epoch]:
+                del cache.randao_reveals[past_key]
+        else:
+            cache.hits += 1
+    if sign:
+        try:
+            future.set_result(await sign_randao_reveal_async(proposer_duty))
+        except BaseException as exception:
+            # Let the next caller retry, & fail the concurrent callers rather than leave them waiting,
+            # also when the signing is cancelled, e.g. because another step of the duty failed
+            with cache.lock:
+                cache.randao_reveals.pop(key, None)
+            future.set_exception(exception if isinstance(exception, Exception) else
+                                 RuntimeError("Randao reveal signing was interrupted"))
+            raise
+    return await asyncio.wrap_future(future)
+
+
+async def sign_randao_reveal_async(proposer_duty: ProposerDuty) -> BLSSignature:
+    """Sign the randao reveal of the epoch of the proposer duty using the RS,
+    exchange the signature shares with the DV peers & combine them.
+    """
+    epoch = compute_epoch_at_slot(proposer_duty.slot)
+    fork_version = await run_blocking(get_fork_version, proposer_duty.slot)
     # Sign randao_reveal using RS
     randao_reveal_signing_root = compute_randao_reveal_signing_root(proposer_duty.slot)
-    randao_reveal_signature_share = rs_sign_randao_reveal(compute_epoch_at_slot(proposer_duty.slot),
-                                                          fork_version, randao_reveal_signing_root)
-    broadcast_randao_reveal_signature_share(randao_reveal_signature_share)
-    randao_reveal = randao_reveal_combination()
-    block = consensus_on_block(slashing_db, proposer_duty, randao_reveal)
-    assert consensus_is_valid_block(slashing_db, block, proposer_duty, randao_reveal)
-    # Release lock on consensus_on_block here.
-    # Add block to slashing DB
-    update_block_slashing_db(slashing_db, block, proposer_duty.pubkey)
-    # Sign block using RS
-    block_signing_root = compute_block_signing_root(block)
-    block_signature_share = rs_sign_block(block, fork_version, block_signing_root)
-    block_signature_share = SignedBeaconBlock(message=block, signature=block_signature_share)
-    broadcast_block_signature_share(block_signature_share)
+    randao_reveal_signature_share = await rs_sign_randao_reveal_async(epoch, fork_version, randao_reveal_signing_root)
+    # Listen for the signature shares of the DV peers while broadcasting ours, both keyed by validator & epoch
+    # as the randao reveals of several validators & epochs are exchanged concurrently
+    _, randao_reveal = await asyncio.gather(
+        broadcast_randao_reveal_signature_share_async(proposer_duty.pubkey, epoch, randao_reveal_signature_share),
+        randao_reveal_combination_async(proposer_duty.pubkey, epoch))
+    return randao_reveal
 
 
-def randao_reveal_combination() -> BLSSignature:
+def record_block(slashing_db: SlashingDB, proposer_duty: ProposerDuty, block: BeaconBlock,
+                 randao_reveal: BLSSignature, context: SigningContext) -> None:
+    """Add the block decided for the proposer duty to the slashing DB.
+    The signature share may only leave the node once the slashing DB is committed.
     """
-    randao_reveal Combination Process:
+    # Only the slashing DB records of this validator are locked from the final validity check until the update
+    with get_slashing_db_lock_for_pubkey(slashing_db, proposer_duty.pubkey):
+        assert consensus_is_valid_block(slashing_db, block, proposer_duty, randao_reveal, context)
+        # Add block to slashing DB
+        update_block_slashing_db(slashing_db, block, proposer_duty.pubkey, context)
+
+
+def serve_slot_duties(state: State, attestation_duties: List[AttestationDuty], proposer_duties: List[ProposerDuty],
+                      executor: Optional[Executor] = None) -> None:
+    """Serve all duties of a slot in parallel, making their blocking calls on the executor, e.g. a ThreadPoolExecutor,
+    if given. Runs `serve_slot_duties_async` on the event loop of the current thread.
+    """
+    run_async(serve_slot_duties_async(state, attestation_duties, proposer_duties), executor)
+
+
+async def serve_slot_duties_async(state: State, attestation_duties: List[AttestationDuty],
+                                  proposer_duties: List[ProposerDuty]) -> None:
+    """Serve all duties of a slot concurrently on the event loop.
+    The attestation data is decided once for all attestation duties of the slot.
+    Duties of different validators only contend for their own slashing DB records.
+    Returns once every duty has been served, raising the first failure if any duty failed.
+    """
+    duties = [
+        serve_proposer_duty_async(state, proposer_duty)
+        for _, proposer_duty in route_duties(state, proposer_duties)
+    ]
+    routed_attestation_duties = route_duties(state, attestation_duties)
+    if routed_attestation_duties != []:
+        duties.append(serve_slot_attestation_duties_async(state, routed_attestation_duties))
+    # Wait for every duty before surfacing a failure, so that no duty is left running unobserved
+    for result in await asyncio.gather(*duties, return_exceptions=True):
+        if isinstance(result, BaseException):
+            raise result
+
+
+async def serve_slot_attestation_duties_async(
+        state: State, routed_attestation_duties: List[Tuple[DistributedValidator, AttestationDuty]]) -> None:
+    """Decide the attestation data of a slot with a single consensus instance for all attestation duties
+    of the cluster in the slot, each with its distributed validator, instead of one instance per duty.
+    Then record it for each duty concurrently, and sign it for all recorded duties with a single bulk RS call.
+    Duties whose slashing DB refuses the attestation data are dropped from the signing set.
+    Raises the first failure, if any, once the recorded duties have been signed.
+    """
+    attestation_duties = [attestation_duty for _, attestation_duty in routed_attestation_duties]
+    slot = attestation_duties[0].slot
+    assert all(attestation_duty.slot == slot for attestation_duty in attestation_duties)
+    slot_attestation_duties = [
+        (distributed_validator.slashing_db, attestation_duty)
+        for distributed_validator, attestation_duty in routed_attestation_duties
+    ]
+    slashing_dbs = list({id(slashing_db): slashing_db for slashing_db, _ in slot_attestation_duties}.values())
+    attestation_data = await consensus_on_slot_attestation_async(slot_attestation_duties)
+    duty_attestation_data = [get_attestation_data_for_duty(attestation_data, attestation_duty)
+                             for attestation_duty in attestation_duties]
+    contexts = [SigningContext(data) for data in duty_attestation_data]
+    # The fork version is resolved while the attestation data is recorded
+    fork_version, *results = await asyncio.gather(
+        run_blocking(get_fork_version, compute_start_slot_at_epoch(attestation_data.target.epoch)),
+        *(run_blocking(record_attestation_data_if_valid, slashing_db, attestation_duty, data, context)
+          for (slashing_db, attestation_duty), data, context
+          in zip(slot_attestation_duties, duty_attestation_data, contexts)),
+        return_exceptions=True)
+    if isinstance(fork_version, BaseException):
+        raise fork_version
+    # The signature shares are only requested once the slashing DBs are persisted
+    await asyncio.gather(*(run_blocking(commit_slashing_db, slashing_db) for slashing_db in slashing_dbs))
+    # Sign the attestation data of the recorded duties using RS
+    recorded = [i for i, result in enumerate(results) if result is True]
+    signing_roots = [compute_attestation_signing_root(duty_attestation_data[i], contexts[i]) for i in recorded]
+    attestation_signature_shares = await rs_sign_attestations_async([
+        (attestation_duties[i].pubkey, duty_attestation_data[i], signing_root)
+        for i, signing_root in zip(recorded, signing_roots)
+    ], fork_version)
+    # The shares of all recorded duties go out in the same batches to the DV peers
+    await run_blocking(queue_signature_share_messages, [
+        build_signature_share_message(attestation_duties[i], DUTY_TYPE_ATTESTATION, signing_root,
+                                      attestation_signature_share)
+        for i, signing_root, attestation_signature_share in zip(recorded, signing_roots, attestation_signature_shares)
+    ], state.share_batcher)
+    await run_blocking(record_decided_values, state, DUTY_TYPE_ATTESTATION, [
+        (attestation_duties[i], duty_attestation_data[i], signing_root, attestation_signature_share)
+        for i, signing_root, attestation_signature_share in zip(recorded, signing_roots, attestation_signature_shares)
+    ])
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+
+
+def build_signature_share_message(duty: Union[AttestationDuty, ProposerDuty], duty_type: int, signing_root: Root,
+                                  signature_share: BLSSignature) -> bytes:
+    """Encode the signature share of this node over signing_root for the duty as a `SignatureShareMessage`.
+    """
+    return encode_signature_share_message(duty.validator_index, duty_type, duty.slot, signing_root,
+                                          get_co_validator_index(duty.pubkey), signature_share)
+
+
+def decode_signature_share(state: State, view: memoryview,
+                           offset: int = 0) -> Optional[Tuple[int, SignatureShare]]:
+    """Decode the `SignatureShareMessage` at offset in view into its duty type & signature share,
+    resolving its validator index to the pubkey of the distributed validator.
+    Returns None for messages of unknown validators or duty types.
+    """
+    validator_index, duty_type, slot, signing_root, co_validator_index, signature = \
+        decode_signature_share_message(view, offset)
+    distributed_validator = state.index_to_distributed_validator.get(int(validator_index))
+    if distributed_validator is None or duty_type not in DUTY_TYPES:
+        return None
+    return duty_type, SignatureShare(pubkey=distributed_validator.validator_identity.pubkey, slot=slot,
+                                     signing_root=signing_root, co_validator_index=co_validator_index,
+                                     signature=signature)
+
+
+def receive_signature_share_batch(state: State, batch: memoryview, verifier: ShareVerifier) -> None:
+    """Demultiplex a batch of signature shares received from a DV peer node, queueing the shares
+    of known validators for verification, e.g. on the verifier of the share combiner of state,
+    after which `flush_signature_shares` adds them to the share aggregator.
+    """
+    for offset in get_signature_share_batch_offsets(batch):
+        decoded = decode_signature_share(state, batch, offset)
+        if decoded is not None:
+            queue_signature_share(verifier, decoded[1])
+
+
+def verify_signature_shares(state: State, signature_shares: List[SignatureShare]) -> List[SignatureShare]:
+    """Verify the signature shares against the pubkeys of their co-validators in one batch, verifying
+    each share on its own to find the invalid ones if it fails. Returns the valid shares, in order.
+    Shares of unknown validators or co-validators are invalid.
+    """
+    known_shares, signature_sets = [], []
+    for share in signature_shares:
+        distributed_validator = state.pubkey_to_distributed_validator.get(bytes(share.pubkey))
+        if distributed_validator is None:
+            continue
+        co_validator = next((co_validator for co_validator in distributed_validator.co_validators
+                             if int(co_validator.index) == int(share.co_validator_index)), None)
+        if co_validator is None:
+            continue
+        known_shares.append(share)
+        signature_sets.append((co_validator.pubkey, share.signing_root, share.signature))
+    invalid = set(find_invalid_signature_sets(signature_sets))
+    return [share for i, share in enumerate(known_shares) if i not in invalid]
+
+
+def flush_signature_shares(state: State, verifier: ShareVerifier, aggregator: ShareAggregator) -> None:
+    """Verify the signature shares pending in the verifier, e.g. those received for a slot,
+    & add the valid ones to the aggregator, so that only valid shares are combined.
+    """
+    signature_shares = take_pending_signature_shares(verifier)
+    valid_shares = verify_signature_shares(state, signature_shares)
+    with verifier.lock:
+        verifier.num_verified += len(valid_shares)
+        verifier.num_invalid += len(signature_shares) - len(valid_shares)
+    for share in valid_shares:
+        add_signature_share(aggregator, share)
+
+
+def combine_signature_shares(distributed_validator: DistributedValidator,
+                             signature_shares: List[SignatureShare]) -> BLSSignature:
+    """Combine the signature shares of distinct co-validators of the distributed validator, at least
+    as many as the threshold, into the signature of the validator, e.g. in `attestation_combination`
+    & `block_combination`. A single invalid share spoils the combination, so shares are verified first,
+    see `flush_signature_shares`.
+    """
+    signature_shares = sorted(signature_shares, key=lambda share: int(share.co_validator_index))
+    co_validator_indices = tuple(int(share.co_validator_index) for share in signature_shares)
+    assert set(co_validator_indices) <= {int(co_validator.index)
+                                         for co_validator in distributed_validator.co_validators}
+    # Computing the coefficients is negligible next to the multi-scalar multiplication
+    coefficients = compute_lagrange_coefficients(co_validator_indices)
+    return combine_bls_signature_shares([share.signature for share in signature_shares], coefficients)
+
+
+def randao_reveal_combination(validator_pubkey: BLSPubkey, epoch: Epoch) -> BLSSignature:
+    """
+    randao_reveal Combination Process, for the validator with validator_pubkey in epoch:
     1. Always keep listening for randao reveal signature shares from other DVCs.
     2a. Whenever a set of signature shares are found in Step 1 that can be
         combined to construct a complete randao reveal, construct the complete value.
     3. Return the randao reveal.
+    Runs `randao_reveal_combination_async` on the event loop of the current thread.
+    """
+    return run_async(randao_reveal_combination_async(validator_pubkey, epoch))
+
+
+async def randao_reveal_combination_async(validator_pubkey: BLSPubkey, epoch: Epoch) -> BLSSignature:
+    """Async version of `randao_reveal_combination`.
     """
     # 1. Always listen for randao reveal signature shares from DV peers.
-    randao_reveal_signature_shares = listen_for_randao_reveal_signature_shares()
+    randao_reveal_signature_shares = await listen_for_randao_reveal_signature_shares_async(validator_pubkey, epoch)
     # 2. Reconstruct complete signed value by combining signature shares
     complete_signed_randao_reveal = construct_signed_randao_reveal(randao_reveal_signature_shares)
     # 3. Return complete signed value
     return complete_signed_randao_reveal
 
 
-def attestation_combination() -> None:
+def create_share_combiner(state: State, threshold: int,
+                          window_seconds: float = SHARE_COMBINER_WINDOW_SECONDS) -> ShareCombiner:
+    """Combine the signature shares of threshold co-validators of the distributed validators of state into
+    the signed values submitted to the BN. The combiner is set on state, so that the duty flows record
+    the values they decide & the signature shares of this node on it.
+    """
+    state.share_combiner = ShareCombiner(
+        window_seconds=window_seconds, verifier=ShareVerifier(),
+        aggregator=create_share_aggregator(threshold, partial(on_signature_shares_combinable, state)))
+    return state.share_combiner
+
+
+def record_decided_values(state: State, duty_type: int,
+                          decided_values: List[Tuple[Union[AttestationDuty, ProposerDuty],
+                                                     Union[AttestationData, BeaconBlock], Root, BLSSignature]]) -> None:
+    """Record each (duty, value, signing root, signature share) decided & signed by this node,
+    & add its signature share to the aggregator, so that the shares of the DV peers over the signing root
+    are combined into the signed value. Values whose shares already reached the threshold are combined right away.
+    Nothing is recorded if state has no share combiner.
+    """
+    combiner = state.share_combiner
+    if combiner is None:
+        return
+    for duty, value, signing_root, signature_share in decided_values:
+        # The slot of a duty of this node is trusted, so the share of this node is never dropped as early
+        set_share_aggregator_slot(combiner.aggregator, duty.slot)
+        key = (bytes(duty.pubkey), bytes(signing_root))
+        decided_value = DecidedValue(duty_type=duty_type, duty=duty, value=value)
+        with combiner.lock:
+            combiner.decided_values[key] = decided_value
+            signature_shares = combiner.undecided_shares.pop(key, None)
+        if signature_shares is not None:
+            submit_signed_value(state, decided_value, signature_shares)
+            continue
+        add_signature_share(combiner.aggregator, SignatureShare(
+            pubkey=duty.pubkey, slot=duty.slot, signing_root=signing_root,
+            co_validator_index=get_co_validator_index(duty.pubkey), signature=signature_share))
+
+
+def on_signature_shares_combinable(state: State, signature_shares: List[SignatureShare]) -> None:
+    """Called by the share aggregator with threshold signature shares over the same signing root.
+    They are combined into the signed value decided by this node, or kept until this node decides it.
+    """
+    combiner = state.share_combiner
+    assert combiner is not None
+    key = (bytes(signature_shares[0].pubkey), bytes(signature_shares[0].signing_root))
+    with combiner.lock:
+        decided_value = combiner.decided_values.get(key)
+        if decided_value is None:
+            combiner.undecided_shares[key] = signature_shares
+            return
+    submit_signed_value(state, decided_value, signature_shares)
+
+
+def submit_signed_value(state: State, decided_value: DecidedValue, signature_shares: List[SignatureShare]) -> None:
+    distributed_validator = state.pubkey_to_distributed_validator[bytes(decided_value.duty.pubkey)]
+    if decided_value.duty_type == DUTY_TYPE_ATTESTATION:
+        assert isinstance(decided_value.duty, AttestationDuty) and isinstance(decided_value.value, AttestationData)
+        attestation_combination(distributed_validator, decided_value.duty, decided_value.value, signature_shares)
+    else:
+        assert decided_value.duty_type == DUTY_TYPE_BLOCK and isinstance(decided_value.value, BeaconBlock)
+        block_combination(distributed_validator, decided_value.value, signature_shares)
+    combiner = state.share_combiner
+    assert combiner is not None
+    with combiner.lock:
+        combiner.num_submitted += 1
+
+
+def flush_share_combiner(state: State, combiner: ShareCombiner, slot: Slot) -> None:
+    """Advance the combiner to slot, then verify the signature shares received since the last flush
+    in one batch & add the valid ones to the aggregator. The decided values & the undecided shares
+    of the slots evicted from the aggregator are dropped.
+    """
+    set_share_aggregator_slot(combiner.aggregator, slot)
+    oldest_slot = int(slot) - combiner.aggregator.max_slots
+    with combiner.lock:
+        for key in [key for key, decided_value in combiner.decided_values.items()
+                    if decided_value.duty.slot < oldest_slot]:
+            del combiner.decided_values[key]
+        for key in [key for key, signature_shares in combiner.undecided_shares.items()
+                    if signature_shares[0].slot < oldest_slot]:
+            del combiner.undecided_shares[key]
+    flush_signature_shares(state, combiner.verifier, combiner.aggregator)
+
+
+def run_share_combiner(state: State, combiner: ShareCombiner, genesis_time: int, clock: Clock) -> None:
+    """Flush the combiner every window at the current slot of the clock until stopped.
+    """
+    while not combiner.stop.wait(combiner.window_seconds):
+        slot = Slot(max(int(clock.get_time()) - genesis_time, 0) // int(config.SECONDS_PER_SLOT))
+        flush_share_combiner(state, combiner, slot)
+
+
+def start_share_combiner(state: State, combiner: ShareCombiner, genesis_time: int,
+                         clock: Optional[Clock] = None) -> threading.Thread:
+    """Combine the signature shares received by `receive_signature_share_batch` on the verifier of the combiner,
+    flushing it in a background thread.
+    """
+    combiner.stop.clear()
+    thread = threading.Thread(target=run_share_combiner,
+                              args=(state, combiner, genesis_time, clock if clock is not None else Clock()),
+                              daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_share_combiner(combiner: ShareCombiner) -> None:
+    combiner.stop.set()
+
+
+def attestation_combination(distributed_validator: DistributedValidator, attestation_duty: AttestationDuty,
+                            attestation_data: AttestationData,
+                            attestation_signature_shares: List[SignatureShare]) -> None:
     """
     Attestation Combination Process:
-    1. Always keep listening for attestation signature shares from other DVCs.
-    2a. Whenever a set of attestation signature shares are found in Step 1 that can be
-        combined to construct a complete signed attestation, construct the attestation.
-    2b. Send the attestation to the beacon node for Ethereum p2p gossip.
+    1. Always keep listening for attestation signature shares from other DVCs: the batches received from
+        the DV peers are passed to `receive_signature_share_batch`.
+    2. Verify the received signature shares in one batch per window & add the valid ones to the share aggregator,
+        see `flush_share_combiner`.
+    3a. Whenever a set of attestation signature shares are found in Step 2 that can be combined to
+        construct a complete signed attestation of the attestation data decided for the attestation duty,
+        construct the attestation.
+    3b. Send the attestation to the beacon node for Ethereum p2p gossip.
+    This is Step 3, run by the share aggregator with the signature shares.
     """
-    # 1. Always listen for block signature shares from DV peers.
-    attestation_signature_shares = listen_for_attestation_signature_shares()
-    # 2. Reconstruct complete signed block by combining attestation signature shares
-    complete_signed_attestation = construct_signed_attestation(attestation_signature_shares)
-    # 3. Send to beacon node for gossip
-    bn_submit_attestation(complete_signed_attestation)
+    # 3a. Reconstruct complete signed attestation by combining attestation signature shares
+    attestation = Attestation(
+        aggregation_bits=[i == attestation_duty.validator_committee_index
+                          for i in range(attestation_duty.committee_length)],
+        data=attestation_data,
+        signature=combine_signature_shares(distributed_validator, attestation_signature_shares))
+    # 3b. Send to beacon node for gossip
+    bn_submit_attestation(attestation)
 
 
-def block_combination() -> None:
+def block_combination(distributed_validator: DistributedValidator, block: BeaconBlock,
+                      block_signature_shares: List[SignatureShare]) -> None:
     """
     Block Combination Process:
-    1. Always keep listening for block signature shares using from other DVCs.
-    2a. Whenever a set of block signature shares are found in Step 1 that can be
-        combined to construct a complete signed block, construct the block.
-    2b. Send the block to the beacon node for Ethereum p2p gossip.
-    """
-    # 1. Always listen for block signature shares from DV peers.
-    block_signature_shares = listen_for_block_signature_shares()
-    # 2. Reconstruct complete signed block by combining block signature shares
-    complete_signed_block = construct_signed_block(block_signature_shares)
-    # 3. Send to beacon node for gossip
-    bn_submit_block(complete_signed_block)
+    1. Always keep listening for block signature shares from other DVCs: the batches received from
+        the DV peers are passed to `receive_signature_share_batch`.
+    2. Verify the received signature shares in one batch per window & add the valid ones to the share aggregator,
+        see `flush_share_combiner`.
+    3a. Whenever a set of block signature shares are found in Step 2 that can be combined to construct
+        a complete signed block of the block decided by this node, construct the signed block.
+    3b. Send the block to the beacon node for Ethereum p2p gossip.
+    This is Step 3, run by the share aggregator with the signature shares.
+    """
+    # 3a. Reconstruct complete signed block by combining block signature shares
+    signed_block = SignedBeaconBlock(message=block,
+                                     signature=combine_signature_shares(distributed_validator, block_signature_shares))
+    # 3b. Send to beacon node for gossip
+    bn_submit_block(signed_block)
@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+from contextvars import ContextVar
+from functools import partial
+from typing import (
+    Any,
+    Callable,
+    Coroutine,
+    Optional,
+    TypeVar,
+)
+
+"""
+Async Helper Functions
+"""
+
+
+T = TypeVar("T")
+
+# Executor of the blocking calls made from the async duty flows, None for the default executor of the event loop
+BLOCKING_EXECUTOR: ContextVar[Optional[Executor]] = ContextVar("BLOCKING_EXECUTOR", default=None)
+# Event loop of each thread calling the sync API, reused across calls
+THREAD_EVENT_LOOPS = threading.local()
+
+
+async def run_blocking(function: Callable[..., T], *args: Any) -> T:
+    """Run the blocking function on the executor of the current context without blocking the event loop.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(BLOCKING_EXECUTOR.get(), partial(function, *args))
+
+
+def get_thread_event_loop() -> asyncio.AbstractEventLoop:
+    """Get the event loop of the current thread, created on first use.
+    """
+    loop: Optional[asyncio.AbstractEventLoop] = getattr(THREAD_EVENT_LOOPS, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = THREAD_EVENT_LOOPS.loop = asyncio.new_event_loop()
+    return loop
+
+
+def cancel_remaining_tasks(loop: asyncio.AbstractEventLoop) -> None:
+    """Cancel the tasks left running on the loop & wait for them, as `asyncio.run` does on return.
+    """
+    tasks = asyncio.all_tasks(loop)
+    for task in tasks:
+        task.cancel()
+    if tasks:
+        loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+
+
+def run_async(coroutine: Coroutine[Any, Any, T], executor: Optional[Executor] = None) -> T:
+    """Run the coroutine to completion on the event loop of the current thread, running its blocking calls
+    on the executor, if given. The loop & its default executor are reused across calls, e.g. for every duty
+    a scheduler worker serves. Tasks the coroutine leaves running are cancelled on return.
+    This is how the sync API wraps the async one, so it must not be called from a running event loop.
+    """
+    async def run() -> T:
+        BLOCKING_EXECUTOR.set(executor)
+        return await coroutine
+    loop = get_thread_event_loop()
+    try:
+        return loop.run_until_complete(run())
+    finally:
+        cancel_remaining_tasks(loop)
@@ -0,0 +1,67 @@
+from concurrent.futures import Future
+
+from eth2spec.altair.mainnet import (
+    AttestationData,
+    SLOTS_PER_EPOCH,
+)
+
+from ...eth_node_interface import (
+    bn_produce_attestation_data,
+)
+
+from ..types import (
+    AttestationDataCache,
+    AttestationDuty,
+    CommitteeIndex,
+    Slot,
+)
+
+"""
+Attestation Data Helper Functions
+"""
+
+
+# Attestations can be included up to an epoch after their slot
+ATTESTATION_DATA_CACHE_SLOTS = int(SLOTS_PER_EPOCH)
+ATTESTATION_DATA_CACHE = AttestationDataCache()
+
+
+def get_attestation_data(slot: Slot, committee_index: CommitteeIndex,
+                         cache: AttestationDataCache = ATTESTATION_DATA_CACHE) -> AttestationData:
+    """Get the attestation data for the slot & committee index from the BN, once per slot & committee index.
+    Concurrent callers wait for the single fetch. The returned attestation data is shared & must not be modified.
+    """
+    key = (int(slot), int(committee_index))
+    with cache.lock:
+        future = cache.attestation_data.get(key)
+        fetch = future is None
+        if future is None:
+            cache.misses += 1
+            future = cache.attestation_data[key] = Future()
+            # Evict the attestation data of past slots
+            for past_key in [past_key for past_key in cache.attestation_data
+                             if past_key[0] + ATTESTATION_DATA_CACHE_SLOTS < key[0]]:
+                del cache.attestation_data[past_key]
+        else:
+            cache.hits += 1
+    if fetch:
+        try:
+            future.set_result(bn_produce_attestation_data(slot, committee_index))
+        except Exception as exception:
+            # Let the next caller retry
+            with cache.lock:
+                cache.attestation_data.pop(key, None)
+            future.set_exception(exception)
+    return future.result()
+
+
+def get_attestation_data_for_duty(attestation_data: AttestationData,
+                                  attestation_duty: AttestationDuty) -> AttestationData:
+    """Get the attestation data of the attestation duty from the attestation data decided for its slot.
+    Attestation data of the same slot only differs in the committee index.
+    """
+    if attestation_data.index == attestation_duty.committee_index:
+        return attestation_data
+    attestation_data = attestation_data.copy()
+    attestation_data.index = attestation_duty.committee_index
+    return attestation_data
@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    List,
+    Tuple,
+)
+
+from ...eth_node_interface import (
+    bn_get_attestation_duties_and_dependent_root_for_epoch,
+)
+
+from ..types import (
+    AttestationDutiesCache,
+    AttestationDutiesCacheEntry,
+    AttestationDuty,
+    Epoch,
+    Root,
+    ValidatorIndex,
+)
+
+"""
+Attestation Duties Helper Functions
+"""
+
+
+# BNs limit the number of validator indices per request
+ATTESTATION_DUTIES_CHUNK_SIZE = 1024
+ATTESTATION_DUTIES_MAX_CONCURRENT_REQUESTS = 8
+ATTESTATION_DUTIES_MAX_ATTEMPTS = 3
+# The duties of the current & the next epoch are kept
+ATTESTATION_DUTIES_CACHE_EPOCHS = 2
+ATTESTATION_DUTIES_CACHE = AttestationDutiesCache()
+
+
+def fetch_attestation_duties(validator_indices: List[ValidatorIndex], epoch: Epoch,
+                             chunk_size: int = ATTESTATION_DUTIES_CHUNK_SIZE,
+                             max_concurrent_requests: int = ATTESTATION_DUTIES_MAX_CONCURRENT_REQUESTS
+                             ) -> Tuple[Root, List[AttestationDuty]]:
+    """Fetch the attestation duties for the validator indices in the epoch with concurrent requests
+    of at most chunk_size validator indices each. Returns the dependent root with the merged duties.
+    The fetch is retried if the chunks disagree on the dependent root, i.e. if a reorg happened meanwhile.
+    """
+    chunks = [validator_indices[i:i + chunk_size] for i in range(0, len(validator_indices), chunk_size)]
+    assert chunks != []
+    with ThreadPoolExecutor(max_workers=min(len(chunks), max_concurrent_requests)) as executor:
+        for _ in range(ATTESTATION_DUTIES_MAX_ATTEMPTS):
+            responses = list(executor.map(
+                lambda chunk: bn_get_attestation_duties_and_dependent_root_for_epoch(chunk, epoch), chunks))
+            dependent_roots = {bytes(dependent_root) for dependent_root, _ in responses}
+            if len(dependent_roots) == 1:
+                break
+    assert len(dependent_roots) == 1
+    return responses[0][0], [duty for _, duties in responses for duty in duties]
+
+
+def get_attestation_duties(validator_indices: List[ValidatorIndex], epoch: Epoch,
+                           cache: AttestationDutiesCache = ATTESTATION_DUTIES_CACHE) -> List[AttestationDuty]:
+    """Get the attestation duties for the validator indices in the epoch, in the order of the validator indices.
+    Only the duties of validator indices that were not fetched for the epoch yet are fetched from the BN.
+    The returned duties are shared & must not be modified.
+    """
+    fetched = False
+    while True:
+        with cache.lock:
+            entry = cache.entries.get(int(epoch))
+            missing = [validator_index for validator_index in validator_indices
+                       if entry is None or int(validator_index) not in entry.validator_indices]
+            if missing == []:
+                assert entry is not None
+                if not fetched:
+                    cache.hits += 1
+                return [entry.duties[int(validator_index)] for validator_index in validator_indices
+                        if int(validator_index) in entry.duties]
+            cache.misses += 1
+        dependent_root, duties = fetch_attestation_duties(missing, epoch)
+        fetched = True
+        with cache.lock:
+            entry = cache.entries.get(int(epoch))
+            if entry is None or entry.dependent_root != dependent_root:
+                # Duties fetched for another dependent root are stale & are fetched again on the next iteration
+                entry = cache.entries[int(epoch)] = AttestationDutiesCacheEntry(dependent_root=dependent_root)
+                for past_epoch in [past_epoch for past_epoch in cache.entries
+                                   if past_epoch + ATTESTATION_DUTIES_CACHE_EPOCHS <= int(epoch)]:
+                    del cache.entries[past_epoch]
+            entry.validator_indices.update(int(validator_index) for validator_index in missing)
+            entry.duties.update({int(duty.validator_index): duty for duty in duties})
+
+
+def invalidate_attestation_duties(epoch: Epoch, dependent_root: Root,
+                                  cache: AttestationDutiesCache = ATTESTATION_DUTIES_CACHE) -> bool:
+    """Drop the attestation duties of the epoch if they were fetched for another dependent root,
+    e.g. when a head event reports a new dependent root for the epoch. Returns whether they were dropped.
+    """
+    with cache.lock:
+        entry = cache.entries.get(int(epoch))
+        if entry is None or entry.dependent_root == dependent_root:
+            return False
+        del cache.entries[int(epoch)]
+        return True
@@ -0,0 +1,94 @@
+from bisect import bisect_right
+import threading
+from typing import (
+    List,
+)
+
+from eth2spec.altair.mainnet import (
+    SLOTS_PER_EPOCH,
+    Fork,
+    Version,
+    compute_epoch_at_slot,
+    config,
+)
+
+from ...eth_node_interface import (
+    bn_get_fork_schedule,
+)
+
+from ..types import (
+    ForkSchedule,
+    Slot,
+)
+
+"""
+Fork Schedule Helper Functions
+"""
+
+
+# Once per epoch
+FORK_SCHEDULE_REFRESH_SECONDS = int(config.SECONDS_PER_SLOT * SLOTS_PER_EPOCH)
+FORK_SCHEDULE = ForkSchedule()
+
+
+def set_fork_schedule(forks: List[Fork], fork_schedule: ForkSchedule = FORK_SCHEDULE) -> None:
+    """Replace the forks of the fork_schedule.
+    """
+    # The schedule must cover genesis
+    assert forks != []
+    forks = sorted(forks, key=lambda fork: int(fork.epoch))
+    with fork_schedule.lock:
+        fork_schedule.forks = forks
+        fork_schedule.epochs = [int(fork.epoch) for fork in forks]
+
+
+def load_fork_schedule(fork_schedule: ForkSchedule = FORK_SCHEDULE) -> None:
+    """Load the fork schedule from the BN.
+    """
+    set_fork_schedule(bn_get_fork_schedule(), fork_schedule)
+    fork_schedule.num_loads += 1
+
+
+def get_fork(slot: Slot, fork_schedule: ForkSchedule = FORK_SCHEDULE) -> Fork:
+    """Get the fork at the slot from memory. The fork schedule is loaded from the BN on first use.
+    """
+    if fork_schedule.forks == []:
+        load_fork_schedule(fork_schedule)
+    with fork_schedule.lock:
+        forks, epochs = fork_schedule.forks, fork_schedule.epochs
+    i = bisect_right(epochs, int(compute_epoch_at_slot(slot))) - 1
+    assert i >= 0
+    return forks[i]
+
+
+def get_fork_version(slot: Slot, fork_schedule: ForkSchedule = FORK_SCHEDULE) -> Version:
+    """Get the fork version at the slot from memory.
+    """
+    return get_fork(slot, fork_schedule).current_version
+
+
+def refresh_fork_schedule(fork_schedule: ForkSchedule, interval_seconds: float) -> None:
+    """Reload the fork schedule from the BN every interval_seconds until stopped,
+    so that newly scheduled forks are picked up.
+    """
+    while not fork_schedule.stop_refresh.wait(interval_seconds):
+        try:
+            load_fork_schedule(fork_schedule)
+        except Exception:
+            # Keep serving the last known fork schedule until the BN is reachable again
+            fork_schedule.num_load_failures += 1
+
+
+def start_fork_schedule_refresh(fork_schedule: ForkSchedule = FORK_SCHEDULE,
+                                interval_seconds: float = FORK_SCHEDULE_REFRESH_SECONDS) -> threading.Thread:
+    """Load the fork schedule & refresh it in a background thread.
+    """
+    load_fork_schedule(fork_schedule)
+    fork_schedule.stop_refresh.clear()
+    thread = threading.Thread(target=refresh_fork_schedule, args=(fork_schedule, interval_seconds), daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_fork_schedule_refresh(fork_schedule: ForkSchedule = FORK_SCHEDULE) -> None:
+    fork_schedule.stop_refresh.set()
@@ -0,0 +1,172 @@
+import http.client
+import json
+import queue
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+from urllib.parse import urlsplit
+
+from eth2spec.altair.mainnet import (
+    AttestationData,
+    BeaconBlock,
+    Fork,
+)
+
+from ..types import (
+    BLSPubkey,
+    BLSSignature,
+    Epoch,
+    RemoteSigner,
+    RemoteSignerRequest,
+    Root,
+)
+
+"""
+Remote Signer Client Helper Functions
+See here for the API:
+https://consensys.github.io/web3signer/web3signer-eth2.html
+"""
+
+
+REMOTE_SIGNER_TIMEOUT_SECONDS = 1.0
+REMOTE_SIGNER_MAX_CONNECTIONS = 32
+
+# Errors of a keep-alive connection that the RS closed while it was idle
+STALE_CONNECTION_ERRORS = (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError)
+
+
+def open_remote_signer(url: str, timeout_seconds: float = REMOTE_SIGNER_TIMEOUT_SECONDS,
+                       max_connections: int = REMOTE_SIGNER_MAX_CONNECTIONS) -> RemoteSigner:
+    """Create a client of the RS at url, e.g. http://localhost:9000. Connections are opened on demand.
+    """
+    parts = urlsplit(url)
+    assert parts.scheme == "http" and parts.hostname is not None
+    return RemoteSigner(host=parts.hostname, port=parts.port or 80,
+                        timeout_seconds=timeout_seconds, max_connections=max_connections)
+
+
+def close_remote_signer(remote_signer: RemoteSigner) -> None:
+    """Wait for the requests in flight & close all connections.
+    """
+    remote_signer.executor.shutdown(wait=True)
+    while not remote_signer.connections.empty():
+        remote_signer.connections.get_nowait().close()
+
+
+def post_sign_request(connection: http.client.HTTPConnection, request: RemoteSignerRequest) -> BLSSignature:
+    connection.request("POST", "/api/v1/eth2/sign/0x" + bytes(request.pubkey).hex(),
+                       body=json.dumps(request.body), headers={"Content-Type": "application/json",
+                                                               "Accept": "application/json"})
+    response = connection.getresponse()
+    # Reading the whole response keeps the connection reusable
+    content = response.read()
+    if response.status != 200:
+        raise http.client.HTTPException(f"RS responded {response.status}: {content[:200]!r}")
+    if response.getheader("Content-Type", "").startswith("application/json"):
+        signature = json.loads(content)["signature"]
+    else:
+        signature = content.decode().strip()
+    return BLSSignature(bytes.fromhex(signature[2:]))
+
+
+def remote_signer_sign(remote_signer: RemoteSigner, request: RemoteSignerRequest) -> BLSSignature:
+    """Send the request over an idle pooled connection, or a new one, & return the signature.
+    Runs on the executor of the remote_signer.
+    """
+    try:
+        connection: Optional[http.client.HTTPConnection] = remote_signer.connections.get_nowait()
+    except queue.Empty:
+        connection = None
+    if connection is not None:
+        try:
+            signature = post_sign_request(connection, request)
+            remote_signer.connections.put(connection)
+            return signature
+        except STALE_CONNECTION_ERRORS:
+            # Retry once on a fresh connection
+            connection.close()
+        except Exception:
+            # The connection may be mid-response, e.g. after a timeout, so it is not reused
+            connection.close()
+            raise
+    connection = http.client.HTTPConnection(remote_signer.host, remote_signer.port,
+                                            timeout=remote_signer.timeout_seconds)
+    with remote_signer.lock:
+        remote_signer.num_connections_opened += 1
+    try:
+        signature = post_sign_request(connection, request)
+    except Exception:
+        connection.close()
+        raise
+    remote_signer.connections.put(connection)
+    return signature
+
+
+def rs_sign(remote_signer: RemoteSigner, request: RemoteSignerRequest) -> BLSSignature:
+    """Sign a single request.
+    """
+    return remote_signer.executor.submit(remote_signer_sign, remote_signer, request).result()
+
+
+def rs_sign_bulk(remote_signer: RemoteSigner, requests: List[RemoteSignerRequest]) -> List[BLSSignature]:
+    """Sign all requests, e.g. of all duties in a slot, concurrently over the pooled connections.
+    Returns the signatures in the order of the requests, once all requests completed.
+    Raises the first failure if any request failed.
+    """
+    futures = [remote_signer.executor.submit(remote_signer_sign, remote_signer, request) for request in requests]
+    exceptions = [future.exception() for future in futures]
+    for exception in exceptions:
+        if exception is not None:
+            raise exception
+    return [future.result() for future in futures]
+
+
+def encode_json(value: Any) -> Any:
+    """Encode the SSZ object as JSON the way the beacon & RS APIs do, with integers as decimal strings.
+    """
+    if isinstance(value, dict):
+        return {key: encode_json(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [encode_json(item) for item in value]
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int):
+        return str(value)
+    return value
+
+
+def build_sign_request_body(signing_type: str, signing_root: Root, fork: Fork,
+                            genesis_validators_root: Root, **payload: Any) -> Dict[str, Any]:
+    return {
+        "type": signing_type,
+        "fork_info": {
+            "fork": encode_json(fork.to_obj()),
+            "genesis_validators_root": "0x" + bytes(genesis_validators_root).hex(),
+        },
+        "signingRoot": "0x" + bytes(signing_root).hex(),
+        **payload,
+    }
+
+
+def build_attestation_sign_request(pubkey: BLSPubkey, attestation_data: AttestationData, signing_root: Root,
+                                   fork: Fork, genesis_validators_root: Root) -> RemoteSignerRequest:
+    body = build_sign_request_body("ATTESTATION", signing_root, fork, genesis_validators_root,
+                                   attestation=encode_json(attestation_data.to_obj()))
+    return RemoteSignerRequest(pubkey=pubkey, body=body)
+
+
+def build_randao_reveal_sign_request(pubkey: BLSPubkey, epoch: Epoch, signing_root: Root,
+                                     fork: Fork, genesis_validators_root: Root) -> RemoteSignerRequest:
+    body = build_sign_request_body("RANDAO_REVEAL", signing_root, fork, genesis_validators_root,
+                                   randao_reveal={"epoch": str(int(epoch))})
+    return RemoteSignerRequest(pubkey=pubkey, body=body)
+
+
+def build_block_sign_request(pubkey: BLSPubkey, block: BeaconBlock, signing_root: Root,
+                             fork: Fork, genesis_validators_root: Root) -> RemoteSignerRequest:
+    body = build_sign_request_body("BLOCK_V2", signing_root, fork, genesis_validators_root,
+                                   beacon_block={"version": "ALTAIR", "block": encode_json(block.to_obj())})
+    return RemoteSignerRequest(pubkey=pubkey, body=body)
@@ -0,0 +1,84 @@
+from typing import (
+    Callable,
+    List,
+)
+
+from eth2spec.altair.mainnet import (
+    SLOTS_PER_EPOCH,
+)
+
+from ..types import (
+    ShareAggregator,
+    ShareBucket,
+    SignatureShare,
+    Slot,
+)
+
+"""
+Signature Share Aggregation Helper Functions
+"""
+
+
+# Attestations can be included up to an epoch after their slot
+SHARE_AGGREGATOR_MAX_SLOTS = int(SLOTS_PER_EPOCH)
+# An honest co-validator signs a few values per validator & slot, e.g. a randao reveal, a block & an attestation
+SHARE_AGGREGATOR_MAX_SHARES_PER_SLOT = 4
+
+
+def create_share_aggregator(threshold: int, on_threshold: Callable[[List[SignatureShare]], None],
+                            max_slots: int = SHARE_AGGREGATOR_MAX_SLOTS) -> ShareAggregator:
+    return ShareAggregator(threshold=threshold, on_threshold=on_threshold, max_slots=max_slots)
+
+
+def set_share_aggregator_slot(aggregator: ShareAggregator, slot: Slot) -> None:
+    """Advance the current slot of the aggregator, evicting the buckets of slots that are too old.
+    """
+    with aggregator.lock:
+        if int(slot) <= aggregator.current_slot:
+            return
+        aggregator.current_slot = int(slot)
+        oldest_slot = aggregator.current_slot - aggregator.max_slots
+        for key in [key for key, bucket in aggregator.buckets.items() if bucket.slot < oldest_slot]:
+            del aggregator.buckets[key]
+        for co_validator_key in [co_validator_key for co_validator_key in aggregator.num_shares
+                                 if co_validator_key[2] < oldest_slot]:
+            del aggregator.num_shares[co_validator_key]
+
+
+def add_signature_share(aggregator: ShareAggregator, share: SignatureShare) -> bool:
+    """Add the signature share to its bucket, calling on_threshold with the shares of the bucket
+    if the share completes the threshold. Returns whether the share was accepted.
+    Shares of evicted or future slots, shares of combined buckets, duplicate shares & shares in excess
+    of SHARE_AGGREGATOR_MAX_SHARES_PER_SLOT per co-validator, validator & slot are dropped.
+    """
+    slot = int(share.slot)
+    key = (bytes(share.pubkey), bytes(share.signing_root))
+    co_validator_key = (int(share.co_validator_index), bytes(share.pubkey), slot)
+    with aggregator.lock:
+        bucket = aggregator.buckets.get(key)
+        if slot < aggregator.current_slot - aggregator.max_slots or (bucket is not None and bucket.combined):
+            aggregator.num_late += 1
+            return False
+        if slot > aggregator.current_slot + 1:
+            aggregator.num_early += 1
+            return False
+        if bucket is not None and int(share.co_validator_index) in bucket.shares:
+            aggregator.num_duplicate += 1
+            return False
+        # Bounds the memory a misbehaving co-validator can use with shares over arbitrary signing roots
+        if aggregator.num_shares.get(co_validator_key, 0) >= SHARE_AGGREGATOR_MAX_SHARES_PER_SLOT:
+            aggregator.num_excess += 1
+            return False
+        aggregator.num_shares[co_validator_key] = aggregator.num_shares.get(co_validator_key, 0) + 1
+        if bucket is None:
+            bucket = aggregator.buckets[key] = ShareBucket(slot=slot)
+        bucket.shares[int(share.co_validator_index)] = share
+        if len(bucket.shares) < aggregator.threshold:
+            return True
+        shares = list(bucket.shares.values())
+        bucket.shares.clear()
+        bucket.combined = True
+        aggregator.num_combined += 1
+    # The combination runs outside the lock, so that shares of other buckets keep being accepted
+    aggregator.on_threshold(shares)
+    return True
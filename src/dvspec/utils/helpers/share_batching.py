@@ -0,0 +1,103 @@
+import threading
+from typing import (
+    List,
+)
+
+from ...networking import (
+    send_signature_share_batch,
+)
+
+from ..types import (
+    ShareBatcher,
+    ValidatorIndex,
+)
+from .share_messages import (
+    SIGNATURE_SHARE_BATCH_MAX_MESSAGES,
+    encode_signature_share_batch,
+)
+
+"""
+Signature Share Batching Helper Functions
+"""
+
+
+# The shares of a slot are produced within milliseconds of each other, e.g. those of every attestation duty
+# once the attestation data is decided, so a short window catches them at a negligible latency
+SHARE_BATCH_WINDOW_SECONDS = 0.05
+# A batch is sent to a peer up to this many times, as it is not sent again once the window has passed
+SHARE_BATCH_SEND_ATTEMPTS = 3
+
+
+def create_share_batcher(window_seconds: float = SHARE_BATCH_WINDOW_SECONDS) -> ShareBatcher:
+    return ShareBatcher(window_seconds=window_seconds)
+
+
+def queue_signature_share_messages(messages: List[bytes], batcher: ShareBatcher) -> None:
+    """Queue the SSZ-encoded SignatureShareMessages for the next batch to the DV peer nodes.
+    Full batches are flushed right away once the peers are known, so that the pending messages stay bounded.
+    """
+    with batcher.lock:
+        batcher.pending += messages
+        batcher.num_messages += len(messages)
+        num_full_batches = len(batcher.pending) // SIGNATURE_SHARE_BATCH_MAX_MESSAGES if batcher.peers != [] else 0
+    for _ in range(num_full_batches):
+        flush_share_batcher(batcher)
+
+
+def flush_share_batcher(batcher: ShareBatcher) -> None:
+    """Send the pending messages, up to a full batch, to each DV peer node as one framed batch.
+    The batch is framed once for all peers. Messages are kept pending until the peers are known.
+    """
+    with batcher.lock:
+        if batcher.peers == []:
+            return
+        messages = batcher.pending[:SIGNATURE_SHARE_BATCH_MAX_MESSAGES]
+        del batcher.pending[:SIGNATURE_SHARE_BATCH_MAX_MESSAGES]
+        peers = list(batcher.peers)
+    if messages == []:
+        return
+    batch = encode_signature_share_batch(messages)
+    for peer in peers:
+        send_share_batch_to_peer(batcher, peer, batch)
+
+
+def send_share_batch_to_peer(batcher: ShareBatcher, peer: int, batch: bytes) -> None:
+    """Send the batch to the peer, retrying failed sends. A peer that stays unreachable is counted
+    in the send failures of the peer, & must not hold back the shares of the other peers.
+    """
+    for _ in range(SHARE_BATCH_SEND_ATTEMPTS):
+        try:
+            send_signature_share_batch(ValidatorIndex(peer), batch)
+        except Exception:
+            continue
+        with batcher.lock:
+            batcher.num_batches += 1
+        return
+    with batcher.lock:
+        batcher.num_send_failures[peer] = batcher.num_send_failures.get(peer, 0) + 1
+
+
+def run_share_batcher(batcher: ShareBatcher) -> None:
+    """Flush the batcher every window until stopped, then flush what is left.
+    """
+    while not batcher.stop.wait(batcher.window_seconds):
+        flush_share_batcher(batcher)
+    while batcher.pending != []:
+        flush_share_batcher(batcher)
+
+
+def start_share_batcher(peers: List[ValidatorIndex], batcher: ShareBatcher) -> threading.Thread:
+    """Send the shares queued on the batcher to the DV peer nodes running the co-validators with indices peers,
+    flushing it in a background thread.
+    """
+    assert peers != []
+    with batcher.lock:
+        batcher.peers = [int(peer) for peer in peers]
+    batcher.stop.clear()
+    thread = threading.Thread(target=run_share_batcher, args=(batcher,), daemon=True)
+    thread.start()
+    return thread
+
+
+def stop_share_batcher(batcher: ShareBatcher) -> None:
+    batcher.stop.set()
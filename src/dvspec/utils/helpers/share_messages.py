@@ -0,0 +1,74 @@
+import struct
+from typing import (
+    List,
+    Tuple,
+)
+
+from ..types import (
+    BLSSignature,
+    Root,
+    SignatureShareMessage,
+    Slot,
+    ValidatorIndex,
+)
+
+"""
+Signature Share Message Helper Functions
+"""
+
+
+DUTY_TYPE_ATTESTATION = 0
+DUTY_TYPE_BLOCK = 1
+# Randao reveals are signed ahead of their proposer duties & are not exchanged as signature shares
+DUTY_TYPES = (DUTY_TYPE_ATTESTATION, DUTY_TYPE_BLOCK)
+
+# Layout of the SSZ encoding of SignatureShareMessage, whose fields are all fixed-size & little-endian
+SIGNATURE_SHARE_MESSAGE_STRUCT = struct.Struct("<QBQ32sQ96s")
+SIGNATURE_SHARE_MESSAGE_SIZE = SIGNATURE_SHARE_MESSAGE_STRUCT.size
+assert SIGNATURE_SHARE_MESSAGE_SIZE == SignatureShareMessage.type_byte_length()
+
+# A batch is framed by its length in bytes, followed by the concatenated messages,
+# i.e. the SSZ encoding of a list of SignatureShareMessage
+SIGNATURE_SHARE_BATCH_LENGTH_STRUCT = struct.Struct("<I")
+SIGNATURE_SHARE_BATCH_MAX_MESSAGES = 1024
+
+# (validator index, duty type, slot, signing root, co-validator index, signature)
+SignatureShareMessageFields = Tuple[ValidatorIndex, int, Slot, Root, ValidatorIndex, BLSSignature]
+
+
+def encode_signature_share_message(validator_index: ValidatorIndex, duty_type: int, slot: Slot, signing_root: Root,
+                                   co_validator_index: ValidatorIndex, signature: BLSSignature) -> bytes:
+    """SSZ-encode the SignatureShareMessage with the fields, without building the SSZ object.
+    """
+    assert duty_type in DUTY_TYPES
+    return SIGNATURE_SHARE_MESSAGE_STRUCT.pack(int(validator_index), duty_type, int(slot), bytes(signing_root),
+                                               int(co_validator_index), bytes(signature))
+
+
+def decode_signature_share_message(view: memoryview, offset: int = 0) -> SignatureShareMessageFields:
+    """Parse the fields of the SSZ-encoded SignatureShareMessage at offset in view, in place: neither the message
+    nor the buffer holding it is copied & no SSZ object is built. Only the signing root & the signature are copied out.
+    """
+    validator_index, duty_type, slot, signing_root, co_validator_index, signature = \
+        SIGNATURE_SHARE_MESSAGE_STRUCT.unpack_from(view, offset)
+    return (ValidatorIndex(validator_index), duty_type, Slot(slot), Root(signing_root),
+            ValidatorIndex(co_validator_index), BLSSignature(signature))
+
+
+def encode_signature_share_batch(messages: List[bytes]) -> bytes:
+    """Frame the SSZ-encoded SignatureShareMessages into one batch.
+    """
+    assert len(messages) <= SIGNATURE_SHARE_BATCH_MAX_MESSAGES
+    assert all(len(message) == SIGNATURE_SHARE_MESSAGE_SIZE for message in messages)
+    return SIGNATURE_SHARE_BATCH_LENGTH_STRUCT.pack(len(messages) * SIGNATURE_SHARE_MESSAGE_SIZE) + b"".join(messages)
+
+
+def get_signature_share_batch_offsets(view: memoryview) -> range:
+    """Check the framing of the batch in view & return the offsets of its messages in view.
+    """
+    assert len(view) >= SIGNATURE_SHARE_BATCH_LENGTH_STRUCT.size
+    (length,) = SIGNATURE_SHARE_BATCH_LENGTH_STRUCT.unpack_from(view)
+    start = SIGNATURE_SHARE_BATCH_LENGTH_STRUCT.size
+    assert length == len(view) - start and length % SIGNATURE_SHARE_MESSAGE_SIZE == 0
+    assert length // SIGNATURE_SHARE_MESSAGE_SIZE <= SIGNATURE_SHARE_BATCH_MAX_MESSAGES
+    return range(start, len(view), SIGNATURE_SHARE_MESSAGE_SIZE)
@@ -0,0 +1,57 @@
+from typing import (
+    List,
+    Sequence,
+    Tuple,
+)
+
+import milagro_bls_binding as milagro_bls
+
+from ..types import (
+    BLSPubkey,
+    BLSSignature,
+    Root,
+    ShareVerifier,
+    SignatureShare,
+)
+
+"""
+Signature Share Verification Helper Functions
+"""
+
+
+# (pubkey, signing root, signature)
+SignatureSet = Tuple[BLSPubkey, Root, BLSSignature]
+
+
+def verify_signature_sets(signature_sets: Sequence[SignatureSet]) -> bool:
+    """Verify the signature sets at once, checking a random linear combination of them with a single
+    final exponentiation instead of two pairings per set. Invalid encodings fail the batch.
+    """
+    if len(signature_sets) == 1:
+        pubkey, signing_root, signature = signature_sets[0]
+        return milagro_bls.Verify(bytes(pubkey), bytes(signing_root), bytes(signature))
+    return milagro_bls.VerifyMultipleAggregateSignatures([
+        (bytes(signature), bytes(pubkey), bytes(signing_root)) for pubkey, signing_root, signature in signature_sets])
+
+
+def find_invalid_signature_sets(signature_sets: Sequence[SignatureSet]) -> List[int]:
+    """Indices of the invalid signature sets. A failing batch falls back to verifying each set on its own,
+    which bisecting it would cost more than unless the batch is large & nearly all valid.
+    """
+    if len(signature_sets) == 0 or verify_signature_sets(signature_sets):
+        return []
+    return [i for i, signature_set in enumerate(signature_sets) if not verify_signature_sets([signature_set])]
+
+
+def queue_signature_share(verifier: ShareVerifier, share: SignatureShare) -> None:
+    with verifier.lock:
+        verifier.pending.append(share)
+
+
+def take_pending_signature_shares(verifier: ShareVerifier) -> List[SignatureShare]:
+    with verifier.lock:
+        shares = verifier.pending
+        verifier.pending = []
+        if shares != []:
+            verifier.num_batches += 1
+    return shares
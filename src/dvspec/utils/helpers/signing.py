@@ -1,3 +1,7 @@
+from typing import (
+    Optional,
+)
+
 from eth2spec.altair.mainnet import (
     AttestationData,
     BeaconBlock,
@@ -7,45 +11,83 @@ from eth2spec.altair.mainnet import (
     DOMAIN_BEACON_ATTESTER,
     DOMAIN_BEACON_PROPOSER,
     DOMAIN_RANDAO,
+    SigningData,
     compute_signing_root,
     compute_start_slot_at_epoch,
     compute_epoch_at_slot,
 )
 
 from ...eth_node_interface import (
-    bn_get_fork_version,
     bn_get_genesis_validators_root,
 )
 
 from ..types import (
     Root,
+    SigningContext,
+    SigningDomainCache,
     Slot,
     Epoch,
 )
+from .fork_schedule import (
+    get_fork_version,
+)
 
 """
 Signing Helper Functions
 """
 
 
-def dvc_compute_domain(domain_type: DomainType, epoch: Epoch) -> Domain:
+# Enough for every domain type of the epochs in flight
+DOMAIN_CACHE_SIZE = 64
+DOMAIN_CACHE = SigningDomainCache()
+
+
+def dvc_compute_domain(domain_type: DomainType, epoch: Epoch, cache: SigningDomainCache = DOMAIN_CACHE) -> Domain:
     """Computes the signature domain for that domain type & epoch.
-    Communicates with the BN to get necessary state objects"""
-    genesis_validators_root = bn_get_genesis_validators_root()
-    fork_version = bn_get_fork_version(compute_start_slot_at_epoch(epoch))
-    return compute_domain(domain_type, fork_version, genesis_validators_root)
+    The fork version is resolved from the fork schedule, the genesis validators root is fetched from the BN once"""
+    fork_version = get_fork_version(compute_start_slot_at_epoch(epoch))
+    # Keyed by fork version too, so that domains cached before a fork schedule refresh are not served after it
+    key = (bytes(domain_type), int(epoch), bytes(fork_version))
+    with cache.lock:
+        domain = cache.domains.get(key)
+        if domain is not None:
+            cache.hits += 1
+            return domain
+        cache.misses += 1
+    if cache.genesis_validators_root is None:
+        cache.genesis_validators_root = bn_get_genesis_validators_root()
+    domain = compute_domain(domain_type, fork_version, cache.genesis_validators_root)
+    with cache.lock:
+        if len(cache.domains) >= DOMAIN_CACHE_SIZE:
+            # Evict the oldest domain
+            del cache.domains[next(iter(cache.domains))]
+        cache.domains[key] = domain
+    return domain
+
+
+def compute_context_signing_root(context: SigningContext, domain: Domain) -> Root:
+    """Equivalent to compute_signing_root(context.ssz_object, domain), reusing the roots memoized in the context.
+    """
+    if context.signing_root is None:
+        context.signing_root = SigningData(object_root=context.get_root(), domain=domain).hash_tree_root()
+    return context.signing_root
 
 
-def compute_attestation_signing_root(attestation_data: AttestationData) -> Root:
-    domain = compute_domain(DOMAIN_BEACON_ATTESTER, attestation_data.target.epoch)
-    return compute_signing_root(attestation_data, domain)
+def compute_attestation_signing_root(attestation_data: AttestationData,
+                                     context: Optional[SigningContext] = None) -> Root:
+    if context is None:
+        context = SigningContext(attestation_data)
+    domain = dvc_compute_domain(DOMAIN_BEACON_ATTESTER, attestation_data.target.epoch)
+    return compute_context_signing_root(context, domain)
 
 
 def compute_randao_reveal_signing_root(slot: Slot) -> Root:
-    domain = compute_domain(DOMAIN_RANDAO, compute_epoch_at_slot(slot))
+    domain = dvc_compute_domain(DOMAIN_RANDAO, compute_epoch_at_slot(slot))
     return compute_signing_root(compute_epoch_at_slot(slot), domain)
 
 
-def compute_block_signing_root(block: BeaconBlock) -> Root:
-    domain = compute_domain(DOMAIN_RANDAO, DOMAIN_BEACON_PROPOSER, compute_epoch_at_slot(block.slot))
-    return compute_signing_root(block, domain)
+def compute_block_signing_root(block: BeaconBlock, context: Optional[SigningContext] = None) -> Root:
+    if context is None:
+        context = SigningContext(block)
+    domain = dvc_compute_domain(DOMAIN_BEACON_PROPOSER, compute_epoch_at_slot(block.slot))
+    return compute_context_signing_root(context, domain)
@@ -1,13 +1,40 @@
-import eth2spec.altair.mainnet as eth2spec
+from bisect import (
+    bisect_left,
+    bisect_right,
+)
+from functools import partial
+import threading
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
 from eth2spec.altair.mainnet import (
     AttestationData,
     BeaconBlock,
+    compute_start_slot_at_epoch,
 )
 
 from ..types import (
     BLSPubkey,
+    Epoch,
+    Root,
     SlashingDB,
+    ROOT_LENGTH,
+    SlashingDBAttestation,
+    SlashingDBAttestationArray,
+    SlashingDBAttestationIndex,
+    SlashingDBBlock,
+    SlashingDBBlockArray,
+    SlashingDBCompaction,
     SlashingDBData,
+    SigningContext,
+    Slot,
 )
 
 """
@@ -15,55 +42,319 @@ Slashing DB Helper Functions
 """
 
 
+def index_slashing_db(slashing_db: SlashingDB) -> None:
+    """(Re)build the pubkey index of the slashing_db from slashing_db.data.
+    """
+    slashing_db.pubkey_to_data = {data.pubkey: data for data in slashing_db.data}
+    # Each pubkey must have a single matching SlashingDBData
+    assert len(slashing_db.pubkey_to_data) == len(slashing_db.data)
+
+
 def get_slashing_db_data_for_pubkey(slashing_db: SlashingDB, pubkey: BLSPubkey) -> SlashingDBData:
     """Get SlashingDBData for the pubkey in the slashing_db.
-    Returns empty SlashingDBData for the pubkey if matching entry is not found in slashing_db.
+    Adds empty SlashingDBData for the pubkey to slashing_db if matching entry is not found in slashing_db.
     """
-    matching_slashing_db_data = [data for data in slashing_db.data if data.pubkey == pubkey]
-    if matching_slashing_db_data == []:
-        # No matching SlashingDBData found. Returning empty SlashingDBData.
-        return SlashingDBData(pubkey=pubkey, signed_blocks=[], signed_attestations=[])
-    assert len(matching_slashing_db_data) == 1
-    slashing_db_data = matching_slashing_db_data[0]
-    return slashing_db_data
+    with slashing_db.lock:
+        if len(slashing_db.pubkey_to_data) != len(slashing_db.data):
+            # slashing_db.data was populated without going through the index. Rebuilding the index.
+            index_slashing_db(slashing_db)
+        if pubkey not in slashing_db.pubkey_to_data:
+            # No matching SlashingDBData found. Adding empty SlashingDBData.
+            slashing_db_data = SlashingDBData(pubkey=pubkey, signed_blocks=SlashingDBBlockArray(),
+                                              signed_attestations=SlashingDBAttestationArray())
+            slashing_db.data.append(slashing_db_data)
+            slashing_db.pubkey_to_data[pubkey] = slashing_db_data
+        return slashing_db.pubkey_to_data[pubkey]
 
 
-def is_slashable_attestation_data(slashing_db: SlashingDB,
-                                  attestation_data: AttestationData, pubkey: BLSPubkey) -> bool:
-    """Checks if the attestation data is slashable according to the slashing DB.
+def get_slashing_db_lock_for_pubkey(slashing_db: SlashingDB, pubkey: BLSPubkey) -> threading.RLock:
+    """Get the lock guarding the records of the pubkey in the slashing_db.
+    Holding it from a slashing check until the matching update makes the pair atomic with respect to
+    concurrent duties of the same pubkey, while duties of other pubkeys proceed in parallel.
     """
-    slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+    return get_slashing_db_data_for_pubkey(slashing_db, pubkey).lock
+
+
+def add_to_attestation_index(index: SlashingDBAttestationIndex,
+                             source_epoch: int, target_epoch: int, position: int) -> None:
+    """Add the signed attestation at position in signed_attestations to the attestation index.
+    Appending in order of target epoch, the usual case, is amortized O(1). Out of order, only the prefix
+    maxima after & the suffix minima before the insertion point that the source epoch changes are updated.
+    """
+    i = bisect_right(index.target_epochs, target_epoch)
+    index.target_epochs.insert(i, target_epoch)
+    index.source_epochs.insert(i, source_epoch)
+    index.positions.insert(i, position)
+    prefix_max, suffix_min = index.prefix_max_source_epochs, index.suffix_min_source_epochs
+    prefix_max.insert(i, source_epoch if i == 0 else max(prefix_max[i - 1], source_epoch))
+    suffix_min.insert(i, source_epoch if i == len(suffix_min) else min(suffix_min[i], source_epoch))
+    # Raising a prefix maximum can only raise the following ones, until one already covers it
+    j = i + 1
+    while j < len(prefix_max) and prefix_max[j] < prefix_max[j - 1]:
+        prefix_max[j] = prefix_max[j - 1]
+        j += 1
+    # Lowering a suffix minimum can only lower the preceding ones, until one is already below it
+    j = i - 1
+    while j >= 0 and suffix_min[j] > suffix_min[j + 1]:
+        suffix_min[j] = suffix_min[j + 1]
+        j -= 1
+
+
+def build_attestation_index(signed_attestations: SlashingDBAttestationArray) -> SlashingDBAttestationIndex:
+    """Build the attestation index of signed_attestations from scratch.
+    """
+    index = SlashingDBAttestationIndex()
+    for position in sorted(range(len(signed_attestations)), key=signed_attestations.target_epochs.__getitem__):
+        add_to_attestation_index(index, signed_attestations.source_epochs[position],
+                                 signed_attestations.target_epochs[position], position)
+    return index
+
+
+def index_signed_attestations(slashing_db_data: SlashingDBData) -> None:
+    """Fold signed attestations that are not yet reflected in the watermarks & attestation index
+    of slashing_db_data into them.
+    """
+    signed_attestations = slashing_db_data.signed_attestations
+    if slashing_db_data.num_indexed_attestations > len(signed_attestations):
+        # signed_attestations was truncated without going through the index. Rebuilding the index.
+        slashing_db_data.min_source_epoch = None
+        slashing_db_data.min_target_epoch = None
+        slashing_db_data.attestation_index = SlashingDBAttestationIndex()
+        slashing_db_data.num_indexed_attestations = 0
+    positions = range(slashing_db_data.num_indexed_attestations, len(signed_attestations))
+    for position in positions:
+        source_epoch = signed_attestations.source_epochs[position]
+        target_epoch = signed_attestations.target_epochs[position]
+        if slashing_db_data.min_source_epoch is None or source_epoch < slashing_db_data.min_source_epoch:
+            slashing_db_data.min_source_epoch = Epoch(source_epoch)
+        if slashing_db_data.min_target_epoch is None or target_epoch < slashing_db_data.min_target_epoch:
+            slashing_db_data.min_target_epoch = Epoch(target_epoch)
+    if len(positions) == 1:
+        add_to_attestation_index(slashing_db_data.attestation_index, signed_attestations.source_epochs[positions[0]],
+                                 signed_attestations.target_epochs[positions[0]], positions[0])
+    elif len(positions) > 1:
+        # Bulk additions, e.g. loads & imports, rebuild the index once rather than inserting each attestation
+        slashing_db_data.attestation_index = build_attestation_index(signed_attestations)
+    slashing_db_data.num_indexed_attestations = len(signed_attestations)
+
+
+def get_signing_roots_for_target_epoch(slashing_db_data: SlashingDBData, target_epoch: int) -> List[bytes]:
+    """Get the signing roots of the indexed signed attestations with the given target epoch.
+    """
+    index = slashing_db_data.attestation_index
+    signing_roots = slashing_db_data.signed_attestations.signing_roots
+    start = bisect_left(index.target_epochs, target_epoch)
+    end = bisect_right(index.target_epochs, target_epoch, start)
+    return [bytes(signing_roots[position * ROOT_LENGTH:(position + 1) * ROOT_LENGTH])
+            for position in index.positions[start:end]]
+
+
+def index_signed_blocks(slashing_db_data: SlashingDBData) -> None:
+    """Fold signed blocks that are not yet reflected in the watermark & slot index
+    of slashing_db_data into them.
+    """
+    if slashing_db_data.num_indexed_blocks > len(slashing_db_data.signed_blocks):
+        # signed_blocks was truncated without going through the index. Rebuilding the index.
+        slashing_db_data.min_block_slot = None
+        slashing_db_data.block_slot_to_signing_roots = {}
+        slashing_db_data.num_indexed_blocks = 0
+    signed_blocks = slashing_db_data.signed_blocks
+    for position in range(slashing_db_data.num_indexed_blocks, len(signed_blocks)):
+        slot = signed_blocks.slots[position]
+        if slashing_db_data.min_block_slot is None or slot < slashing_db_data.min_block_slot:
+            slashing_db_data.min_block_slot = Slot(slot)
+        slashing_db_data.block_slot_to_signing_roots.setdefault(slot, []).append(signed_blocks.signing_root(position))
+    slashing_db_data.num_indexed_blocks = len(signed_blocks)
+
+
+def append_signed_attestation(slashing_db_data: SlashingDBData, slashing_db_attestation: SlashingDBAttestation) -> None:
+    """Record a signed attestation in slashing_db_data, its watermarks & attestation index.
+    """
+    slashing_db_data.signed_attestations.append(slashing_db_attestation)
+    index_signed_attestations(slashing_db_data)
+
+
+def append_signed_block(slashing_db_data: SlashingDBData, slashing_db_block: SlashingDBBlock) -> None:
+    """Record a signed block in slashing_db_data, its watermark & slot index.
+    """
+    slashing_db_data.signed_blocks.append(slashing_db_block)
+    index_signed_blocks(slashing_db_data)
+
+
+def is_double_or_surround_vote(slashing_db_data: SlashingDBData, source_epoch: int, target_epoch: int,
+                               get_signing_root: Callable[[], Root]) -> bool:
+    """Checks the slashing conditions of `eth2spec.is_slashable_attestation_data` between an attestation
+    with the given source & target epochs and every indexed signed attestation, in both directions.
+    get_signing_root is only called if a signed attestation with the same target epoch exists.
+    """
+    index = slashing_db_data.attestation_index
+    source_epoch, target_epoch = int(source_epoch), int(target_epoch)
+    # Double vote
+    past_signing_roots = get_signing_roots_for_target_epoch(slashing_db_data, target_epoch)
+    if past_signing_roots != []:
+        signing_root = bytes(get_signing_root())
+        if any(root != signing_root for root in past_signing_roots):
+            return True
+    # Surround vote by a signed attestation: past.source < source and target < past.target
+    position = bisect_right(index.target_epochs, target_epoch)
+    if position < len(index.target_epochs) and index.suffix_min_source_epochs[position] < source_epoch:
+        return True
+    # Surround vote of a signed attestation: source < past.source and past.target < target
+    position = bisect_left(index.target_epochs, target_epoch)
+    if position > 0 and index.prefix_max_source_epochs[position - 1] > source_epoch:
+        return True
+    return False
+
+
+def is_slashable_attestation(slashing_db_data: SlashingDBData, source_epoch: int, target_epoch: int,
+                             get_signing_root: Callable[[], Root]) -> bool:
+    """Checks if an attestation with the given source & target epochs is slashable according to slashing_db_data.
+    get_signing_root is only called if a signed attestation with the same target epoch exists.
+    """
+    index_signed_attestations(slashing_db_data)
     # Check for EIP-3076 conditions:
     # https://eips.ethereum.org/EIPS/eip-3076#conditions
-    if slashing_db_data.signed_attestations != []:
-        min_target = min(attn.target_epoch for attn in slashing_db_data.signed_attestations)
-        min_source = min(attn.source_epoch for attn in slashing_db_data.signed_attestations)
-        if attestation_data.target.epoch <= min_target:
-            return True
-        if attestation_data.source.epoch < min_source:
+    if slashing_db_data.min_target_epoch is not None:
+        if target_epoch <= slashing_db_data.min_target_epoch:
             return True
-    for past_attn in slashing_db_data.signed_attestations:
-        past_attn_data = AttestationData(source=past_attn.source_epoch, target=past_attn.target_epoch)
-        if eth2spec.is_slashable_attestation_data(past_attn_data, attestation_data):
+    if slashing_db_data.min_source_epoch is not None:
+        if source_epoch < slashing_db_data.min_source_epoch:
             return True
-    return False
+    return is_double_or_surround_vote(slashing_db_data, source_epoch, target_epoch, get_signing_root)
+
+
+def is_slashable_attestation_data(slashing_db: SlashingDB, attestation_data: AttestationData, pubkey: BLSPubkey,
+                                  context: Optional[SigningContext] = None) -> bool:
+    """Checks if the attestation data is slashable according to the slashing DB.
+    The root of the attestation data is memoized in the context, if given.
+    """
+    get_root = attestation_data.hash_tree_root if context is None else context.get_root
+    slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+    with slashing_db_data.lock:
+        return is_slashable_attestation(slashing_db_data, attestation_data.source.epoch,
+                                        attestation_data.target.epoch, get_root)
 
 
-def is_slashable_block(slashing_db: SlashingDB, block: BeaconBlock, pubkey: BLSPubkey) -> bool:
+def are_slashable_attestation_data(slashing_db: SlashingDB,
+                                   candidates: Sequence[Tuple[BLSPubkey, AttestationData]]) -> List[bool]:
+    """Checks if each (pubkey, attestation data) candidate is slashable according to the slashing DB.
+    Equivalent to is_slashable_attestation_data for each candidate, but the candidates of a pubkey are
+    checked together under a single acquisition of its lock, and candidates with the same epochs & root,
+    e.g. all validators of a committee in a slot, are checked only once per pubkey.
+    """
+    pubkey_to_candidates: Dict[BLSPubkey, List[Tuple[int, Tuple[int, int, Root]]]] = {}
+    for i, (pubkey, attestation_data) in enumerate(candidates):
+        key = (int(attestation_data.source.epoch), int(attestation_data.target.epoch),
+               attestation_data.hash_tree_root())
+        pubkey_to_candidates.setdefault(pubkey, []).append((i, key))
+    slashable = [False] * len(candidates)
+    for pubkey, pubkey_candidates in pubkey_to_candidates.items():
+        slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+        with slashing_db_data.lock:
+            checked: Dict[Tuple[int, int, Root], bool] = {}
+            for i, key in pubkey_candidates:
+                if key not in checked:
+                    source_epoch, target_epoch, signing_root = key
+                    checked[key] = is_slashable_attestation(slashing_db_data, source_epoch, target_epoch,
+                                                            partial(Root, signing_root))
+                slashable[i] = checked[key]
+    return slashable
+
+
+def is_slashable_block(slashing_db: SlashingDB, block: BeaconBlock, pubkey: BLSPubkey,
+                       context: Optional[SigningContext] = None) -> bool:
     """Checks if the block is slashable according to the slashing DB.
+    The root of the block is memoized in the context, if given.
     """
     slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
-    # Check for EIP-3076 conditions:
-    # https://eips.ethereum.org/EIPS/eip-3076#conditions
-    if slashing_db_data.signed_blocks != []:
-        min_block = slashing_db_data.signed_blocks[0]
-        for b in slashing_db_data.signed_blocks[1:]:
-            if b.slot < min_block.slot:
-                min_block = b
-        if block.slot < min_block.slot:
-            return True
-    for past_block in slashing_db_data.signed_blocks:
-        if past_block.slot == block.slot:
-            if past_block.signing_root != block.hash_tree_root():
+    with slashing_db_data.lock:
+        index_signed_blocks(slashing_db_data)
+        # Check for EIP-3076 conditions:
+        # https://eips.ethereum.org/EIPS/eip-3076#conditions
+        if slashing_db_data.min_block_slot is not None:
+            if block.slot < slashing_db_data.min_block_slot:
                 return True
-    return False
+        past_signing_roots = slashing_db_data.block_slot_to_signing_roots.get(int(block.slot), [])
+        if past_signing_roots != []:
+            signing_root = block.hash_tree_root() if context is None else context.get_root()
+            if any(root != signing_root for root in past_signing_roots):
+                return True
+        return False
+
+
+def compact_slashing_db_data(slashing_db_data: SlashingDBData,
+                             oldest_retained_epoch: Epoch) -> Optional[SlashingDBCompaction]:
+    """Prune signed attestations with target epoch & signed blocks with slot before oldest_retained_epoch
+    by folding them into the low watermarks (EIP-3076 minimal mode).
+    Any attestation or block that conflicts with a pruned record is still refused by the raised watermarks.
+    Returns the compaction if any record was pruned.
+    """
+    num_records = len(slashing_db_data.signed_attestations) + len(slashing_db_data.signed_blocks)
+    index_signed_attestations(slashing_db_data)
+    signed_attestations = slashing_db_data.signed_attestations
+    pruned = [i for i, target_epoch in enumerate(signed_attestations.target_epochs)
+              if target_epoch < oldest_retained_epoch]
+    if pruned != []:
+        slashing_db_data.min_source_epoch = Epoch(max(slashing_db_data.min_source_epoch,
+                                                      max(signed_attestations.source_epochs[i] for i in pruned)))
+        slashing_db_data.min_target_epoch = Epoch(max(slashing_db_data.min_target_epoch,
+                                                      max(signed_attestations.target_epochs[i] for i in pruned)))
+        retained_attestations = SlashingDBAttestationArray()
+        retained_attestations.extend(attn for attn in signed_attestations if attn.target_epoch >= oldest_retained_epoch)
+        slashing_db_data.signed_attestations = retained_attestations
+        slashing_db_data.attestation_index = build_attestation_index(retained_attestations)
+        slashing_db_data.num_indexed_attestations = len(retained_attestations)
+
+    index_signed_blocks(slashing_db_data)
+    oldest_retained_slot = compute_start_slot_at_epoch(oldest_retained_epoch)
+    pruned_slots = [slot for slot in slashing_db_data.signed_blocks.slots if slot < oldest_retained_slot]
+    if pruned_slots != []:
+        # Blocks in the slot of a pruned block can no longer be checked for repeat signing, refuse them as well
+        slashing_db_data.min_block_slot = Slot(max(slashing_db_data.min_block_slot, max(pruned_slots) + 1))
+        retained_blocks = SlashingDBBlockArray()
+        retained_blocks.extend(block for block in slashing_db_data.signed_blocks if block.slot >= oldest_retained_slot)
+        slashing_db_data.signed_blocks = retained_blocks
+        slashing_db_data.block_slot_to_signing_roots = {}
+        for position, slot in enumerate(retained_blocks.slots):
+            slashing_db_data.block_slot_to_signing_roots.setdefault(slot, []).append(
+                retained_blocks.signing_root(position))
+        slashing_db_data.num_indexed_blocks = len(retained_blocks)
+
+    if len(slashing_db_data.signed_attestations) + len(slashing_db_data.signed_blocks) == num_records:
+        return None
+    return SlashingDBCompaction(oldest_retained_epoch=oldest_retained_epoch,
+                                min_block_slot=slashing_db_data.min_block_slot,
+                                min_source_epoch=slashing_db_data.min_source_epoch,
+                                min_target_epoch=slashing_db_data.min_target_epoch)
+
+
+def compact_slashing_db(slashing_db: SlashingDB, epoch: Epoch) -> None:
+    """Compact the history of every pubkey in the slashing_db to the last retention_epochs epochs.
+    Runs at most once per epoch, and only if minimal mode is enabled by setting slashing_db.retention_epochs.
+    """
+    if slashing_db.retention_epochs is None:
+        return
+    with slashing_db.lock:
+        if slashing_db.last_compaction_epoch is not None and epoch <= slashing_db.last_compaction_epoch:
+            return
+        slashing_db.last_compaction_epoch = epoch
+        data = list(slashing_db.data)
+    if epoch < slashing_db.retention_epochs:
+        return
+    for slashing_db_data in data:
+        with slashing_db_data.lock:
+            compaction = compact_slashing_db_data(slashing_db_data, Epoch(epoch - slashing_db.retention_epochs))
+            if compaction is not None:
+                stage_slashing_db_write(slashing_db, slashing_db_data.pubkey, compaction)
+
+
+def stage_slashing_db_write(slashing_db: SlashingDB, pubkey: BLSPubkey,
+                            write: Union[SlashingDBAttestation, SlashingDBBlock, SlashingDBCompaction]) -> None:
+    """Stage a write to the durable store of the slashing_db, if any, for the next group commit.
+    """
+    store = slashing_db.store
+    if store is None:
+        return
+    with store.condition:
+        store.pending_writes.append((pubkey, write))
+        store.num_staged_writes += 1
@@ -0,0 +1,278 @@
+import json
+import time
+from dataclasses import dataclass
+from typing import (
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Set,
+    TextIO,
+    Tuple,
+)
+
+from ..types import (
+    ROOT_LENGTH,
+    BLSPubkey,
+    Epoch,
+    Root,
+    SlashingDB,
+    SlashingDBAttestation,
+    SlashingDBBlock,
+    SlashingDBData,
+    SlashingDBInterchangeStats,
+    Slot,
+)
+from .slashing_db import (
+    append_signed_block,
+    get_signing_roots_for_target_epoch,
+    get_slashing_db_data_for_pubkey,
+    index_signed_attestations,
+    index_signed_blocks,
+    stage_slashing_db_write,
+)
+from .slashing_db_store import (
+    commit_slashing_db,
+)
+
+"""
+EIP-3076 Interchange Helper Functions
+See here for details:
+https://eips.ethereum.org/EIPS/eip-3076
+"""
+
+
+INTERCHANGE_FORMAT_VERSION = 5
+INTERCHANGE_READ_CHUNK_SIZE = 1 << 20
+
+JSON_WHITESPACE = " \t\n\r"
+JSON_DECODER = json.JSONDecoder()
+
+
+@dataclass
+class JSONStream:
+    """Incrementally read JSON text, holding at most one top-level value in memory.
+    """
+    file: TextIO
+    chunk_size: int = INTERCHANGE_READ_CHUNK_SIZE
+    buffer: str = ""
+    position: int = 0
+    eof: bool = False
+
+
+def json_stream_read(stream: JSONStream) -> bool:
+    """Read the next chunk of the file into the buffer, dropping the consumed part of the buffer.
+    Returns False at the end of the file.
+    """
+    if stream.eof:
+        return False
+    chunk = stream.file.read(stream.chunk_size)
+    stream.buffer = stream.buffer[stream.position:] + chunk
+    stream.position = 0
+    stream.eof = chunk == ""
+    return not stream.eof
+
+
+def json_stream_peek(stream: JSONStream) -> str:
+    """Skip whitespace & return the next character, or "" at the end of the file.
+    """
+    while True:
+        while stream.position < len(stream.buffer) and stream.buffer[stream.position] in JSON_WHITESPACE:
+            stream.position += 1
+        if stream.position < len(stream.buffer) or not json_stream_read(stream):
+            return stream.buffer[stream.position:stream.position + 1]
+
+
+def json_stream_expect(stream: JSONStream, characters: str) -> str:
+    """Consume the next character, which must be one of characters.
+    """
+    character = json_stream_peek(stream)
+    assert character != "" and character in characters
+    stream.position += 1
+    return character
+
+
+def json_stream_decode(stream: JSONStream) -> Any:
+    """Decode the next JSON value.
+    """
+    json_stream_peek(stream)
+    while True:
+        try:
+            value, end = JSON_DECODER.raw_decode(stream.buffer, stream.position)
+            # A value running up to the end of the buffer may continue in the next chunk
+            if end < len(stream.buffer) or stream.eof:
+                stream.position = end
+                return value
+        except json.JSONDecodeError:
+            if stream.eof:
+                raise
+        json_stream_read(stream)
+
+
+def json_stream_iter_object(stream: JSONStream) -> Iterator[str]:
+    """Iterate over the keys of a JSON object. The caller must consume the value of each key.
+    """
+    json_stream_expect(stream, "{")
+    if json_stream_peek(stream) == "}":
+        stream.position += 1
+        return
+    while True:
+        key = json_stream_decode(stream)
+        json_stream_expect(stream, ":")
+        yield key
+        if json_stream_expect(stream, ",}") == "}":
+            return
+
+
+def json_stream_iter_array(stream: JSONStream) -> Iterator[Any]:
+    """Iterate over the values of a JSON array.
+    """
+    json_stream_expect(stream, "[")
+    if json_stream_peek(stream) == "]":
+        stream.position += 1
+        return
+    while True:
+        yield json_stream_decode(stream)
+        if json_stream_expect(stream, ",]") == "]":
+            return
+
+
+def iter_interchange(file: TextIO, chunk_size: int = INTERCHANGE_READ_CHUNK_SIZE) -> Iterator[Tuple[str, Any]]:
+    """Parse an EIP-3076 interchange file incrementally.
+    Yields ("metadata", metadata) followed by ("data", entry) for each entry in data.
+    """
+    stream = JSONStream(file=file, chunk_size=chunk_size)
+    for key in json_stream_iter_object(stream):
+        if key == "metadata":
+            yield key, json_stream_decode(stream)
+        elif key == "data":
+            for entry in json_stream_iter_array(stream):
+                yield key, entry
+        else:
+            json_stream_decode(stream)
+    # Nothing may follow the top-level object
+    assert json_stream_peek(stream) == ""
+
+
+def parse_root(value: str) -> Root:
+    return Root(bytes.fromhex(value[2:]))
+
+
+def merge_interchange_entry(slashing_db: SlashingDB, entry: Dict[str, Any]) -> int:
+    """Merge the signed blocks & attestations of an interchange data entry into the slashing_db,
+    skipping records that are already present. Returns the number of records in the entry.
+    """
+    pubkey = BLSPubkey(bytes.fromhex(entry["pubkey"][2:]))
+    slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+    with slashing_db_data.lock:
+        index_signed_blocks(slashing_db_data)
+        index_signed_attestations(slashing_db_data)
+        for block in entry.get("signed_blocks", []):
+            slashing_db_block = SlashingDBBlock(slot=Slot(int(block["slot"])),
+                                                signing_root=parse_root(block.get("signing_root", "0x" + "00" * 32)))
+            past_signing_roots = slashing_db_data.block_slot_to_signing_roots.get(int(slashing_db_block.slot), [])
+            if slashing_db_block.signing_root in past_signing_roots:
+                continue
+            append_signed_block(slashing_db_data, slashing_db_block)
+            stage_slashing_db_write(slashing_db, pubkey, slashing_db_block)
+        # The new attestations are indexed together once the entry is merged
+        merged_attestations: Set[Tuple[int, bytes]] = set()
+        for attn in entry.get("signed_attestations", []):
+            slashing_db_attestation = SlashingDBAttestation(
+                source_epoch=Epoch(int(attn["source_epoch"])),
+                target_epoch=Epoch(int(attn["target_epoch"])),
+                signing_root=parse_root(attn.get("signing_root", "0x" + "00" * 32)))
+            key = (int(slashing_db_attestation.target_epoch), bytes(slashing_db_attestation.signing_root))
+            if key in merged_attestations or key[1] in get_signing_roots_for_target_epoch(slashing_db_data, key[0]):
+                continue
+            merged_attestations.add(key)
+            slashing_db_data.signed_attestations.append(slashing_db_attestation)
+            stage_slashing_db_write(slashing_db, pubkey, slashing_db_attestation)
+        index_signed_attestations(slashing_db_data)
+    return len(entry.get("signed_blocks", [])) + len(entry.get("signed_attestations", []))
+
+
+def import_slashing_db_interchange(slashing_db: SlashingDB, file: TextIO,
+                                   chunk_size: int = INTERCHANGE_READ_CHUNK_SIZE) -> SlashingDBInterchangeStats:
+    """Stream an EIP-3076 interchange file into the slashing_db, merging it with the existing records.
+    Only a single data entry is held in memory at a time besides the slashing_db itself.
+    """
+    start_time = time.perf_counter()
+    num_validators, num_records = 0, 0
+    metadata = None
+    for key, value in iter_interchange(file, chunk_size):
+        if key == "metadata":
+            metadata = value
+            assert int(metadata["interchange_format_version"]) == INTERCHANGE_FORMAT_VERSION
+            assert parse_root(metadata["genesis_validators_root"]) == slashing_db.genesis_validators_root
+        else:
+            # Records can only be merged once they are known to belong to this chain
+            assert metadata is not None
+            num_records += merge_interchange_entry(slashing_db, value)
+            num_validators += 1
+    commit_slashing_db(slashing_db)
+    seconds = time.perf_counter() - start_time
+    return SlashingDBInterchangeStats(num_validators=num_validators, num_records=num_records, seconds=seconds,
+                                      records_per_second=num_records / seconds if seconds > 0 else 0.0)
+
+
+def build_interchange_entry(slashing_db_data: SlashingDBData) -> Dict[str, Any]:
+    """Build the interchange data entry for slashing_db_data.
+    Watermarks raised by compaction are exported as records without signing root, the EIP-3076 way
+    of conveying them, so that the importer refuses everything the pruned history would have refused.
+    """
+    index_signed_blocks(slashing_db_data)
+    index_signed_attestations(slashing_db_data)
+    blocks = slashing_db_data.signed_blocks
+    signed_blocks: List[Dict[str, str]] = [
+        {"slot": str(slot), "signing_root": "0x" + blocks.signing_roots[i * ROOT_LENGTH:(i + 1) * ROOT_LENGTH].hex()}
+        for i, slot in enumerate(blocks.slots)
+    ]
+    if slashing_db_data.min_block_slot is not None and \
+            slashing_db_data.min_block_slot != min(blocks.slots, default=None):
+        # Blocks with slot < min_block_slot are refused, i.e. slot <= min_block_slot - 1
+        signed_blocks.insert(0, {"slot": str(int(slashing_db_data.min_block_slot) - 1)})
+    attestations = slashing_db_data.signed_attestations
+    signed_attestations: List[Dict[str, str]] = [
+        {
+            "source_epoch": str(attestations.source_epochs[i]),
+            "target_epoch": str(attestations.target_epochs[i]),
+            "signing_root": "0x" + attestations.signing_roots[i * ROOT_LENGTH:(i + 1) * ROOT_LENGTH].hex(),
+        }
+        for i in range(len(attestations))
+    ]
+    watermarks = (slashing_db_data.min_source_epoch, slashing_db_data.min_target_epoch)
+    if watermarks != (None, None) and watermarks != (min(attestations.source_epochs, default=None),
+                                                     min(attestations.target_epochs, default=None)):
+        signed_attestations.insert(0, {"source_epoch": str(int(slashing_db_data.min_source_epoch)),
+                                       "target_epoch": str(int(slashing_db_data.min_target_epoch))})
+    return {
+        "pubkey": "0x" + bytes(slashing_db_data.pubkey).hex(),
+        "signed_blocks": signed_blocks,
+        "signed_attestations": signed_attestations,
+    }
+
+
+def export_slashing_db_interchange(slashing_db: SlashingDB, file: TextIO) -> SlashingDBInterchangeStats:
+    """Stream the slashing_db to file in the EIP-3076 interchange format, one data entry at a time.
+    """
+    start_time = time.perf_counter()
+    num_records = 0
+    metadata = {
+        "interchange_format_version": str(INTERCHANGE_FORMAT_VERSION),
+        "genesis_validators_root": "0x" + bytes(slashing_db.genesis_validators_root).hex(),
+    }
+    file.write('{"metadata": ' + json.dumps(metadata) + ', "data": [')
+    with slashing_db.lock:
+        data = list(slashing_db.data)
+    for i, slashing_db_data in enumerate(data):
+        if i > 0:
+            file.write(", ")
+        with slashing_db_data.lock:
+            entry = build_interchange_entry(slashing_db_data)
+        file.write(json.dumps(entry))
+        num_records += len(entry["signed_blocks"]) + len(entry["signed_attestations"])
+    file.write("]}")
+    seconds = time.perf_counter() - start_time
+    return SlashingDBInterchangeStats(num_validators=len(data), num_records=num_records, seconds=seconds,
+                                      records_per_second=num_records / seconds if seconds > 0 else 0.0)
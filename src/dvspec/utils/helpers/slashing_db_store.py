@@ -0,0 +1,197 @@
+import sqlite3
+from typing import (
+    Dict,
+    List,
+    Tuple,
+    Union,
+)
+
+from eth2spec.altair.mainnet import (
+    compute_start_slot_at_epoch,
+)
+
+from ..types import (
+    BLSPubkey,
+    Epoch,
+    Root,
+    SlashingDB,
+    SlashingDBAttestation,
+    SlashingDBAttestationArray,
+    SlashingDBBlock,
+    SlashingDBBlockArray,
+    SlashingDBCompaction,
+    SlashingDBData,
+    SlashingDBStore,
+    Slot,
+    Version,
+)
+from .slashing_db import (
+    index_signed_attestations,
+    index_signed_blocks,
+)
+
+"""
+Slashing DB Storage Helper Functions
+"""
+
+
+SLASHING_DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    interchange_format_version INTEGER NOT NULL,
+    genesis_validators_root BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS validators (
+    pubkey BLOB PRIMARY KEY,
+    min_block_slot INTEGER,
+    min_source_epoch INTEGER,
+    min_target_epoch INTEGER
+);
+CREATE TABLE IF NOT EXISTS signed_attestations (
+    pubkey BLOB NOT NULL,
+    source_epoch INTEGER NOT NULL,
+    target_epoch INTEGER NOT NULL,
+    signing_root BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signed_attestations_by_target ON signed_attestations (pubkey, target_epoch);
+CREATE TABLE IF NOT EXISTS signed_blocks (
+    pubkey BLOB NOT NULL,
+    slot INTEGER NOT NULL,
+    signing_root BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS signed_blocks_by_slot ON signed_blocks (pubkey, slot);
+"""
+
+
+def open_slashing_db_store(path: str) -> SlashingDBStore:
+    """Open (or create) the SQLite slashing DB store at path.
+    The store runs in WAL mode with synchronous=FULL, so every commit is durable after a single fsync.
+    """
+    # Writes are serialized by the group commit, allow them from any thread
+    connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=FULL")
+    connection.executescript(SLASHING_DB_SCHEMA)
+    return SlashingDBStore(connection=connection)
+
+
+def close_slashing_db_store(store: SlashingDBStore) -> None:
+    """Close the slashing DB store. Staged writes that were not committed are discarded.
+    """
+    store.connection.close()
+
+
+def load_slashing_db(store: SlashingDBStore,
+                     interchange_format_version: Version, genesis_validators_root: Root) -> SlashingDB:
+    """Load the slashing DB persisted in the store, attaching the store to it for subsequent writes.
+    """
+    metadata = store.connection.execute(
+        "SELECT interchange_format_version, genesis_validators_root FROM metadata").fetchone()
+    if metadata is None:
+        store.connection.execute("INSERT INTO metadata VALUES (?, ?)",
+                                 (int(interchange_format_version), bytes(genesis_validators_root)))
+    else:
+        # The store must belong to the same chain
+        assert metadata[1] == bytes(genesis_validators_root)
+    slashing_db = SlashingDB(interchange_format_version=interchange_format_version,
+                             genesis_validators_root=genesis_validators_root,
+                             data=[])
+    signed_attestations: Dict[bytes, SlashingDBAttestationArray] = {}
+    for pubkey, source_epoch, target_epoch, signing_root in store.connection.execute(
+            "SELECT pubkey, source_epoch, target_epoch, signing_root FROM signed_attestations ORDER BY rowid"):
+        attestations = signed_attestations.setdefault(pubkey, SlashingDBAttestationArray())
+        attestations.source_epochs.append(source_epoch)
+        attestations.target_epochs.append(target_epoch)
+        attestations.signing_roots += signing_root
+    signed_blocks: Dict[bytes, SlashingDBBlockArray] = {}
+    for pubkey, slot, signing_root in store.connection.execute(
+            "SELECT pubkey, slot, signing_root FROM signed_blocks ORDER BY rowid"):
+        blocks = signed_blocks.setdefault(pubkey, SlashingDBBlockArray())
+        blocks.slots.append(slot)
+        blocks.signing_roots += signing_root
+    for pubkey, min_block_slot, min_source_epoch, min_target_epoch in store.connection.execute(
+            "SELECT pubkey, min_block_slot, min_source_epoch, min_target_epoch FROM validators"):
+        slashing_db_data = SlashingDBData(pubkey=BLSPubkey(pubkey),
+                                          signed_blocks=signed_blocks.get(pubkey, SlashingDBBlockArray()),
+                                          signed_attestations=signed_attestations.get(pubkey,
+                                                                                      SlashingDBAttestationArray()))
+        index_signed_attestations(slashing_db_data)
+        index_signed_blocks(slashing_db_data)
+        # Watermarks raised by compaction take precedence over the minima of the retained history
+        if min_block_slot is not None:
+            slashing_db_data.min_block_slot = Slot(max(min_block_slot, slashing_db_data.min_block_slot or 0))
+        if min_source_epoch is not None:
+            slashing_db_data.min_source_epoch = Epoch(max(min_source_epoch, slashing_db_data.min_source_epoch or 0))
+        if min_target_epoch is not None:
+            slashing_db_data.min_target_epoch = Epoch(max(min_target_epoch, slashing_db_data.min_target_epoch or 0))
+        slashing_db.data.append(slashing_db_data)
+    slashing_db.store = store
+    return slashing_db
+
+
+def write_to_slashing_db_store(store: SlashingDBStore, pubkey: BLSPubkey,
+                               write: Union[SlashingDBAttestation, SlashingDBBlock, SlashingDBCompaction]) -> None:
+    """Apply a single staged write to the store within the current transaction.
+    """
+    connection = store.connection
+    connection.execute("INSERT OR IGNORE INTO validators (pubkey) VALUES (?)", (bytes(pubkey),))
+    if isinstance(write, SlashingDBAttestation):
+        connection.execute("INSERT INTO signed_attestations VALUES (?, ?, ?, ?)",
+                           (bytes(pubkey), int(write.source_epoch), int(write.target_epoch), bytes(write.signing_root)))
+    elif isinstance(write, SlashingDBBlock):
+        connection.execute("INSERT INTO signed_blocks VALUES (?, ?, ?)",
+                           (bytes(pubkey), int(write.slot), bytes(write.signing_root)))
+    else:
+        connection.execute("DELETE FROM signed_attestations WHERE pubkey = ? AND target_epoch < ?",
+                           (bytes(pubkey), int(write.oldest_retained_epoch)))
+        connection.execute("DELETE FROM signed_blocks WHERE pubkey = ? AND slot < ?",
+                           (bytes(pubkey), int(compute_start_slot_at_epoch(write.oldest_retained_epoch))))
+        watermarks = [None if watermark is None else int(watermark)
+                      for watermark in (write.min_block_slot, write.min_source_epoch, write.min_target_epoch)]
+        connection.execute("UPDATE validators SET min_block_slot = ?, min_source_epoch = ?, min_target_epoch = ? "
+                           "WHERE pubkey = ?", (*watermarks, bytes(pubkey)))
+
+
+def write_batch_to_slashing_db_store(
+        store: SlashingDBStore,
+        writes: List[Tuple[BLSPubkey, Union[SlashingDBAttestation, SlashingDBBlock, SlashingDBCompaction]]]) -> None:
+    """Apply the writes to the store in a single transaction, i.e. with a single fsync.
+    """
+    with store.connection:
+        store.connection.execute("BEGIN IMMEDIATE")
+        for pubkey, write in writes:
+            write_to_slashing_db_store(store, pubkey, write)
+
+
+def commit_slashing_db(slashing_db: SlashingDB) -> None:
+    """Make all writes staged to the store of slashing_db durable. Returns once they are.
+    Concurrent callers are group-committed: while a commit is in progress, writes staged by other
+    callers accumulate & are made durable together by the next commit.
+    """
+    store = slashing_db.store
+    if store is None:
+        return
+    with store.condition:
+        num_writes_to_commit = store.num_staged_writes
+        while store.num_committed_writes < num_writes_to_commit:
+            if store.committing:
+                # Another caller is committing, wait for it & check whether it covered our writes
+                store.condition.wait()
+                continue
+            store.committing = True
+            pending_writes, store.pending_writes = store.pending_writes, []
+            num_staged_writes = store.num_staged_writes
+            committed = False
+            store.condition.release()
+            try:
+                write_batch_to_slashing_db_store(store, pending_writes)
+                committed = True
+            finally:
+                store.condition.acquire()
+                if committed:
+                    store.num_committed_writes = num_staged_writes
+                    store.num_commits += 1
+                else:
+                    # Keep the writes staged for the next commit
+                    store.pending_writes = pending_writes + store.pending_writes
+                store.committing = False
+                store.condition.notify_all()
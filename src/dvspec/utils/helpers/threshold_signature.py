@@ -0,0 +1,84 @@
+from typing import (
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from eth_typing import (
+    BLSSignature as PyEccBLSSignature,
+)
+from py_ecc.bls.g2_primitives import (
+    G2_to_signature,
+    signature_to_G2,
+)
+from py_ecc.bls.typing import (
+    G2Uncompressed as G2Point,
+)
+from py_ecc.optimized_bls12_381 import (
+    Z2,
+    add,
+    curve_order,
+    double,
+)
+
+from ..types import (
+    BLSSignature,
+)
+
+"""
+BLS Threshold Signature Helper Functions
+"""
+
+
+# Bits of the scalars processed per step of the multi-scalar multiplication
+MULTI_SCALAR_WINDOW_BITS = 4
+
+
+def compute_lagrange_coefficients(co_validator_indices: Sequence[int]) -> Tuple[int, ...]:
+    """Lagrange coefficients at 0 of the secret-shared polynomial, evaluated at co-validator index + 1
+    for each of the distinct co_validator_indices. One field inversion per coefficient.
+    """
+    points = [index + 1 for index in co_validator_indices]
+    assert len(set(points)) == len(points)
+    coefficients = []
+    for point in points:
+        numerator, denominator = 1, 1
+        for other_point in points:
+            if other_point != point:
+                numerator = numerator * other_point % curve_order
+                denominator = denominator * (other_point - point) % curve_order
+        coefficients.append(numerator * pow(denominator, -1, curve_order) % curve_order)
+    return tuple(coefficients)
+
+
+def multi_scalar_multiply(points: Sequence[G2Point], scalars: Sequence[int]) -> G2Point:
+    """Compute the sum of scalar * point with interleaved fixed windows, sharing the doublings
+    across all points instead of multiplying each point separately.
+    """
+    window_size = 1 << MULTI_SCALAR_WINDOW_BITS
+    tables = []
+    for point in points:
+        table = [Z2, point]
+        for _ in range(2, window_size):
+            table.append(add(table[-1], point))
+        tables.append(table)
+    num_windows = (max(scalar.bit_length() for scalar in scalars) + MULTI_SCALAR_WINDOW_BITS - 1) \
+        // MULTI_SCALAR_WINDOW_BITS
+    result: Optional[G2Point] = None
+    for window in reversed(range(num_windows)):
+        if result is not None:
+            for _ in range(MULTI_SCALAR_WINDOW_BITS):
+                result = double(result)
+        for table, scalar in zip(tables, scalars):
+            digit = (scalar >> (window * MULTI_SCALAR_WINDOW_BITS)) & (window_size - 1)
+            if digit != 0:
+                result = table[digit] if result is None else add(result, table[digit])
+    return Z2 if result is None else result
+
+
+def combine_bls_signature_shares(signature_shares: Sequence[BLSSignature],
+                                 coefficients: Sequence[int]) -> BLSSignature:
+    """Combine the BLS signature shares with their Lagrange coefficients into the threshold signature.
+    """
+    points = [signature_to_G2(PyEccBLSSignature(bytes(signature_share))) for signature_share in signature_shares]
+    return BLSSignature(G2_to_signature(multi_scalar_multiply(points, coefficients)))
@@ -1,19 +1,42 @@
 from eth2spec.altair.mainnet import (
     uint64,
+    AttestationData,
+    BeaconBlock,
     Bytes32,
     Epoch,
     BLSPubkey,
     BLSSignature,
     CommitteeIndex,
+    Container,
+    Domain,
+    Fork,
     Root,
     Slot,
     ValidatorIndex,
     Version,
+    uint8,
 )
 
-from dataclasses import dataclass
+import http.client
+import queue
+import sqlite3
+import threading
+import time
+from array import array
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
     List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+    overload,
 )
 
 
@@ -64,11 +87,164 @@ class SlashingDBAttestation:
     signing_root: Root
 
 
+ROOT_LENGTH = 32
+
+
+def uint64_array() -> 'array[int]':
+    return array('Q')
+
+
+@dataclass
+class SlashingDBBlockArray:
+    """Structure-of-arrays storage for the signed blocks of a pubkey: a packed uint64 slot column &
+    a contiguous buffer of 32-byte signing roots.
+    Behaves like a list of SlashingDBBlock, records are materialized on access.
+    """
+    slots: 'array[int]' = field(default_factory=uint64_array)
+    signing_roots: bytearray = field(default_factory=bytearray)
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @overload
+    def __getitem__(self, key: int) -> SlashingDBBlock: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> List[SlashingDBBlock]: ...
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[SlashingDBBlock, List[SlashingDBBlock]]:
+        if isinstance(key, slice):
+            return [self[i] for i in range(len(self))[key]]
+        i = range(len(self))[key]
+        return SlashingDBBlock(slot=Slot(self.slots[i]), signing_root=self.signing_root(i))
+
+    def __iter__(self) -> Iterator[SlashingDBBlock]:
+        return (self[i] for i in range(len(self)))
+
+    def signing_root(self, i: int) -> Root:
+        return Root(bytes(self.signing_roots[i * ROOT_LENGTH:(i + 1) * ROOT_LENGTH]))
+
+    def append(self, block: SlashingDBBlock) -> None:
+        self.slots.append(int(block.slot))
+        self.signing_roots += bytes(block.signing_root)
+
+    def extend(self, blocks: Iterable[SlashingDBBlock]) -> None:
+        for block in blocks:
+            self.append(block)
+
+
+@dataclass
+class SlashingDBAttestationArray:
+    """Structure-of-arrays storage for the signed attestations of a pubkey: packed uint64 source & target
+    epoch columns & a contiguous buffer of 32-byte signing roots.
+    Behaves like a list of SlashingDBAttestation, records are materialized on access.
+    """
+    source_epochs: 'array[int]' = field(default_factory=uint64_array)
+    target_epochs: 'array[int]' = field(default_factory=uint64_array)
+    signing_roots: bytearray = field(default_factory=bytearray)
+
+    def __len__(self) -> int:
+        return len(self.target_epochs)
+
+    @overload
+    def __getitem__(self, key: int) -> SlashingDBAttestation: ...
+
+    @overload
+    def __getitem__(self, key: slice) -> List[SlashingDBAttestation]: ...
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[SlashingDBAttestation, List[SlashingDBAttestation]]:
+        if isinstance(key, slice):
+            return [self[i] for i in range(len(self))[key]]
+        i = range(len(self))[key]
+        return SlashingDBAttestation(source_epoch=Epoch(self.source_epochs[i]),
+                                     target_epoch=Epoch(self.target_epochs[i]),
+                                     signing_root=self.signing_root(i))
+
+    def __iter__(self) -> Iterator[SlashingDBAttestation]:
+        return (self[i] for i in range(len(self)))
+
+    def signing_root(self, i: int) -> Root:
+        return Root(bytes(self.signing_roots[i * ROOT_LENGTH:(i + 1) * ROOT_LENGTH]))
+
+    def append(self, attn: SlashingDBAttestation) -> None:
+        self.source_epochs.append(int(attn.source_epoch))
+        self.target_epochs.append(int(attn.target_epoch))
+        self.signing_roots += bytes(attn.signing_root)
+
+    def extend(self, attestations: Iterable[SlashingDBAttestation]) -> None:
+        for attn in attestations:
+            self.append(attn)
+
+
+@dataclass
+class SlashingDBAttestationIndex:
+    """Index over the signed attestations of a single pubkey for double & surround vote detection.
+    """
+    # Target & source epochs of the signed attestations sorted by target epoch,
+    # along with their positions in signed_attestations
+    target_epochs: 'array[int]' = field(default_factory=uint64_array)
+    source_epochs: 'array[int]' = field(default_factory=uint64_array)
+    positions: 'array[int]' = field(default_factory=uint64_array)
+    # max(source_epochs[:i+1]) & min(source_epochs[i:]) for each position i
+    prefix_max_source_epochs: 'array[int]' = field(default_factory=uint64_array)
+    suffix_min_source_epochs: 'array[int]' = field(default_factory=uint64_array)
+
+
 @dataclass
 class SlashingDBData:
     pubkey: BLSPubkey
-    signed_blocks: List[SlashingDBBlock]
-    signed_attestations: List[SlashingDBAttestation]
+    signed_blocks: SlashingDBBlockArray
+    signed_attestations: SlashingDBAttestationArray
+    # EIP-3076 low watermarks, maintained by the slashing DB helper functions
+    min_block_slot: Optional[Slot] = None
+    min_source_epoch: Optional[Epoch] = None
+    min_target_epoch: Optional[Epoch] = None
+    # Number of signed_blocks & signed_attestations reflected in the watermarks & indexes
+    num_indexed_blocks: int = field(default=0, init=False, repr=False, compare=False)
+    num_indexed_attestations: int = field(default=0, init=False, repr=False, compare=False)
+    attestation_index: SlashingDBAttestationIndex = field(default_factory=SlashingDBAttestationIndex,
+                                                          init=False, repr=False, compare=False)
+    # Signing roots of the signed blocks for each slot
+    block_slot_to_signing_roots: Dict[int, List[Root]] = field(default_factory=dict,
+                                                               init=False, repr=False, compare=False)
+    # Serializes the slashing checks & updates for the pubkey, so that different pubkeys are served concurrently
+    lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        # Records may be given as lists of SlashingDBBlock & SlashingDBAttestation
+        if not isinstance(self.signed_blocks, SlashingDBBlockArray):
+            signed_blocks, self.signed_blocks = self.signed_blocks, SlashingDBBlockArray()
+            self.signed_blocks.extend(signed_blocks)
+        if not isinstance(self.signed_attestations, SlashingDBAttestationArray):
+            signed_attestations, self.signed_attestations = self.signed_attestations, SlashingDBAttestationArray()
+            self.signed_attestations.extend(signed_attestations)
+
+
+@dataclass
+class SlashingDBCompaction:
+    """Compaction of the history of a pubkey into its low watermarks.
+    Records before oldest_retained_epoch are dropped.
+    """
+    oldest_retained_epoch: Epoch
+    min_block_slot: Optional[Slot]
+    min_source_epoch: Optional[Epoch]
+    min_target_epoch: Optional[Epoch]
+
+
+@dataclass
+class SlashingDBStore:
+    """Durable SQLite storage backing a SlashingDB.
+    Writes are staged in memory & made durable by a group commit.
+    """
+    connection: sqlite3.Connection
+    condition: threading.Condition = field(default_factory=threading.Condition)
+    # Writes staged for the next group commit, in order
+    pending_writes: List[Tuple[BLSPubkey, Union[SlashingDBAttestation, SlashingDBBlock, SlashingDBCompaction]]] = \
+        field(default_factory=list)
+    num_staged_writes: int = 0
+    num_committed_writes: int = 0
+    num_commits: int = 0
+    committing: bool = False
 
 
 @dataclass
@@ -76,6 +252,110 @@ class SlashingDB:
     interchange_format_version: Version
     genesis_validators_root: Root
     data: List[SlashingDBData]
+    # Index of data by pubkey, maintained by the slashing DB helper functions
+    pubkey_to_data: Dict[BLSPubkey, SlashingDBData] = field(default_factory=dict, init=False, repr=False, compare=False)
+    # Guards data & pubkey_to_data. Held only briefly, the records of a pubkey are guarded by SlashingDBData.lock.
+    lock: threading.RLock = field(default_factory=threading.RLock, init=False, repr=False, compare=False)
+    # Enables EIP-3076 minimal mode: history older than retention_epochs is compacted into the low watermarks
+    retention_epochs: Optional[int] = field(default=None, compare=False)
+    last_compaction_epoch: Optional[Epoch] = field(default=None, init=False, repr=False, compare=False)
+    # Durable storage for the slashing DB, if any
+    store: Optional[SlashingDBStore] = field(default=None, repr=False, compare=False)
+
+
+@dataclass
+class SlashingDBInterchangeStats:
+    """Throughput of an EIP-3076 interchange import or export.
+    """
+    num_validators: int
+    num_records: int
+    seconds: float
+    records_per_second: float
+
+
+"""
+Types for signing
+"""
+
+
+@dataclass
+class SigningContext:
+    """Memo of the roots of the object signed by a duty, so that the object is merkleized once
+    across the slashing checks, the slashing DB update & the signing root.
+    """
+    ssz_object: Container
+    root: Optional[Root] = field(default=None, init=False)
+    signing_root: Optional[Root] = field(default=None, init=False)
+
+    def get_root(self) -> Root:
+        if self.root is None:
+            self.root = self.ssz_object.hash_tree_root()
+        return self.root
+
+
+@dataclass
+class ForkSchedule:
+    """Fork versions of the chain by activation epoch, loaded from the BN once & refreshed in the background.
+    """
+    # Forks sorted by activation epoch, along with their activation epochs for bisection
+    forks: List[Fork] = field(default_factory=list)
+    epochs: List[int] = field(default_factory=list)
+    num_loads: int = 0
+    num_load_failures: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    stop_refresh: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+
+@dataclass
+class SigningDomainCache:
+    """Signature domains by (domain type, epoch, fork version), so that signing roots are computed without
+    BN requests. The genesis validators root is fetched once.
+    """
+    genesis_validators_root: Optional[Root] = None
+    domains: Dict[Tuple[bytes, int, bytes], Domain] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass
+class RandaoRevealCache:
+    """Combined randao reveals by (pubkey, epoch), signed ahead of the proposer duties of the epoch.
+    """
+    # Pending or completed signings
+    randao_reveals: Dict[Tuple[bytes, int], 'Future[BLSSignature]'] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass
+class RemoteSignerRequest:
+    """Request to the RS to sign signing_root with the key identified by pubkey.
+    body is the JSON body of https://consensys.github.io/web3signer/web3signer-eth2.html#tag/Signing
+    """
+    pubkey: BLSPubkey
+    body: Dict[str, Any]
+
+
+@dataclass
+class RemoteSigner:
+    """Client of the RS API with a pool of keep-alive connections.
+    At most max_connections requests are in flight, each bounded by timeout_seconds.
+    """
+    host: str
+    port: int
+    timeout_seconds: float
+    max_connections: int
+    # Idle connections, most recently used first
+    connections: 'queue.LifoQueue[http.client.HTTPConnection]' = field(default_factory=queue.LifoQueue, repr=False)
+    # Bounds the requests in flight, & thereby the connections, to max_connections
+    executor: ThreadPoolExecutor = field(init=False, repr=False)
+    num_connections_opened: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.executor = ThreadPoolExecutor(max_workers=self.max_connections, thread_name_prefix="remote-signer")
 
 
 """
@@ -83,6 +363,39 @@ Types for talking to VCs and BNs
 """
 
 
+@dataclass
+class AttestationDataCache:
+    """Attestation data produced by the BN by (slot, committee index), so that it is fetched once
+    for all the validators of the cluster attesting in the slot & committee.
+    """
+    # Pending or completed fetches
+    attestation_data: Dict[Tuple[int, int], 'Future[AttestationData]'] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass
+class AttestationDutiesCacheEntry:
+    """Attestation duties of an epoch, valid as long as the dependent root of the epoch does not change.
+    """
+    dependent_root: Root
+    # Validator indices whose duties were fetched, including those without a duty in the epoch
+    validator_indices: Set[int] = field(default_factory=set)
+    duties: Dict[int, 'AttestationDuty'] = field(default_factory=dict)
+
+
+@dataclass
+class AttestationDutiesCache:
+    """Attestation duties fetched from the BN by epoch, so that every validator's duties are fetched once
+    per epoch unless a reorg changes the dependent root.
+    """
+    entries: Dict[int, AttestationDutiesCacheEntry] = field(default_factory=dict)
+    hits: int = 0
+    misses: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
 @dataclass
 class AttestationDuty:
     pubkey: BLSPubkey
@@ -115,3 +428,175 @@ class SyncCommitteeSignature:
     beacon_block_root: Root
     validator_index: ValidatorIndex
     signature: BLSSignature
+
+
+"""
+Types for scheduling duties
+"""
+
+
+@dataclass
+class Clock:
+    """Source of time in seconds since the Unix epoch, injectable so that the scheduler can be simulated.
+    """
+    get_time: Callable[[], float] = time.time
+    sleep: Callable[[float], None] = time.sleep
+
+
+@dataclass(order=True)
+class ScheduledDuty:
+    """Duty due at tick, dispatched after the duties of lower priority value due at the same tick.
+    """
+    tick: int
+    priority: int
+    # Order of scheduling among duties of the same tick & priority
+    sequence: int
+    duty: Union[AttestationDuty, ProposerDuty] = field(compare=False)
+
+
+@dataclass
+class TimingWheel:
+    """Hashed timing wheel of duties: a duty due at tick waits in bucket tick % len(buckets)
+    until the wheel reaches its tick. Duties are scheduled at most one revolution ahead.
+    """
+    buckets: List[List[ScheduledDuty]]
+    # First tick that the wheel has not reached yet
+    current_tick: int = 0
+    num_scheduled: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass
+class DutyScheduler:
+    """Fetches the duties of the validators an epoch ahead & dispatches each one to the executor
+    at its offset in its slot, as measured by the clock.
+    """
+    genesis_time: int
+    clock: Clock
+    executor: Executor
+    wheel: TimingWheel
+    # Executor compacting the slashing DBs, apart from the one serving duties
+    compaction_executor: Executor
+    # First epoch whose duties have not been fetched yet
+    next_epoch: Optional[int] = None
+    # Last epoch whose slashing DB compaction was submitted
+    compaction_epoch: Optional[int] = None
+    num_dispatched: int = 0
+    num_failed: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    stop: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+
+"""
+Types for combining signature shares
+"""
+
+
+@dataclass
+class SignatureShare:
+    """Signature share over signing_root by the co-validator with co_validator_index,
+    for a duty in slot of the validator with pubkey.
+    """
+    pubkey: BLSPubkey
+    slot: Slot
+    signing_root: Root
+    co_validator_index: ValidatorIndex
+    signature: BLSSignature
+
+
+class SignatureShareMessage(Container):
+    """Compact wire format of a signature share. The decided value is kept local, as every DV peer
+    decided it too, so only its signing root is sent along with the signature share.
+    """
+    validator_index: ValidatorIndex
+    duty_type: uint8
+    slot: Slot
+    signing_root: Root
+    co_validator_index: ValidatorIndex
+    signature: BLSSignature
+
+
+@dataclass
+class ShareBucket:
+    """Signature shares over the same signing root for the same validator, by co-validator index.
+    """
+    slot: int
+    shares: Dict[int, SignatureShare] = field(default_factory=dict)
+    # Once combined, the bucket is kept until evicted so that late shares are dropped
+    combined: bool = False
+
+
+@dataclass
+class ShareAggregator:
+    """Buckets incoming signature shares by (validator pubkey, signing root) & calls on_threshold
+    with the shares of a bucket as soon as threshold shares have arrived.
+    Only shares of the max_slots slots up to the current slot, & of the next slot, are accepted.
+    """
+    threshold: int
+    on_threshold: Callable[[List[SignatureShare]], None] = field(repr=False)
+    max_slots: int
+    current_slot: int = 0
+    buckets: Dict[Tuple[bytes, bytes], ShareBucket] = field(default_factory=dict)
+    # Shares by (co-validator index, validator pubkey, slot), to bound the buckets a co-validator can open
+    num_shares: Dict[Tuple[int, bytes, int], int] = field(default_factory=dict)
+    num_combined: int = 0
+    num_duplicate: int = 0
+    num_late: int = 0
+    num_early: int = 0
+    num_excess: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass
+class ShareVerifier:
+    """Incoming signature shares pending verification, verified in one batch when flushed
+    so that only valid shares reach the share aggregator.
+    """
+    pending: List[SignatureShare] = field(default_factory=list)
+    num_verified: int = 0
+    num_invalid: int = 0
+    num_batches: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+
+@dataclass
+class ShareBatcher:
+    """Signature share messages produced by this node, pending until the next flush, so that each DV peer node
+    is sent one batch per window for all validators. Peer nodes are identified by the index of their co-validator.
+    """
+    window_seconds: float
+    peers: List[int] = field(default_factory=list)
+    pending: List[bytes] = field(default_factory=list)
+    num_messages: int = 0
+    num_batches: int = 0
+    # Batches that could not be sent, by peer
+    num_send_failures: Dict[int, int] = field(default_factory=dict)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    stop: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
+
+
+@dataclass
+class DecidedValue:
+    """Value decided by this node for the duty, of duty_type, into whose signed value
+    the signature shares over its signing root are combined.
+    """
+    duty_type: int
+    duty: Union[AttestationDuty, ProposerDuty]
+    value: Union[AttestationData, BeaconBlock]
+
+
+@dataclass
+class ShareCombiner:
+    """Signature shares received from the DV peer nodes, verified in one batch per window by the verifier,
+    bucketed by the aggregator & combined into the signed values of the values decided by this node.
+    """
+    window_seconds: float
+    verifier: ShareVerifier
+    aggregator: ShareAggregator
+    # Values decided by this node, by (validator pubkey, signing root)
+    decided_values: Dict[Tuple[bytes, bytes], DecidedValue] = field(default_factory=dict)
+    # Shares that reached the threshold before this node decided their value, by (validator pubkey, signing root)
+    undecided_shares: Dict[Tuple[bytes, bytes], List[SignatureShare]] = field(default_factory=dict)
+    num_submitted: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+    stop: threading.Event = field(default_factory=threading.Event, repr=False, compare=False)
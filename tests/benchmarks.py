@@ -0,0 +1,371 @@
+import random
+import sys
+import time
+import tracemalloc
+from unittest import mock
+from typing import (
+    Callable,
+    Dict,
+    List,
+    Tuple,
+)
+
+import milagro_bls_binding as milagro_bls
+from py_ecc.bls.g2_primitives import (
+    G2_to_signature,
+    signature_to_G2,
+)
+from py_ecc.optimized_bls12_381 import (
+    Z2,
+    add,
+    curve_order,
+    multiply,
+)
+from eth2spec.altair.mainnet import (
+    DOMAIN_BEACON_PROPOSER,
+    MAX_ATTESTATIONS,
+    MAX_VALIDATORS_PER_COMMITTEE,
+    SLOTS_PER_EPOCH,
+    Attestation,
+    AttestationData,
+    BeaconBlock,
+    Fork,
+    SignedBeaconBlock,
+    SigningData,
+)
+
+from dvspec.spec import (
+    CoValidator,
+    DistributedValidator,
+    State,
+    ValidatorIdentity,
+    combine_signature_shares,
+    route_duties,
+    update_block_slashing_db,
+)
+from dvspec.utils.helpers.share_batching import (
+    flush_share_batcher,
+    queue_signature_share_messages,
+)
+from dvspec.utils.helpers.share_messages import (
+    DUTY_TYPE_ATTESTATION,
+    SIGNATURE_SHARE_MESSAGE_SIZE,
+    decode_signature_share_message,
+    encode_signature_share_message,
+)
+from dvspec.utils.helpers.share_verification import (
+    find_invalid_signature_sets,
+)
+from dvspec.utils.helpers.threshold_signature import (
+    compute_lagrange_coefficients,
+)
+from dvspec.utils.helpers.fork_schedule import (
+    set_fork_schedule,
+)
+from dvspec.utils.helpers.signing import (
+    compute_block_signing_root,
+    dvc_compute_domain,
+)
+from dvspec.utils.helpers.slashing_db import (
+    index_signed_attestations,
+    is_slashable_block,
+)
+from dvspec.utils.types import (
+    BLSPubkey,
+    AttestationDuty,
+    BLSSignature,
+    Epoch,
+    Root,
+    SlashingDBAttestation,
+    SlashingDBAttestationArray,
+    SlashingDBBlockArray,
+    SlashingDB,
+    SlashingDBData,
+    ShareBatcher,
+    SignatureShare,
+    SignatureShareMessage,
+    SigningContext,
+    Slot,
+    ValidatorIndex,
+)
+
+
+"""
+Benchmarks, run with: python -m tests.benchmarks [benchmark ...]
+"""
+
+
+EPOCHS_PER_DAY = 24 * 60 * 60 // (12 * int(SLOTS_PER_EPOCH))
+EPOCHS_PER_YEAR = 365 * EPOCHS_PER_DAY
+
+
+def measure_allocated_bytes(build: Callable[[], object]) -> int:
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    result = build()
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return end - start
+
+
+def benchmark_slashing_db_memory(num_validators: int = 10_000, num_sampled_validators: int = 2) -> None:
+    """Memory of one year of attestation history for num_validators, extrapolated from num_sampled_validators.
+    """
+    def build_records() -> List[List[SlashingDBAttestation]]:
+        return [[SlashingDBAttestation(source_epoch=Epoch(epoch), target_epoch=Epoch(epoch + 1),
+                                       signing_root=Root(epoch.to_bytes(32, "little")))
+                 for epoch in range(EPOCHS_PER_YEAR)]
+                for _ in range(num_sampled_validators)]
+
+    def build_arrays() -> List[SlashingDBData]:
+        history = []
+        for i in range(num_sampled_validators):
+            signed_attestations = SlashingDBAttestationArray()
+            for epoch in range(EPOCHS_PER_YEAR):
+                signed_attestations.source_epochs.append(epoch)
+                signed_attestations.target_epochs.append(epoch + 1)
+                signed_attestations.signing_roots += epoch.to_bytes(32, "little")
+            slashing_db_data = SlashingDBData(pubkey=BLSPubkey(i.to_bytes(48, "little")),
+                                              signed_blocks=SlashingDBBlockArray(),
+                                              signed_attestations=signed_attestations)
+            index_signed_attestations(slashing_db_data)
+            history.append(slashing_db_data)
+        return history
+
+    num_records = num_sampled_validators * EPOCHS_PER_YEAR
+    scale = num_validators / num_sampled_validators
+    for name, build in [("list of SlashingDBAttestation", build_records),
+                        ("SlashingDBAttestationArray + index", build_arrays)]:
+        allocated_bytes = measure_allocated_bytes(build)
+        print(f"{name}: {allocated_bytes / num_records:.1f} bytes/attestation, "
+              f"{allocated_bytes * scale / 2**30:.1f} GiB for {num_validators} validators x 1 year")
+
+
+def build_full_block(slot: int) -> BeaconBlock:
+    block = BeaconBlock(slot=slot)
+    for i in range(MAX_ATTESTATIONS):
+        block.body.attestations.append(Attestation(
+            aggregation_bits=[True] * MAX_VALIDATORS_PER_COMMITTEE,
+            data=AttestationData(slot=slot - 1, index=i)))
+    return block
+
+
+def benchmark_block_roots(num_blocks: int = 20) -> None:
+    """Merkleizations & time to check, record & compute the signing root of a block with MAX_ATTESTATIONS
+    attestations, as decoded from the wire, with & without a SigningContext.
+    """
+    pubkey = BLSPubkey(bytes(48))
+    encoded_blocks = [build_full_block(slot).encode_bytes() for slot in range(1, num_blocks + 1)]
+    # Resolve the domain without a BN
+    set_fork_schedule([Fork(epoch=0)])
+    domain = dvc_compute_domain(DOMAIN_BEACON_PROPOSER, 0)
+
+    def serve_without_context(slashing_db: SlashingDB, block: BeaconBlock) -> None:
+        # The merkleizations of serve_proposer_duty before SigningContext: the validity check,
+        # the check & the record in update_block_slashing_db, and the signing root
+        assert not is_slashable_block(slashing_db, block, pubkey)
+        assert not is_slashable_block(slashing_db, block, pubkey)
+        block.hash_tree_root()
+        # compute_signing_root
+        SigningData(object_root=block.hash_tree_root(), domain=domain).hash_tree_root()
+
+    def serve_with_context(slashing_db: SlashingDB, block: BeaconBlock) -> None:
+        context = SigningContext(block)
+        assert not is_slashable_block(slashing_db, block, pubkey, context)
+        update_block_slashing_db(slashing_db, block, pubkey, context)
+        compute_block_signing_root(block, context)
+
+    seconds = 0.0
+    for encoded_block in encoded_blocks:
+        block = BeaconBlock.decode_bytes(encoded_block)
+        start_time = time.perf_counter()
+        block.hash_tree_root()
+        seconds += time.perf_counter() - start_time
+    print(f"first merkleization of a decoded block: {seconds / num_blocks * 1000:.2f} ms")
+    for name, serve in [("without SigningContext", serve_without_context),
+                        ("with SigningContext", serve_with_context)]:
+        # Re-signing the blocks makes every check look up the root of the block
+        slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+        for encoded_block in encoded_blocks:
+            update_block_slashing_db(slashing_db, BeaconBlock.decode_bytes(encoded_block), pubkey)
+        seconds = 0.0
+        with mock.patch.object(BeaconBlock, "hash_tree_root", autospec=True,
+                               side_effect=BeaconBlock.hash_tree_root) as hash_tree_root:
+            for encoded_block in encoded_blocks:
+                block = BeaconBlock.decode_bytes(encoded_block)
+                start_time = time.perf_counter()
+                serve(slashing_db, block)
+                seconds += time.perf_counter() - start_time
+        print(f"{name}: {hash_tree_root.call_count / num_blocks:.0f} hash_tree_root calls/block, "
+              f"{seconds / num_blocks * 1000:.2f} ms/block")
+
+
+def benchmark_route_duties(num_validators: int = 10_000) -> None:
+    """Time to route an epoch of attestation duties of num_validators to their distributed validators,
+    by scanning the list of distributed validators per duty & with the maps of the state.
+    """
+    validator_identities = [ValidatorIdentity(pubkey=BLSPubkey(i.to_bytes(48, "little")), index=i)
+                            for i in range(num_validators)]
+    state = State(distributed_validators=[
+        DistributedValidator(validator_identity=validator_identity,
+                             co_validators=[CoValidator(validator_identity=validator_identity,
+                                                        pubkey=BLSPubkey(), index=0)],
+                             slashing_db=SlashingDB(interchange_format_version=5, genesis_validators_root=Root(),
+                                                    data=[]))
+        for validator_identity in validator_identities
+    ])
+    attestation_duties = [AttestationDuty(pubkey=BLSPubkey(i.to_bytes(48, "little")), validator_index=i,
+                                          committee_index=0, committee_length=1, committees_at_slot=1,
+                                          validator_committee_index=0, slot=i % int(SLOTS_PER_EPOCH))
+                          for i in range(num_validators)]
+
+    def route_duties_by_scan() -> None:
+        for attestation_duty in attestation_duties[:num_validators // 100]:
+            [dv for dv in state.distributed_validators
+             if dv.validator_identity.index == attestation_duty.validator_index]
+
+    start_time = time.perf_counter()
+    route_duties_by_scan()
+    seconds = (time.perf_counter() - start_time) * 100
+    print(f"scan per duty: {seconds * 1000:.1f} ms/epoch (extrapolated from {num_validators // 100} duties)")
+    start_time = time.perf_counter()
+    route_duties(state, attestation_duties)
+    seconds = time.perf_counter() - start_time
+    print(f"route_duties: {seconds * 1000:.1f} ms/epoch")
+
+
+def benchmark_combine_signature_shares(num_combinations: int = 10) -> None:
+    """Combined signatures per second for t-of-n clusters, with each share multiplied separately & with
+    a multi-scalar multiplication, both in pure Python, and the time spent on the Lagrange coefficients alone.
+    """
+    rng = random.Random(22)
+    signing_root = bytes(32)
+    for threshold, num_co_validators in [(4, 7), (7, 10)]:
+        validator_identity = ValidatorIdentity(pubkey=BLSPubkey(), index=0)
+        distributed_validator = DistributedValidator(
+            validator_identity=validator_identity,
+            co_validators=[CoValidator(validator_identity=validator_identity, pubkey=BLSPubkey(), index=i)
+                           for i in range(num_co_validators)],
+            slashing_db=SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[]))
+        polynomial = [rng.randrange(1, curve_order) for _ in range(threshold)]
+        signature_shares = [SignatureShare(
+            pubkey=BLSPubkey(), slot=0, signing_root=Root(signing_root), co_validator_index=i,
+            signature=BLSSignature(milagro_bls.Sign(
+                (sum(coefficient * (i + 1) ** power for power, coefficient in enumerate(polynomial)) % curve_order)
+                .to_bytes(32, "big"), signing_root)))
+            for i in range(num_co_validators)]
+        subsets = [sorted(rng.sample(range(num_co_validators), threshold)) for _ in range(num_combinations)]
+
+        def combine_per_share(subset: List[int]) -> bytes:
+            coefficients = compute_lagrange_coefficients(subset)
+            signature = Z2
+            for i, coefficient in zip(subset, coefficients):
+                signature = add(signature, multiply(signature_to_G2(signature_shares[i].signature), coefficient))
+            return G2_to_signature(signature)
+
+        def combine_multi_scalar(subset: List[int]) -> bytes:
+            return combine_signature_shares(distributed_validator, [signature_shares[i] for i in subset])
+
+        for name, combine in [("per-share multiplication", combine_per_share),
+                              ("multi-scalar multiplication", combine_multi_scalar)]:
+            start_time = time.perf_counter()
+            for subset in subsets:
+                combine(subset)
+            seconds = time.perf_counter() - start_time
+            print(f"{threshold}-of-{num_co_validators}, {name}: {num_combinations / seconds:.1f} signatures/s")
+        start_time = time.perf_counter()
+        for subset in subsets:
+            compute_lagrange_coefficients(subset)
+        seconds = time.perf_counter() - start_time
+        print(f"{threshold}-of-{num_co_validators}, computing the coefficients alone: "
+              f"{seconds / num_combinations * 1e6:.1f} us/signature")
+
+
+def benchmark_verify_signature_shares(num_shares: int = 128) -> None:
+    """Verified signature shares per second, one at a time & in one randomized batch,
+    with no invalid share & with one invalid share, found by verifying each share once the batch fails.
+    """
+    secret_keys = [(i + 1).to_bytes(32, "big") for i in range(num_shares)]
+    signing_roots = [bytes([i % 4]) * 32 for i in range(num_shares)]
+    signature_sets = [(BLSPubkey(milagro_bls.SkToPk(secret_key)), Root(signing_root),
+                       BLSSignature(milagro_bls.Sign(secret_key, signing_root)))
+                      for secret_key, signing_root in zip(secret_keys, signing_roots)]
+    invalid_signature_sets = list(signature_sets)
+    invalid_signature_sets[num_shares // 3] = signature_sets[num_shares // 3 + 1][:2] + signature_sets[0][2:]
+
+    def verify_one_at_a_time(signature_sets: List[Tuple[BLSPubkey, Root, BLSSignature]]) -> List[int]:
+        return [i for i, (pubkey, signing_root, signature) in enumerate(signature_sets)
+                if not milagro_bls.Verify(bytes(pubkey), bytes(signing_root), bytes(signature))]
+
+    for name, verify in [("one at a time", verify_one_at_a_time), ("batch", find_invalid_signature_sets)]:
+        for sets_name, sets, expected in [("valid", signature_sets, []),
+                                          ("one invalid", invalid_signature_sets, [num_shares // 3])]:
+            start_time = time.perf_counter()
+            assert verify(sets) == expected
+            seconds = time.perf_counter() - start_time
+            print(f"{num_shares} shares, {sets_name}, {name}: {num_shares / seconds:.1f} shares/s")
+
+
+def benchmark_signature_share_messages(num_messages: int = 10_000) -> None:
+    """Bytes per signature share sent as the signed object & as a SignatureShareMessage,
+    and time to decode SignatureShareMessages from one buffer, in place & as SSZ objects.
+    """
+    attestation = Attestation(aggregation_bits=[True] * MAX_VALIDATORS_PER_COMMITTEE)
+    signed_block = SignedBeaconBlock(message=build_full_block(1))
+    for name, size in [("Attestation", len(attestation.encode_bytes())),
+                       ("SignedBeaconBlock with MAX_ATTESTATIONS", len(signed_block.encode_bytes()))]:
+        print(f"{name}: {size} bytes/share, SignatureShareMessage: {SIGNATURE_SHARE_MESSAGE_SIZE} bytes/share "
+              f"({size / SIGNATURE_SHARE_MESSAGE_SIZE:.0f}x smaller)")
+    view = memoryview(b"".join(
+        encode_signature_share_message(ValidatorIndex(i), DUTY_TYPE_ATTESTATION, Slot(1),
+                                       Root(i.to_bytes(32, "little")), ValidatorIndex(i % 4), BLSSignature())
+        for i in range(num_messages)))
+    start_time = time.perf_counter()
+    for i in range(num_messages):
+        decode_signature_share_message(view, i * SIGNATURE_SHARE_MESSAGE_SIZE)
+    seconds = time.perf_counter() - start_time
+    print(f"decode_signature_share_message: {seconds / num_messages * 1e6:.1f} us/message")
+    start_time = time.perf_counter()
+    for offset in range(0, len(view), SIGNATURE_SHARE_MESSAGE_SIZE):
+        SignatureShareMessage.decode_bytes(view[offset:offset + SIGNATURE_SHARE_MESSAGE_SIZE])
+    seconds = time.perf_counter() - start_time
+    print(f"SignatureShareMessage.decode_bytes: {seconds / num_messages * 1e6:.1f} us/message")
+
+
+def benchmark_share_batching(num_validators: int = 1000, num_peers: int = 3) -> None:
+    """Messages & bytes sent per slot for the attestation signature shares of num_validators
+    to num_peers DV peer nodes, one message per share & peer, and one batch per peer.
+    """
+    messages = [encode_signature_share_message(ValidatorIndex(i), DUTY_TYPE_ATTESTATION, Slot(1),
+                                               Root(i.to_bytes(32, "little")), ValidatorIndex(0), BLSSignature())
+                for i in range(num_validators)]
+    batches: List[bytes] = []
+    batcher = ShareBatcher(window_seconds=0.05, peers=list(range(1, num_peers + 1)))
+    with mock.patch("dvspec.utils.helpers.share_batching.send_signature_share_batch",
+                    side_effect=lambda peer, batch: batches.append(batch)):
+        start_time = time.perf_counter()
+        queue_signature_share_messages(messages, batcher)
+        flush_share_batcher(batcher)
+        seconds = time.perf_counter() - start_time
+    print(f"one message per share & peer: {num_validators * num_peers} messages/slot, "
+          f"{num_validators * num_peers * SIGNATURE_SHARE_MESSAGE_SIZE} bytes/slot")
+    print(f"one batch per peer: {len(batches)} messages/slot, {sum(len(batch) for batch in batches)} bytes/slot, "
+          f"{seconds * 1000:.2f} ms to queue & frame")
+
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {
+    "slashing_db_memory": benchmark_slashing_db_memory,
+    "block_roots": benchmark_block_roots,
+    "route_duties": benchmark_route_duties,
+    "combine_signature_shares": benchmark_combine_signature_shares,
+    "verify_signature_shares": benchmark_verify_signature_shares,
+    "signature_share_messages": benchmark_signature_share_messages,
+    "share_batching": benchmark_share_batching,
+}
+
+
+if __name__ == "__main__":
+    for benchmark_name in sys.argv[1:] or list(BENCHMARKS):
+        print(f"# {benchmark_name}")
+        BENCHMARKS[benchmark_name]()
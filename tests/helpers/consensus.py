@@ -2,6 +2,11 @@ from eth2spec.altair.mainnet import (
     AttestationData,
     BeaconBlock,
 )
+from typing import (
+    Sequence,
+    Tuple,
+)
+
 from dvspec.utils.types import (
     BLSSignature,
     Bytes32,
@@ -12,10 +17,13 @@ from dvspec.utils.types import (
 from dvspec.consensus import (
     consensus_is_valid_attestation_data,
     consensus_is_valid_block,
+    consensus_is_valid_slot_attestation_data,
+)
+from dvspec.utils.helpers.attestation_data import (
+    get_attestation_data,
 )
 
 from tests.helpers.eth_node_interface import (
-    bn_produce_attestation_data,
     bn_produce_block,
 )
 
@@ -28,16 +36,26 @@ Consensus Specification
 def consensus_on_attestation(slashing_db: SlashingDB, attestation_duty: AttestationDuty) -> AttestationData:
     """Consensus protocol between distributed validator nodes for attestation values.
     Returns the decided value.
-    If this DV is the leader, it must use `bn_produce_attestation_data` for the proposed value.
+    If this DV is the leader, it must use `get_attestation_data` for the proposed value.
     The consensus protocol must use `consensus_is_valid_attestation_data` to determine
     validity of the proposed attestation value.
     """
     # TODO: Use this method in tests instead of dvspec.consensus.consensus_on_attestation
-    attestation_data = bn_produce_attestation_data(attestation_duty.slot, attestation_duty.committee_index)
+    attestation_data = get_attestation_data(attestation_duty.slot, attestation_duty.committee_index)
     assert consensus_is_valid_attestation_data(slashing_db, attestation_data, attestation_duty)
     return attestation_data
 
 
+def consensus_on_slot_attestation(attestation_duties: Sequence[Tuple[SlashingDB, AttestationDuty]]) -> AttestationData:
+    """Single consensus instance between distributed validator nodes for the attestation data
+    of all the attestation duties of the cluster in a slot.
+    """
+    _, attestation_duty = attestation_duties[0]
+    attestation_data = get_attestation_data(attestation_duty.slot, attestation_duty.committee_index)
+    assert consensus_is_valid_slot_attestation_data(attestation_duties, attestation_data)
+    return attestation_data
+
+
 def consensus_on_block(slashing_db: SlashingDB,
                        proposer_duty: ProposerDuty, randao_reveal: BLSSignature) -> BeaconBlock:
     """Consensus protocol between distributed validator nodes for block values.
@@ -1,4 +1,5 @@
 import random
+from typing import Tuple
 from eth2spec.altair.mainnet import (
     MAX_COMMITTEES_PER_SLOT,
     SLOTS_PER_EPOCH,
@@ -7,6 +8,7 @@ from eth2spec.altair.mainnet import (
     AttestationData,
     BeaconBlock,
     Checkpoint,
+    Fork,
     Version,
     compute_epoch_at_slot,
     compute_start_slot_at_epoch,
@@ -27,6 +29,7 @@ from dvspec.utils.types import (
 )
 from dvspec.spec import (
     State,
+    route_duties,
 )
 
 VALIDATOR_SET_SIZE = SLOTS_PER_EPOCH
@@ -36,10 +39,18 @@ Ethereum node interface methods
 """
 
 
+def bn_get_genesis_validators_root() -> Root:
+    return Root()
+
+
 def bn_get_fork_version(slot: Slot) -> Version:
     return Version('0x00000000')
 
 
+def bn_get_fork_schedule() -> List[Fork]:
+    return [Fork(previous_version=Version('0x00000000'), current_version=Version('0x00000000'), epoch=0)]
+
+
 def bn_get_attestation_duties_for_epoch(validator_indices: List[ValidatorIndex], epoch: Epoch) -> List[AttestationDuty]:
     attestation_duties = []
     for validator_index in validator_indices:
@@ -56,6 +67,11 @@ def bn_get_attestation_duties_for_epoch(validator_indices: List[ValidatorIndex],
     return attestation_duties
 
 
+def bn_get_attestation_duties_and_dependent_root_for_epoch(validator_indices: List[ValidatorIndex],
+                                                           epoch: Epoch) -> Tuple[Root, List[AttestationDuty]]:
+    return Root(), bn_get_attestation_duties_for_epoch(validator_indices, epoch)
+
+
 def bn_produce_attestation_data(slot: Slot, committee_index: CommitteeIndex) -> AttestationData:
     attestation_data = AttestationData(slot=slot,
                                        index=committee_index,
@@ -74,7 +90,8 @@ def bn_get_proposer_duties_for_epoch(epoch: Epoch) -> List[ProposerDuty]:
     random.shuffle(validator_indices)
     for i in range(SLOTS_PER_EPOCH):
         proposer_duties.append(ProposerDuty(pubkey=BLSPubkey(str('').zfill(48*2)),
-                               validator_index=validator_indices[i], slot=i))
+                               validator_index=validator_indices[i],
+                               slot=compute_start_slot_at_epoch(epoch) + i))
     return proposer_duties
 
 
@@ -90,6 +107,12 @@ def rs_sign_attestation(attestation_data: AttestationData, fork_version: Version
     return BLSSignature(str(signing_root.hex()).zfill(96*2))
 
 
+def rs_sign_attestations(attestations: List[Tuple[BLSPubkey, AttestationData, Root]],
+                         fork_version: Version) -> List[BLSSignature]:
+    return [rs_sign_attestation(attestation_data, fork_version, signing_root)
+            for _, attestation_data, signing_root in attestations]
+
+
 def rs_sign_randao_reveal(epoch: Epoch, fork_version: Version, signing_root: Root) -> BLSSignature:
     return BLSSignature(str(signing_root.hex()).zfill(96*2))
 
@@ -105,22 +128,9 @@ Helpers for Ethereum node interaface methods
 
 def fill_attestation_duties_with_val_index(state: State,
                                            attestation_duties: List[AttestationDuty]) -> List[AttestationDuty]:
-    val_index_to_pubkey = {}
-    for dv in state.distributed_validators:
-        val_index_to_pubkey[dv.validator_identity.index] = dv.validator_identity.pubkey
-    for att_duty in attestation_duties:
-        att_duty.pubkey = val_index_to_pubkey[att_duty.validator_index]
-    return attestation_duties
+    return [attestation_duty for _, attestation_duty in route_duties(state, attestation_duties)]
 
 
 def filter_and_fill_proposer_duties_with_val_index(state: State,
                                                    proposer_duties: List[ProposerDuty]) -> List[ProposerDuty]:
-    filtered_proposer_duties = []
-    val_index_to_pubkey = {}
-    for dv in state.distributed_validators:
-        val_index_to_pubkey[dv.validator_identity.index] = dv.validator_identity.pubkey
-    for pro_duty in proposer_duties:
-        if pro_duty.validator_index in val_index_to_pubkey:
-            pro_duty.pubkey = val_index_to_pubkey[pro_duty.validator_index]
-            filtered_proposer_duties.append(pro_duty)
-    return filtered_proposer_duties
+    return [proposer_duty for _, proposer_duty in route_duties(state, proposer_duties)]
@@ -1,27 +1,53 @@
+import threading
 from typing import (
+    Dict,
     List,
+    Tuple,
 )
 
 from dvspec.utils.types import (
+    BLSPubkey,
     BLSSignature,
+    Epoch,
+    ValidatorIndex,
 )
 
 
-TEST_CACHE_RANDAO = None
+# Randao reveal signature shares by (pubkey, epoch), each set once broadcast
+TEST_CACHE_RANDAO: Dict[Tuple[bytes, int], BLSSignature] = {}
+TEST_CACHE_RANDAO_SET: Dict[Tuple[bytes, int], threading.Event] = {}
+TEST_CACHE_RANDAO_LOCK = threading.Lock()
+TEST_SIGNATURE_SHARE_BATCHES: List[Tuple[ValidatorIndex, bytes]] = []
 
 
-def broadcast_randao_reveal_signature_share(randao_reveal_signature_share: BLSSignature) -> None:
-    global TEST_CACHE_RANDAO
-    TEST_CACHE_RANDAO = randao_reveal_signature_share
+def get_randao_reveal_signature_share_set(validator_pubkey: BLSPubkey, epoch: Epoch) -> threading.Event:
+    with TEST_CACHE_RANDAO_LOCK:
+        return TEST_CACHE_RANDAO_SET.setdefault((bytes(validator_pubkey), int(epoch)), threading.Event())
 
 
-def listen_for_randao_reveal_signature_shares() -> List[BLSSignature]:
-    global TEST_CACHE_RANDAO
-    assert TEST_CACHE_RANDAO is not None
-    return [TEST_CACHE_RANDAO]
+def broadcast_randao_reveal_signature_share(validator_pubkey: BLSPubkey, epoch: Epoch,
+                                            randao_reveal_signature_share: BLSSignature) -> None:
+    with TEST_CACHE_RANDAO_LOCK:
+        TEST_CACHE_RANDAO[bytes(validator_pubkey), int(epoch)] = randao_reveal_signature_share
+    get_randao_reveal_signature_share_set(validator_pubkey, epoch).set()
+
+
+def listen_for_randao_reveal_signature_shares(validator_pubkey: BLSPubkey, epoch: Epoch) -> List[BLSSignature]:
+    # The shares are listened for while ours is broadcast
+    assert get_randao_reveal_signature_share_set(validator_pubkey, epoch).wait(timeout=5)
+    with TEST_CACHE_RANDAO_LOCK:
+        return [TEST_CACHE_RANDAO[bytes(validator_pubkey), int(epoch)]]
 
 
 def construct_signed_randao_reveal(value_signature_shares: List[BLSSignature]) -> BLSSignature:
     """Construct a complete signed randao reveal value from signature shares.
     """
     return value_signature_shares[0]
+
+
+def get_co_validator_index(validator_pubkey: BLSPubkey) -> ValidatorIndex:
+    return ValidatorIndex(0)
+
+
+def send_signature_share_batch(peer_index: ValidatorIndex, signature_share_batch: bytes) -> None:
+    TEST_SIGNATURE_SHARE_BATCHES.append((peer_index, signature_share_batch))
@@ -1,5 +1,5 @@
 # type: ignore
-from pkgutil import iter_modules
+from pkgutil import walk_packages
 from typing import Callable
 import importlib
 
@@ -16,6 +16,7 @@ def replace_module_method(module, method_name_string: str, replacement_method: C
 
 
 def replace_method_in_dvspec(method_name_string: str, replacement_method: Callable) -> None:
-    for dvspec_submodule_info in iter_modules(dvspec.__path__):
-        dvspec_submodule = importlib.import_module(dvspec.__name__ + '.' + dvspec_submodule_info.name)
+    # Walk subpackages too, e.g. dvspec.utils.helpers.signing imports BN methods
+    for dvspec_submodule_info in walk_packages(dvspec.__path__, dvspec.__name__ + '.'):
+        dvspec_submodule = importlib.import_module(dvspec_submodule_info.name)
         replace_module_method(dvspec_submodule, method_name_string, replacement_method)
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import threading
+import time
+from http.server import (
+    BaseHTTPRequestHandler,
+    ThreadingHTTPServer,
+)
+from typing import (
+    Tuple,
+)
+
+
+"""
+Stub Remote Signer
+"""
+
+
+def stub_sign(signing_root: bytes) -> bytes:
+    return hashlib.sha256(signing_root).digest() * 3
+
+
+class StubRemoteSignerHandler(BaseHTTPRequestHandler):
+    # Keep-alive
+    protocol_version = "HTTP/1.1"
+    server: "StubRemoteSigner"
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.num_connections += 1
+
+    def do_POST(self) -> None:
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert self.path.startswith("/api/v1/eth2/sign/0x") and "fork_info" in body
+        time.sleep(self.server.delay_seconds)
+        signature = stub_sign(bytes.fromhex(body["signingRoot"][2:]))
+        content = json.dumps({"signature": "0x" + signature.hex()}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+class StubRemoteSigner(ThreadingHTTPServer):
+    """Local stand-in for the RS signing API, signing with a hash of the signing root.
+    """
+    daemon_threads = True
+
+    def __init__(self, delay_seconds: float = 0.0) -> None:
+        super().__init__(("127.0.0.1", 0), StubRemoteSignerHandler)
+        self.delay_seconds = delay_seconds
+        self.num_connections = 0
+        self.lock = threading.Lock()
+
+
+def start_stub_remote_signer(delay_seconds: float = 0.0) -> Tuple[StubRemoteSigner, str]:
+    server = StubRemoteSigner(delay_seconds)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
@@ -10,6 +10,7 @@ from dvspec.spec import (
     DistributedValidator,
     State,
     ValidatorIdentity,
+    get_distributed_validator_for_index,
 )
 
 
@@ -50,9 +51,6 @@ def get_validator_indices(state: State) -> List[ValidatorIndex]:
 
 
 def get_distributed_validator_by_index(state: State, validator_index: ValidatorIndex) -> DistributedValidator:
-    dv_list = []
-    for dv in state.distributed_validators:
-        if dv.validator_identity.index == validator_index:
-            dv_list.append(dv)
-    assert len(dv_list) == 1
-    return dv_list[0]
+    distributed_validator = get_distributed_validator_for_index(state, validator_index)
+    assert distributed_validator is not None
+    return distributed_validator
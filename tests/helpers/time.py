@@ -7,6 +7,7 @@ from eth2spec.altair.mainnet import (
 )
 
 from dvspec.utils.types import (
+    Clock,
     Slot,
     Epoch,
 )
@@ -39,3 +40,13 @@ def compute_slot_at_time(time: int) -> Slot:
 
 def compute_epoch_at_time(time: int) -> Epoch:
     return compute_slot_at_time(time) // SLOTS_PER_EPOCH
+
+
+def build_simulated_clock(start_time: float = GENESIS_TIME) -> Clock:
+    # Sleeping advances the time instantly
+    now = [start_time]
+
+    def sleep(seconds: float) -> None:
+        now[0] += seconds
+
+    return Clock(get_time=lambda: now[0], sleep=sleep)
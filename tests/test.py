@@ -1,13 +1,175 @@
+import asyncio
+import io
+import json
+import random
+import socket
+import threading
+import time
+from typing import (
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from unittest import mock
+
+import eth2spec.altair.mainnet as eth2spec
+import milagro_bls_binding as milagro_bls
+from py_ecc.optimized_bls12_381 import curve_order
+from eth2spec.altair.mainnet import (
+    AttestationData,
+    BeaconBlock,
+    Checkpoint,
+)
+
+from dvspec.consensus import (
+    consensus_is_valid_attestation_data,
+    consensus_is_valid_slot_attestation_data,
+    get_valid_slot_attestation_duties,
+)
+from dvspec.eth_node_interface import (
+    bn_submit_attestation,
+    bn_submit_block,
+    rs_sign_attestation_async,
+)
+from dvspec.scheduler import (
+    ATTESTATION_DUTY_PRIORITY,
+    PROPOSER_DUTY_PRIORITY,
+    advance_timing_wheel,
+    create_duty_scheduler,
+    create_timing_wheel,
+    run_duty_scheduler,
+    schedule_duty,
+)
 from dvspec.spec import (
+    RANDAO_REVEAL_CACHE,
+    State,
+    ValidatorIdentity,
+    add_distributed_validator,
+    combine_signature_shares,
+    create_share_combiner,
+    decode_signature_share,
+    flush_share_combiner,
+    flush_signature_shares,
+    get_distributed_validator_for_pubkey,
+    presign_randao_reveals,
+    receive_signature_share_batch,
+    route_duties,
+    route_duty,
     serve_attestation_duty,
+    serve_attestation_duty_async,
     serve_proposer_duty,
+    serve_proposer_duty_async,
+    serve_slot_duties,
+    sign_randao_reveal_async,
+    update_attestation_slashing_db,
+    update_block_slashing_db,
+)
+from dvspec.utils.helpers.async_helpers import (
+    run_async,
+)
+from dvspec.utils.helpers.attestation_data import (
+    ATTESTATION_DATA_CACHE,
+    ATTESTATION_DATA_CACHE_SLOTS,
+    get_attestation_data,
+)
+from dvspec.utils.helpers.attestation_duties import (
+    get_attestation_duties,
+    invalidate_attestation_duties,
+)
+from dvspec.utils.helpers.fork_schedule import (
+    get_fork,
+    get_fork_version,
+    set_fork_schedule,
+    start_fork_schedule_refresh,
+    stop_fork_schedule_refresh,
+)
+from dvspec.utils.helpers.remote_signer import (
+    build_attestation_sign_request,
+    close_remote_signer,
+    open_remote_signer,
+    rs_sign,
+    rs_sign_bulk,
+)
+from dvspec.utils.helpers.share_aggregator import (
+    SHARE_AGGREGATOR_MAX_SHARES_PER_SLOT,
+    add_signature_share,
+    create_share_aggregator,
+    set_share_aggregator_slot,
+)
+from dvspec.utils.helpers.share_batching import (
+    flush_share_batcher,
+    queue_signature_share_messages,
+    start_share_batcher,
+    stop_share_batcher,
+)
+from dvspec.utils.helpers.share_messages import (
+    DUTY_TYPE_ATTESTATION,
+    DUTY_TYPE_BLOCK,
+    SIGNATURE_SHARE_BATCH_MAX_MESSAGES,
+    SIGNATURE_SHARE_MESSAGE_SIZE,
+    encode_signature_share_batch,
+    encode_signature_share_message,
+)
+from dvspec.utils.helpers.share_verification import (
+    find_invalid_signature_sets,
+    queue_signature_share,
+)
+from dvspec.utils.helpers.signing import (
+    DOMAIN_CACHE,
+    compute_attestation_signing_root,
+    compute_block_signing_root,
+    dvc_compute_domain,
+)
+from dvspec.utils.helpers.slashing_db import (
+    are_slashable_attestation_data,
+    build_attestation_index,
+    compact_slashing_db,
+    get_slashing_db_data_for_pubkey,
+    is_slashable_attestation_data,
+    is_slashable_block,
+)
+from dvspec.utils.helpers.slashing_db_store import (
+    close_slashing_db_store,
+    commit_slashing_db,
+    load_slashing_db,
+    open_slashing_db_store,
+)
+from dvspec.utils.helpers.slashing_db_interchange import (
+    export_slashing_db_interchange,
+    import_slashing_db_interchange,
+)
+from dvspec.utils.types import (
+    AttestationDataCache,
+    AttestationDutiesCache,
+    AttestationDuty,
+    BLSPubkey,
+    BLSSignature,
+    ForkSchedule,
+    ProposerDuty,
+    Root,
+    SlashingDB,
+    SlashingDBAttestation,
+    SlashingDBData,
+    ShareBatcher,
+    ShareVerifier,
+    SignatureShare,
+    SignatureShareMessage,
+    SigningContext,
+    SigningDomainCache,
+    Slot,
+    ValidatorIndex,
 )
 
 from helpers.time import (
+    build_simulated_clock,
     get_current_time,
     compute_epoch_at_time,
 )
 from tests.helpers.state import (
+    build_distributed_validator,
     build_state,
     get_validator_indices,
     get_distributed_validator_by_index,
@@ -15,21 +177,35 @@ from tests.helpers.state import (
 from tests.helpers.consensus import (
     consensus_on_attestation,
     consensus_on_block,
+    consensus_on_slot_attestation,
 )
 from tests.helpers.eth_node_interface import (
+    bn_get_attestation_duties_and_dependent_root_for_epoch,
     bn_get_attestation_duties_for_epoch,
     bn_get_proposer_duties_for_epoch,
     fill_attestation_duties_with_val_index,
     filter_and_fill_proposer_duties_with_val_index,
+    bn_get_fork_schedule,
     bn_get_fork_version,
+    bn_get_genesis_validators_root,
+    bn_produce_attestation_data,
     rs_sign_attestation,
+    rs_sign_attestations,
     rs_sign_randao_reveal,
     rs_sign_block,
 )
 from tests.helpers.networking import (
+    TEST_CACHE_RANDAO,
+    TEST_SIGNATURE_SHARE_BATCHES,
     broadcast_randao_reveal_signature_share,
+    get_co_validator_index,
     listen_for_randao_reveal_signature_shares,
     construct_signed_randao_reveal,
+    send_signature_share_batch,
+)
+from tests.helpers.remote_signer import (
+    start_stub_remote_signer,
+    stub_sign,
 )
 from tests.helpers.patch_dvspec import (
     replace_method_in_dvspec,
@@ -38,13 +214,24 @@ from tests.helpers.patch_dvspec import (
 
 replace_method_in_dvspec("consensus_on_attestation", consensus_on_attestation)
 replace_method_in_dvspec("consensus_on_block", consensus_on_block)
+replace_method_in_dvspec("consensus_on_slot_attestation", consensus_on_slot_attestation)
+replace_method_in_dvspec("bn_produce_attestation_data", bn_produce_attestation_data)
+replace_method_in_dvspec("bn_get_attestation_duties_for_epoch", bn_get_attestation_duties_for_epoch)
+replace_method_in_dvspec("bn_get_attestation_duties_and_dependent_root_for_epoch",
+                         bn_get_attestation_duties_and_dependent_root_for_epoch)
+replace_method_in_dvspec("bn_get_proposer_duties_for_epoch", bn_get_proposer_duties_for_epoch)
 replace_method_in_dvspec("bn_get_fork_version", bn_get_fork_version)
+replace_method_in_dvspec("bn_get_genesis_validators_root", bn_get_genesis_validators_root)
+replace_method_in_dvspec("bn_get_fork_schedule", bn_get_fork_schedule)
 replace_method_in_dvspec("rs_sign_attestation", rs_sign_attestation)
+replace_method_in_dvspec("rs_sign_attestations", rs_sign_attestations)
 replace_method_in_dvspec("rs_sign_randao_reveal", rs_sign_randao_reveal)
 replace_method_in_dvspec("rs_sign_block", rs_sign_block)
 replace_method_in_dvspec("broadcast_randao_reveal_signature_share", broadcast_randao_reveal_signature_share)
 replace_method_in_dvspec("listen_for_randao_reveal_signature_shares", listen_for_randao_reveal_signature_shares)
 replace_method_in_dvspec("construct_signed_randao_reveal", construct_signed_randao_reveal)
+replace_method_in_dvspec("get_co_validator_index", get_co_validator_index)
+replace_method_in_dvspec("send_signature_share_batch", send_signature_share_batch)
 
 
 def test_basic_attestation() -> None:
@@ -56,10 +243,7 @@ def test_basic_attestation() -> None:
     attestation_duties = bn_get_attestation_duties_for_epoch(validator_indices, current_epoch+1)
     filled_attestation_duties = fill_attestation_duties_with_val_index(state, attestation_duties)
     attestation_duty = filled_attestation_duties[0]
-
-    distributed_validator = get_distributed_validator_by_index(state, attestation_duty.validator_index)
-    slashing_db = distributed_validator.slashing_db
-    serve_attestation_duty(slashing_db, attestation_duty)
+    serve_attestation_duty(state, attestation_duty)
 
 
 def test_basic_block() -> None:
@@ -73,6 +257,965 @@ def test_basic_block() -> None:
         proposer_duties = bn_get_proposer_duties_for_epoch(current_epoch+1)
         filled_proposer_duties = filter_and_fill_proposer_duties_with_val_index(state, proposer_duties)
     proposer_duty = filled_proposer_duties[0]
-    distributed_validator = get_distributed_validator_by_index(state, proposer_duty.validator_index)
-    slashing_db = distributed_validator.slashing_db
-    serve_proposer_duty(slashing_db, proposer_duty)
+    serve_proposer_duty(state, proposer_duty)
+
+
+def build_attestation_data(source_epoch: int, target_epoch: int) -> AttestationData:
+    return AttestationData(source=Checkpoint(epoch=source_epoch), target=Checkpoint(epoch=target_epoch))
+
+
+def test_slashing_db_pubkey_index() -> None:
+    pubkeys = [BLSPubkey(str(i).zfill(48*2)) for i in range(3)]
+    slashing_db = SlashingDB(interchange_format_version=5,
+                             genesis_validators_root=Root(),
+                             data=[SlashingDBData(pubkey=pubkeys[0], signed_blocks=[], signed_attestations=[])])
+    assert get_slashing_db_data_for_pubkey(slashing_db, pubkeys[0]) is slashing_db.data[0]
+    # Records for an unknown pubkey must be kept in the slashing DB
+    update_attestation_slashing_db(slashing_db, build_attestation_data(0, 1), pubkeys[1])
+    assert len(slashing_db.data) == 2
+    assert is_slashable_attestation_data(slashing_db, build_attestation_data(0, 1), pubkeys[1])
+    assert not is_slashable_attestation_data(slashing_db, build_attestation_data(0, 1), pubkeys[0])
+    # Entries appended to slashing_db.data directly are picked up by the index
+    slashing_db.data.append(SlashingDBData(pubkey=pubkeys[2], signed_blocks=[], signed_attestations=[]))
+    assert get_slashing_db_data_for_pubkey(slashing_db, pubkeys[2]) is slashing_db.data[2]
+
+
+def test_slashing_db_watermarks() -> None:
+    pubkey = BLSPubkey(str(0).zfill(48*2))
+    slashing_db_data = SlashingDBData(pubkey=pubkey, signed_blocks=[], signed_attestations=[
+        SlashingDBAttestation(source_epoch=3, target_epoch=5, signing_root=Root()),
+        SlashingDBAttestation(source_epoch=2, target_epoch=4, signing_root=Root()),
+    ])
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[slashing_db_data])
+    assert is_slashable_attestation_data(slashing_db, build_attestation_data(2, 4), pubkey)
+    assert is_slashable_attestation_data(slashing_db, build_attestation_data(1, 6), pubkey)
+    assert (slashing_db_data.min_source_epoch, slashing_db_data.min_target_epoch) == (2, 4)
+    # Attestations appended directly to signed_attestations are folded into the watermarks
+    slashing_db_data.signed_attestations.append(SlashingDBAttestation(source_epoch=1, target_epoch=2,
+                                                                      signing_root=Root()))
+    assert is_slashable_attestation_data(slashing_db, build_attestation_data(1, 2), pubkey)
+    assert (slashing_db_data.min_source_epoch, slashing_db_data.min_target_epoch) == (1, 2)
+
+
+def test_slashable_attestation_data_matches_eth2spec() -> None:
+    rng = random.Random(3076)
+    for _ in range(20):
+        pubkey = BLSPubkey(str(0).zfill(48*2))
+        slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+        slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+        history = []
+        for _ in range(rng.randrange(1, 12)):
+            source_epoch = rng.randrange(20)
+            attestation_data = build_attestation_data(source_epoch, source_epoch + rng.randrange(1, 8))
+            attestation_data.beacon_block_root = Root(bytes([rng.randrange(2)]) * 32)
+            history.append(attestation_data)
+            slashing_db_data.signed_attestations.append(SlashingDBAttestation(
+                source_epoch=attestation_data.source.epoch, target_epoch=attestation_data.target.epoch,
+                signing_root=attestation_data.hash_tree_root()))
+        for _ in range(30):
+            source_epoch = rng.randrange(22)
+            attestation_data = build_attestation_data(source_epoch, source_epoch + rng.randrange(1, 8))
+            attestation_data.beacon_block_root = Root(bytes([rng.randrange(2)]) * 32)
+            expected = \
+                attestation_data.target.epoch <= min(past.target.epoch for past in history) or \
+                attestation_data.source.epoch < min(past.source.epoch for past in history) or \
+                any(eth2spec.is_slashable_attestation_data(past, attestation_data) or
+                    eth2spec.is_slashable_attestation_data(attestation_data, past) for past in history)
+            assert is_slashable_attestation_data(slashing_db, attestation_data, pubkey) == expected
+
+
+def test_slashable_block() -> None:
+    pubkey = BLSPubkey(str(0).zfill(48*2))
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+    for slot in [5, 10, 20]:
+        update_block_slashing_db(slashing_db, BeaconBlock(slot=slot), pubkey)
+    assert get_slashing_db_data_for_pubkey(slashing_db, pubkey).min_block_slot == 5
+    assert is_slashable_block(slashing_db, BeaconBlock(slot=4), pubkey)
+    assert not is_slashable_block(slashing_db, BeaconBlock(slot=10), pubkey)
+    assert is_slashable_block(slashing_db, BeaconBlock(slot=10, proposer_index=1), pubkey)
+    assert not is_slashable_block(slashing_db, BeaconBlock(slot=15, proposer_index=1), pubkey)
+
+
+def test_compact_slashing_db() -> None:
+    pubkey = BLSPubkey(str(0).zfill(48*2))
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[],
+                             retention_epochs=4)
+    for epoch in range(1, 11):
+        update_attestation_slashing_db(slashing_db, build_attestation_data(epoch - 1, epoch), pubkey)
+        update_block_slashing_db(slashing_db, BeaconBlock(slot=epoch * eth2spec.SLOTS_PER_EPOCH), pubkey)
+    compact_slashing_db(slashing_db, 10)
+    slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+    assert [attn.target_epoch for attn in slashing_db_data.signed_attestations] == [6, 7, 8, 9, 10]
+    assert [block.slot // eth2spec.SLOTS_PER_EPOCH for block in slashing_db_data.signed_blocks] == [6, 7, 8, 9, 10]
+    assert (slashing_db_data.min_source_epoch, slashing_db_data.min_target_epoch) == (4, 5)
+    # Conflicts with pruned history are still refused
+    assert is_slashable_attestation_data(slashing_db, build_attestation_data(3, 12), pubkey)
+    assert is_slashable_block(slashing_db, BeaconBlock(slot=5 * eth2spec.SLOTS_PER_EPOCH), pubkey)
+    # Conflicts with retained history are detected exactly
+    assert is_slashable_attestation_data(slashing_db, build_attestation_data(5, 12), pubkey)
+    assert is_slashable_attestation_data(slashing_db, build_attestation_data(9, 9), pubkey)
+    assert not is_slashable_attestation_data(slashing_db, build_attestation_data(10, 11), pubkey)
+    assert not is_slashable_block(slashing_db, BeaconBlock(slot=6 * eth2spec.SLOTS_PER_EPOCH), pubkey)
+
+
+def test_slashing_db_store(tmp_path: Path) -> None:
+    path = str(tmp_path / "slashing_db.sqlite")
+    pubkeys = [BLSPubkey(str(i).zfill(48*2)) for i in range(4)]
+    store = open_slashing_db_store(path)
+    slashing_db = load_slashing_db(store, 5, Root())
+    slashing_db.retention_epochs = 4
+    for epoch in range(1, 11):
+        for pubkey in pubkeys:
+            update_attestation_slashing_db(slashing_db, build_attestation_data(epoch - 1, epoch), pubkey)
+    update_block_slashing_db(slashing_db, BeaconBlock(slot=100), pubkeys[0])
+    # All writes staged so far are made durable by a single commit
+    commit_slashing_db(slashing_db)
+    assert store.num_commits == 1
+    compact_slashing_db(slashing_db, 10)
+    # Concurrent commits share the pending writes
+    threads = [threading.Thread(target=commit_slashing_db, args=(slashing_db,)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert 2 <= store.num_commits <= 9 and store.pending_writes == []
+    # Writes that were staged but not committed are lost
+    update_attestation_slashing_db(slashing_db, build_attestation_data(10, 11), pubkeys[1])
+    close_slashing_db_store(store)
+
+    store = open_slashing_db_store(path)
+    reloaded_slashing_db = load_slashing_db(store, 5, Root())
+    for pubkey in pubkeys:
+        slashing_db_data = get_slashing_db_data_for_pubkey(reloaded_slashing_db, pubkey)
+        assert [attn.target_epoch for attn in slashing_db_data.signed_attestations] == [6, 7, 8, 9, 10]
+        # Watermarks are restored no lower than the minima of the retained history
+        assert (slashing_db_data.min_source_epoch, slashing_db_data.min_target_epoch) == (5, 6)
+        assert is_slashable_attestation_data(reloaded_slashing_db, build_attestation_data(3, 12), pubkey)
+        assert not is_slashable_attestation_data(reloaded_slashing_db, build_attestation_data(10, 11), pubkey)
+    assert is_slashable_block(reloaded_slashing_db, BeaconBlock(slot=100, proposer_index=1), pubkeys[0])
+    close_slashing_db_store(store)
+
+
+def test_slashing_db_interchange() -> None:
+    pubkeys = [BLSPubkey(str(i).zfill(48*2)) for i in range(3)]
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[],
+                             retention_epochs=4)
+    for epoch in range(1, 11):
+        for pubkey in pubkeys:
+            update_attestation_slashing_db(slashing_db, build_attestation_data(epoch - 1, epoch), pubkey)
+    update_block_slashing_db(slashing_db, BeaconBlock(slot=3), pubkeys[0])
+    compact_slashing_db(slashing_db, 10)
+    file = io.StringIO()
+    stats = export_slashing_db_interchange(slashing_db, file)
+    assert (stats.num_validators, stats.num_records) == (3, 19)
+    interchange = json.loads(file.getvalue())
+    assert interchange["data"][0]["signed_blocks"] == [{"slot": "3"}]
+
+    # Merge into a slashing DB with overlapping history, reading a few bytes at a time
+    imported_slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+    update_attestation_slashing_db(imported_slashing_db, build_attestation_data(9, 10), pubkeys[1])
+    file.seek(0)
+    stats = import_slashing_db_interchange(imported_slashing_db, file, chunk_size=7)
+    assert (stats.num_validators, stats.num_records) == (3, 19)
+    for pubkey in pubkeys:
+        slashing_db_data = get_slashing_db_data_for_pubkey(imported_slashing_db, pubkey)
+        assert len(slashing_db_data.signed_attestations) == 6
+        assert (slashing_db_data.min_source_epoch, slashing_db_data.min_target_epoch) == (4, 5)
+        for source_epoch, target_epoch in [(3, 12), (5, 12), (9, 9), (10, 11)]:
+            attestation_data = build_attestation_data(source_epoch, target_epoch)
+            assert is_slashable_attestation_data(imported_slashing_db, attestation_data, pubkey) == \
+                is_slashable_attestation_data(slashing_db, attestation_data, pubkey)
+    assert is_slashable_block(imported_slashing_db, BeaconBlock(slot=3), pubkeys[0])
+
+
+def test_slashing_db_interchange_into_newer_history() -> None:
+    pubkey = BLSPubkey(str(0).zfill(48*2))
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+    update_attestation_slashing_db(slashing_db, build_attestation_data(2999, 3000), pubkey)
+    # Older history, listing some records twice, merged behind the newer record
+    signed_attestations = [{"source_epoch": str(epoch - 1), "target_epoch": str(epoch),
+                            "signing_root": "0x" + epoch.to_bytes(32, "little").hex()}
+                           for epoch in list(range(1, 2001)) + list(range(1, 11))]
+    interchange = {
+        "metadata": {"interchange_format_version": "5", "genesis_validators_root": "0x" + "00" * 32},
+        "data": [{"pubkey": "0x" + bytes(pubkey).hex(), "signed_blocks": [],
+                  "signed_attestations": signed_attestations}],
+    }
+    stats = import_slashing_db_interchange(slashing_db, io.StringIO(json.dumps(interchange)))
+    assert stats.num_records == 2010
+    slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+    assert len(slashing_db_data.signed_attestations) == 2001
+    assert (slashing_db_data.min_source_epoch, slashing_db_data.min_target_epoch) == (0, 1)
+    assert slashing_db_data.attestation_index == build_attestation_index(slashing_db_data.signed_attestations)
+    for source_epoch, target_epoch, slashable in [(1499, 1500, True), (2000, 3001, True), (10, 3005, True),
+                                                  (2000, 2500, False), (3000, 3001, False)]:
+        assert is_slashable_attestation_data(slashing_db, build_attestation_data(source_epoch, target_epoch),
+                                             pubkey) == slashable
+
+
+def test_are_slashable_attestation_data_matches_scalar() -> None:
+    rng = random.Random(8)
+    pubkeys = [BLSPubkey(str(i).zfill(48*2)) for i in range(16)]
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+    for pubkey in pubkeys:
+        for target_epoch in sorted(rng.sample(range(1, 30), 5)):
+            slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, pubkey)
+            slashing_db_data.signed_attestations.append(SlashingDBAttestation(
+                source_epoch=max(target_epoch - rng.randrange(1, 4), 0), target_epoch=target_epoch,
+                signing_root=Root()))
+    # Candidates of the same slot share their AttestationData, or hold equal copies of it
+    shared_attestation_data = [build_attestation_data(source_epoch, source_epoch + rng.randrange(1, 6))
+                               for source_epoch in range(0, 30, 3)]
+    candidates = [(rng.choice(pubkeys), rng.choice(shared_attestation_data)) for _ in range(500)]
+    candidates += [(pubkey, attestation_data.copy()) for pubkey, attestation_data in candidates[:100]]
+    assert are_slashable_attestation_data(slashing_db, candidates) == [
+        is_slashable_attestation_data(slashing_db, attestation_data, pubkey) for pubkey, attestation_data in candidates]
+
+
+def test_serve_slot_duties() -> None:
+    state = build_state(5)
+    validator_indices = get_validator_indices(state)
+    attestation_duties = fill_attestation_duties_with_val_index(
+        state, bn_get_attestation_duties_for_epoch(validator_indices, compute_epoch_at_time(get_current_time()) + 1))
+    for attestation_duty in attestation_duties:
+        attestation_duty.slot = attestation_duties[0].slot
+    misses = ATTESTATION_DATA_CACHE.misses
+    with ThreadPoolExecutor(max_workers=len(attestation_duties)) as executor:
+        serve_slot_duties(state, attestation_duties, [], executor)
+    # The attestation data of the slot is fetched & decided once for all validators
+    assert ATTESTATION_DATA_CACHE.misses == misses + 1
+    for attestation_duty in attestation_duties:
+        slashing_db = get_distributed_validator_by_index(state, attestation_duty.validator_index).slashing_db
+        slashing_db_data = get_slashing_db_data_for_pubkey(slashing_db, attestation_duty.pubkey)
+        attestation_data = bn_produce_attestation_data(attestation_duty.slot, attestation_duty.committee_index)
+        assert list(slashing_db_data.signed_attestations) == [SlashingDBAttestation(
+            source_epoch=attestation_data.source.epoch, target_epoch=attestation_data.target.epoch,
+            signing_root=attestation_data.hash_tree_root())]
+
+
+def test_serve_slot_duties_drops_refused_duties() -> None:
+    state = build_state(3)
+    validator_indices = get_validator_indices(state)
+    attestation_duties = fill_attestation_duties_with_val_index(
+        state, bn_get_attestation_duties_for_epoch(validator_indices, compute_epoch_at_time(get_current_time()) + 1))
+    for attestation_duty in attestation_duties:
+        attestation_duty.slot = attestation_duties[0].slot
+    # The first validator already signed conflicting attestation data for the target epoch
+    refused_duty = attestation_duties[0]
+    refused_slashing_db = get_distributed_validator_by_index(state, refused_duty.validator_index).slashing_db
+    conflicting_data = bn_produce_attestation_data(refused_duty.slot, refused_duty.committee_index).copy()
+    conflicting_data.beacon_block_root = Root(bytes([1]) * 32)
+    update_attestation_slashing_db(refused_slashing_db, conflicting_data, refused_duty.pubkey)
+    slot_attestation_duties = [(get_distributed_validator_by_index(state, duty.validator_index).slashing_db, duty)
+                               for duty in attestation_duties]
+    attestation_data = bn_produce_attestation_data(refused_duty.slot, refused_duty.committee_index)
+    assert consensus_is_valid_slot_attestation_data(slot_attestation_duties, attestation_data)
+    assert [duty for _, duty in get_valid_slot_attestation_duties(slot_attestation_duties, attestation_data)] == \
+        attestation_duties[1:]
+    # The other validators still attest
+    with ThreadPoolExecutor(max_workers=len(attestation_duties)) as executor:
+        serve_slot_duties(state, attestation_duties, [], executor)
+    for slashing_db, attestation_duty in slot_attestation_duties:
+        signed_attestations = get_slashing_db_data_for_pubkey(slashing_db, attestation_duty.pubkey).signed_attestations
+        assert [attestation.signing_root for attestation in signed_attestations] == [
+            conflicting_data.hash_tree_root() if attestation_duty is refused_duty else
+            bn_produce_attestation_data(attestation_duty.slot, attestation_duty.committee_index).hash_tree_root()]
+
+
+def test_attestation_data_cache() -> None:
+    cache = AttestationDataCache()
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        futures = [executor.submit(get_attestation_data, 100, 1, cache) for _ in range(8)]
+        attestation_data = [future.result() for future in futures]
+    assert all(data is attestation_data[0] for data in attestation_data)
+    assert (cache.hits, cache.misses) == (7, 1)
+    assert get_attestation_data(100, 2, cache).index == 2
+    # Attestation data of past slots is evicted
+    get_attestation_data(100 + ATTESTATION_DATA_CACHE_SLOTS, 1, cache)
+    assert sorted(cache.attestation_data) == [(100, 1), (100, 2), (100 + ATTESTATION_DATA_CACHE_SLOTS, 1)]
+    get_attestation_data(101 + ATTESTATION_DATA_CACHE_SLOTS, 1, cache)
+    assert sorted(cache.attestation_data) == [(100 + ATTESTATION_DATA_CACHE_SLOTS, 1),
+                                              (101 + ATTESTATION_DATA_CACHE_SLOTS, 1)]
+
+
+def test_concurrent_attestation_duties_are_never_slashable() -> None:
+    rng = random.Random(10)
+    rng_lock = threading.Lock()
+    # The validators share one slashing DB, so that only its per-validator locks keep their duties apart
+    state = build_state(4)
+    pubkeys = [dv.validator_identity.pubkey for dv in state.distributed_validators]
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+    for distributed_validator in state.distributed_validators:
+        distributed_validator.slashing_db = slashing_db
+    decided_attestation_data = []
+
+    def racy_consensus_on_attestation(slashing_db: SlashingDB, attestation_duty: AttestationDuty) -> AttestationData:
+        # Decide conflicting values for the same validator & yield between the validity check & the update
+        with rng_lock:
+            source_epoch = rng.randrange(8)
+            attestation_data = build_attestation_data(source_epoch, source_epoch + rng.randrange(1, 4))
+        attestation_data.slot = attestation_duty.slot
+        attestation_data.index = attestation_duty.committee_index
+        if consensus_is_valid_attestation_data(slashing_db, attestation_data, attestation_duty):
+            time.sleep(0.001)
+        decided_attestation_data.append(attestation_data)
+        return attestation_data
+
+    attestation_duties = [AttestationDuty(pubkey=pubkey, validator_index=i, committee_index=0, committee_length=1,
+                                          committees_at_slot=1, validator_committee_index=0, slot=0)
+                          for i, pubkey in enumerate(pubkeys) for _ in range(50)]
+    replace_method_in_dvspec("consensus_on_attestation", racy_consensus_on_attestation)
+    try:
+        with ThreadPoolExecutor(max_workers=16) as executor:
+            futures = [executor.submit(serve_attestation_duty, state, attestation_duty)
+                       for attestation_duty in attestation_duties]
+            num_served = sum(future.exception() is None for future in futures)
+    finally:
+        replace_method_in_dvspec("consensus_on_attestation", consensus_on_attestation)
+    # Every served duty was recorded before signing, & no two recorded attestations are slashable
+    assert len(decided_attestation_data) == len(attestation_duties)
+    assert sum(len(get_slashing_db_data_for_pubkey(slashing_db, pubkey).signed_attestations)
+               for pubkey in pubkeys) == num_served > len(pubkeys)
+    for pubkey in pubkeys:
+        signed_attestations = list(get_slashing_db_data_for_pubkey(slashing_db, pubkey).signed_attestations)
+        for i, attn in enumerate(signed_attestations):
+            for past in signed_attestations[:i]:
+                # Signing the same attestation data again is not slashable
+                assert past.target_epoch != attn.target_epoch or past.signing_root == attn.signing_root
+                assert not (past.source_epoch < attn.source_epoch and attn.target_epoch < past.target_epoch)
+                assert not (attn.source_epoch < past.source_epoch and past.target_epoch < attn.target_epoch)
+
+
+def test_signing_domain_cache() -> None:
+    cache = SigningDomainCache()
+    for epoch in [1, 1, 2, 1]:
+        domain = dvc_compute_domain(eth2spec.DOMAIN_BEACON_ATTESTER, epoch, cache)
+        assert domain == eth2spec.compute_domain(eth2spec.DOMAIN_BEACON_ATTESTER, bn_get_fork_version(epoch),
+                                                 bn_get_genesis_validators_root())
+    assert (cache.hits, cache.misses) == (2, 2)
+    # A fork schedule refresh that changes the fork version of an epoch changes its domain
+    fork_version = eth2spec.Version('0x02000000')
+    with mock.patch("dvspec.utils.helpers.signing.get_fork_version", return_value=fork_version):
+        assert dvc_compute_domain(eth2spec.DOMAIN_BEACON_ATTESTER, 1, cache) == eth2spec.compute_domain(
+            eth2spec.DOMAIN_BEACON_ATTESTER, fork_version, bn_get_genesis_validators_root())
+    assert (cache.hits, cache.misses) == (2, 3)
+    # Signing roots share the module-level cache
+    attestation_data = build_attestation_data(0, 1)
+    compute_attestation_signing_root(attestation_data)
+    hits = DOMAIN_CACHE.hits
+    assert compute_attestation_signing_root(attestation_data) == eth2spec.compute_signing_root(
+        attestation_data, dvc_compute_domain(eth2spec.DOMAIN_BEACON_ATTESTER, 1, cache))
+    assert DOMAIN_CACHE.hits == hits + 1
+
+
+def test_fork_schedule() -> None:
+    fork_schedule = ForkSchedule()
+    set_fork_schedule([eth2spec.Fork(current_version=eth2spec.Version('0x01000000'), epoch=10),
+                       eth2spec.Fork(current_version=eth2spec.Version('0x00000000'), epoch=0)], fork_schedule)
+    fork_slot = eth2spec.compute_start_slot_at_epoch(10)
+    assert get_fork_version(fork_slot - 1, fork_schedule) == eth2spec.Version('0x00000000')
+    assert get_fork_version(fork_slot, fork_schedule) == eth2spec.Version('0x01000000')
+    assert fork_schedule.num_loads == 0
+    # Loaded from the BN on first use, then refreshed in the background
+    fork_schedule = ForkSchedule()
+    assert get_fork_version(0, fork_schedule) == bn_get_fork_version(0)
+    thread = start_fork_schedule_refresh(fork_schedule, interval_seconds=0.001)
+    deadline = time.monotonic() + 5
+    while fork_schedule.num_loads < 4 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    stop_fork_schedule_refresh(fork_schedule)
+    thread.join()
+    assert fork_schedule.num_loads >= 4 and fork_schedule.num_load_failures == 0
+
+
+def test_signing_context_hashes_once() -> None:
+    pubkey = BLSPubkey(str(0).zfill(48*2))
+    slashing_db = SlashingDB(interchange_format_version=5, genesis_validators_root=Root(), data=[])
+    block = BeaconBlock(slot=10)
+    update_block_slashing_db(slashing_db, block.copy(), pubkey)
+    with mock.patch.object(BeaconBlock, "hash_tree_root", autospec=True,
+                           side_effect=BeaconBlock.hash_tree_root) as hash_tree_root:
+        # Check, record & sign a block that was already signed in the same slot
+        context = SigningContext(block)
+        assert not is_slashable_block(slashing_db, block, pubkey, context)
+        update_block_slashing_db(slashing_db, block, pubkey, context)
+        signing_root = compute_block_signing_root(block, context)
+        assert hash_tree_root.call_count == 1
+    assert signing_root == eth2spec.compute_signing_root(
+        block, dvc_compute_domain(eth2spec.DOMAIN_BEACON_PROPOSER, 0))
+
+
+def test_remote_signer() -> None:
+    server, url = start_stub_remote_signer(delay_seconds=0.01)
+    remote_signer = open_remote_signer(url, max_connections=4)
+    try:
+        pubkey = BLSPubkey(str(0).zfill(48*2))
+        requests = []
+        for slot in range(64):
+            attestation_data = AttestationData(slot=slot)
+            signing_root = compute_attestation_signing_root(attestation_data)
+            requests.append(build_attestation_sign_request(pubkey, attestation_data, signing_root,
+                                                           get_fork(slot), Root()))
+        signatures = rs_sign_bulk(remote_signer, requests)
+        assert signatures == [stub_sign(bytes.fromhex(request.body["signingRoot"][2:])) for request in requests]
+        # Concurrency is bounded by the connection pool, & connections are kept alive
+        assert remote_signer.num_connections_opened == server.num_connections <= 4
+        assert rs_sign(remote_signer, requests[0]) == signatures[0]
+        assert server.num_connections <= 4
+    finally:
+        close_remote_signer(remote_signer)
+    # Requests time out, & a pooled connection that failed is closed rather than reused
+    remote_signer = open_remote_signer(url, timeout_seconds=0.05, max_connections=1)
+    try:
+        rs_sign(remote_signer, requests[0])
+        connection = remote_signer.connections.queue[0]
+        server.delay_seconds = 0.2
+        rs_sign(remote_signer, requests[0])
+        assert False
+    except socket.timeout:
+        assert remote_signer.connections.empty() and connection.sock is None
+    finally:
+        close_remote_signer(remote_signer)
+        server.shutdown()
+
+
+def test_serve_slot_duties_with_remote_signer() -> None:
+    server, url = start_stub_remote_signer()
+    remote_signer = open_remote_signer(url, max_connections=4)
+    signed_attestation_data: List[List[AttestationData]] = []
+
+    def remote_signer_sign_attestations(attestations: List[Tuple[BLSPubkey, AttestationData, Root]],
+                                        fork_version: eth2spec.Version) -> List[BLSSignature]:
+        signed_attestation_data.append([attestation_data for _, attestation_data, _ in attestations])
+        return rs_sign_bulk(remote_signer, [
+            build_attestation_sign_request(pubkey, attestation_data, signing_root,
+                                           get_fork(attestation_data.slot), Root())
+            for pubkey, attestation_data, signing_root in attestations
+        ])
+
+    state = build_state(8)
+    attestation_duties = fill_attestation_duties_with_val_index(
+        state, bn_get_attestation_duties_for_epoch(get_validator_indices(state), 3))
+    for attestation_duty in attestation_duties:
+        attestation_duty.slot = attestation_duties[0].slot
+    replace_method_in_dvspec("rs_sign_attestations", remote_signer_sign_attestations)
+    try:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            serve_slot_duties(state, attestation_duties, [], executor)
+    finally:
+        replace_method_in_dvspec("rs_sign_attestations", rs_sign_attestations)
+        close_remote_signer(remote_signer)
+        server.shutdown()
+    # All duties of the slot are signed with a single bulk call
+    assert len(signed_attestation_data) == 1
+    assert [data.index for data in signed_attestation_data[0]] == [duty.committee_index for duty in attestation_duties]
+
+
+def test_serve_duties_on_one_event_loop() -> None:
+    state = build_state(16)
+    attestation_duties = fill_attestation_duties_with_val_index(
+        state, bn_get_attestation_duties_for_epoch(get_validator_indices(state), 5))
+    proposer_duty = filter_and_fill_proposer_duties_with_val_index(state, bn_get_proposer_duties_for_epoch(5))[0]
+    sign_delay_seconds = 0.1
+
+    async def slow_rs_sign_attestation_async(attestation_data: AttestationData, fork_version: eth2spec.Version,
+                                             signing_root: Root) -> BLSSignature:
+        await asyncio.sleep(sign_delay_seconds)
+        return rs_sign_attestation(attestation_data, fork_version, signing_root)
+
+    async def serve_duties() -> None:
+        await asyncio.gather(
+            serve_proposer_duty_async(state, proposer_duty),
+            *(serve_attestation_duty_async(state, attestation_duty) for attestation_duty in attestation_duties))
+
+    replace_method_in_dvspec("rs_sign_attestation_async", slow_rs_sign_attestation_async)
+    try:
+        start_time = time.perf_counter()
+        asyncio.run(serve_duties())
+        seconds = time.perf_counter() - start_time
+    finally:
+        replace_method_in_dvspec("rs_sign_attestation_async", rs_sign_attestation_async)
+    # The RS requests of the duties overlap
+    assert seconds < len(attestation_duties) * sign_delay_seconds / 2
+    for attestation_duty in attestation_duties:
+        slashing_db = get_distributed_validator_by_index(state, attestation_duty.validator_index).slashing_db
+        assert len(get_slashing_db_data_for_pubkey(slashing_db, attestation_duty.pubkey).signed_attestations) == 1
+
+
+def test_run_async_reuses_thread_event_loop() -> None:
+    async def get_loop() -> asyncio.AbstractEventLoop:
+        return asyncio.get_running_loop()
+
+    async def leave_task_running() -> 'asyncio.Task[None]':
+        return asyncio.ensure_future(asyncio.sleep(10))
+
+    loop = run_async(get_loop())
+    assert run_async(get_loop()) is loop
+    # Tasks left running are cancelled on return, as with asyncio.run
+    task = run_async(leave_task_running())
+    assert task.cancelled()
+    # Each thread has its own loop
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        assert executor.submit(run_async, get_loop()).result() is not loop
+
+
+def test_commit_slashing_db_before_signing() -> None:
+    calls = []
+
+    def recording_commit_slashing_db(slashing_db: SlashingDB) -> None:
+        calls.append("commit")
+        commit_slashing_db(slashing_db)
+
+    def recording_rs_sign_attestation(attestation_data: AttestationData, fork_version: eth2spec.Version,
+                                      signing_root: Root) -> BLSSignature:
+        calls.append("sign")
+        return rs_sign_attestation(attestation_data, fork_version, signing_root)
+
+    state = build_state(1)
+    attestation_duty = fill_attestation_duties_with_val_index(
+        state, bn_get_attestation_duties_for_epoch(get_validator_indices(state), 7))[0]
+    replace_method_in_dvspec("commit_slashing_db", recording_commit_slashing_db)
+    replace_method_in_dvspec("rs_sign_attestation", recording_rs_sign_attestation)
+    try:
+        serve_attestation_duty(state, attestation_duty)
+    finally:
+        replace_method_in_dvspec("commit_slashing_db", commit_slashing_db)
+        replace_method_in_dvspec("rs_sign_attestation", rs_sign_attestation)
+    assert calls == ["commit", "sign"]
+
+
+def test_timing_wheel() -> None:
+    wheel = create_timing_wheel(8)
+    attestation_duty = AttestationDuty(pubkey=BLSPubkey(), validator_index=0, committee_index=0, committee_length=1,
+                                       committees_at_slot=1, validator_committee_index=0, slot=1)
+    proposer_duty = ProposerDuty(pubkey=BLSPubkey(), validator_index=0, slot=1)
+    schedule_duty(wheel, 3, ATTESTATION_DUTY_PRIORITY, attestation_duty)
+    schedule_duty(wheel, 3, PROPOSER_DUTY_PRIORITY, proposer_duty)
+    schedule_duty(wheel, 7, ATTESTATION_DUTY_PRIORITY, attestation_duty)
+    assert advance_timing_wheel(wheel, 2) == []
+    # Proposer duties are dispatched first
+    assert [scheduled.duty for scheduled in advance_timing_wheel(wheel, 3)] == [proposer_duty, attestation_duty]
+    # Ticks that were skipped are caught up with, & a bucket is reused on the next revolution
+    schedule_duty(wheel, 11, ATTESTATION_DUTY_PRIORITY, attestation_duty)
+    assert [scheduled.tick for scheduled in advance_timing_wheel(wheel, 10)] == [7]
+    assert [scheduled.tick for scheduled in advance_timing_wheel(wheel, 11)] == [11]
+
+
+def test_duty_scheduler() -> None:
+    state = build_state(256)
+    for distributed_validator in state.distributed_validators:
+        distributed_validator.slashing_db.retention_epochs = 1
+    num_epochs = 4
+    # The test BN only produces attestation data from epoch 1 on
+    start_epoch = 1
+    clock = build_simulated_clock(start_epoch * int(eth2spec.SLOTS_PER_EPOCH) * int(eth2spec.config.SECONDS_PER_SLOT))
+    served_duties: List[Tuple[float, object]] = []
+    decided_slots: List[int] = []
+    signed_slots: List[int] = []
+    served_duties_lock = threading.Lock()
+
+    def serve_duty(state: State, duty: object) -> None:
+        with served_duties_lock:
+            served_duties.append((clock.get_time(), duty))
+
+    def recording_consensus_on_slot_attestation(
+            attestation_duties: List[Tuple[SlashingDB, AttestationDuty]]) -> AttestationData:
+        with served_duties_lock:
+            decided_slots.append(int(attestation_duties[0][1].slot))
+            served_duties.extend((clock.get_time(), duty) for _, duty in attestation_duties)
+        return consensus_on_slot_attestation(attestation_duties)
+
+    def recording_rs_sign_attestations(attestations: List[Tuple[BLSPubkey, AttestationData, Root]],
+                                       fork_version: eth2spec.Version) -> List[BLSSignature]:
+        with served_duties_lock:
+            signed_slots.append(int(attestations[0][1].slot))
+        return rs_sign_attestations(attestations, fork_version)
+
+    replace_method_in_dvspec("serve_proposer_duty", serve_duty)
+    replace_method_in_dvspec("consensus_on_slot_attestation", recording_consensus_on_slot_attestation)
+    replace_method_in_dvspec("rs_sign_attestations", recording_rs_sign_attestations)
+    try:
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=4) as executor, ThreadPoolExecutor(max_workers=1) as compaction_executor:
+            scheduler = create_duty_scheduler(0, executor, clock, compaction_executor)
+            run_duty_scheduler(scheduler, state, (start_epoch + num_epochs) * eth2spec.SLOTS_PER_EPOCH)
+        seconds = time.perf_counter() - start_time
+    finally:
+        replace_method_in_dvspec("serve_proposer_duty", serve_proposer_duty)
+        replace_method_in_dvspec("consensus_on_slot_attestation", consensus_on_slot_attestation)
+        replace_method_in_dvspec("rs_sign_attestations", rs_sign_attestations)
+    # Simulated epochs run much faster than real ones
+    assert seconds < num_epochs * int(eth2spec.SLOTS_PER_EPOCH) * int(eth2spec.config.SECONDS_PER_SLOT) / 100
+    assert (scheduler.num_dispatched, scheduler.num_failed) == (len(served_duties), 0)
+    attestation_slots = [int(duty.slot) for _, duty in served_duties if isinstance(duty, AttestationDuty)]
+    assert len(attestation_slots) == num_epochs * len(state.distributed_validators)
+    # The attestation duties of a slot are decided with one consensus instance & signed with one RS call
+    assert sorted(decided_slots) == sorted(signed_slots) == sorted(set(attestation_slots))
+    # Proposer duties fire at the start of their slot & attestation duties 1/3rd way through it
+    for served_time, duty in served_duties:
+        assert isinstance(duty, (AttestationDuty, ProposerDuty))
+        offset = 0 if isinstance(duty, ProposerDuty) else eth2spec.config.SECONDS_PER_SLOT // 3
+        assert served_time >= duty.slot * eth2spec.config.SECONDS_PER_SLOT + offset
+    # The slashing DBs are compacted once per epoch by the scheduler, rather than by the duties
+    assert scheduler.compaction_epoch == start_epoch + num_epochs - 1
+    assert all(distributed_validator.slashing_db.last_compaction_epoch == scheduler.compaction_epoch
+               for distributed_validator in state.distributed_validators)
+
+
+def test_attestation_duties_cache() -> None:
+    cache = AttestationDutiesCache()
+    dependent_root = Root(bytes(32))
+    requested_chunks: List[List[int]] = []
+    requested_chunks_lock = threading.Lock()
+
+    def get_attestation_duties_chunk(validator_indices: List[int],
+                                     epoch: int) -> Tuple[Root, List[AttestationDuty]]:
+        with requested_chunks_lock:
+            requested_chunks.append(list(validator_indices))
+        # Validators with an odd index have no duty
+        return dependent_root, [duty for duty in bn_get_attestation_duties_for_epoch(validator_indices, epoch)
+                                if duty.validator_index % 2 == 0]
+
+    validator_indices = list(range(2500))
+    replace_method_in_dvspec("bn_get_attestation_duties_and_dependent_root_for_epoch", get_attestation_duties_chunk)
+    try:
+        duties = get_attestation_duties(validator_indices, 3, cache)
+        assert sorted(len(chunk) for chunk in requested_chunks) == [452, 1024, 1024]
+        assert [duty.validator_index for duty in duties] == validator_indices[::2]
+        # A reorg-free epoch is fetched once, & only new validators are fetched
+        assert get_attestation_duties(validator_indices[:100], 3, cache) == duties[:50]
+        get_attestation_duties(validator_indices + [2500, 2501], 3, cache)
+        assert requested_chunks[3:] == [[2500, 2501]] and (cache.hits, cache.misses) == (1, 2)
+        # The duties are fetched again once the dependent root changes
+        assert not invalidate_attestation_duties(3, dependent_root, cache)
+        dependent_root = Root(bytes([1]) * 32)
+        assert invalidate_attestation_duties(3, dependent_root, cache)
+        get_attestation_duties(validator_indices, 3, cache)
+        assert len(requested_chunks) == 7
+    finally:
+        replace_method_in_dvspec("bn_get_attestation_duties_and_dependent_root_for_epoch",
+                                 bn_get_attestation_duties_and_dependent_root_for_epoch)
+
+
+def test_route_duties() -> None:
+    state = build_state(4)
+    add_distributed_validator(state, build_distributed_validator(
+        ValidatorIdentity(pubkey=BLSPubkey(bytes([7]) * 48), index=100)))
+    assert get_distributed_validator_for_pubkey(state, BLSPubkey(bytes([7]) * 48)) is state.distributed_validators[4]
+    proposer_duties = [ProposerDuty(pubkey=BLSPubkey(), validator_index=validator_index, slot=validator_index)
+                       for validator_index in [100, 5, 2]]
+    routed_duties = route_duties(state, proposer_duties)
+    # Duties of other validators are dropped, & the pubkeys are filled without modifying the duties
+    assert [(dv.validator_identity.index, duty.slot) for dv, duty in routed_duties] == [(100, 100), (2, 2)]
+    assert [duty.pubkey for _, duty in routed_duties] == [BLSPubkey(bytes([7]) * 48),
+                                                          state.distributed_validators[2].validator_identity.pubkey]
+    assert all(duty.pubkey == BLSPubkey() for duty in proposer_duties)
+
+
+def test_presign_randao_reveals() -> None:
+    state = build_state(4)
+    proposer_duties = filter_and_fill_proposer_duties_with_val_index(state, bn_get_proposer_duties_for_epoch(7))
+    signed_epochs = []
+
+    def counting_rs_sign_randao_reveal(epoch: int, fork_version: eth2spec.Version,
+                                       signing_root: Root) -> BLSSignature:
+        signed_epochs.append(epoch)
+        return rs_sign_randao_reveal(epoch, fork_version, signing_root)
+
+    replace_method_in_dvspec("rs_sign_randao_reveal", counting_rs_sign_randao_reveal)
+    try:
+        misses = RANDAO_REVEAL_CACHE.misses
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = presign_randao_reveals(proposer_duties + proposer_duties, executor)
+            assert all(future.exception() is None for future in futures)
+        # The shares are exchanged per validator & epoch
+        assert {key for key in TEST_CACHE_RANDAO if key[1] == 7} == {
+            (bytes(proposer_duty.pubkey), 7) for proposer_duty in proposer_duties}
+        # Each randao reveal is signed once, even when pre-signed concurrently
+        assert signed_epochs == [7] * len(proposer_duties) == [7] * 4
+        assert RANDAO_REVEAL_CACHE.misses == misses + len(proposer_duties)
+        # Proposer duties start consensus with the pre-signed randao reveals
+        for proposer_duty in proposer_duties:
+            serve_proposer_duty(state, proposer_duty)
+        assert len(signed_epochs) == len(proposer_duties)
+    finally:
+        replace_method_in_dvspec("rs_sign_randao_reveal", rs_sign_randao_reveal)
+
+
+def test_randao_reveal_signing_cancelled_with_duty() -> None:
+    state = build_state(1)
+    epoch = 11
+    _, proposer_duty = route_duties(state, [ProposerDuty(pubkey=BLSPubkey(), validator_index=0,
+                                                         slot=eth2spec.compute_start_slot_at_epoch(epoch))])[0]
+    key = (bytes(proposer_duty.pubkey), epoch)
+    waited_signings = []
+
+    async def stalled_sign_randao_reveal_async(proposer_duty: ProposerDuty) -> BLSSignature:
+        waited_signings.append(RANDAO_REVEAL_CACHE.randao_reveals[key])
+        await asyncio.sleep(10)
+        return BLSSignature()
+
+    def failing_get_fork_version(slot: Slot) -> eth2spec.Version:
+        raise ValueError("Fork schedule unavailable")
+
+    # The fork version lookup of the duty fails while its randao reveal is being signed
+    replace_method_in_dvspec("sign_randao_reveal_async", stalled_sign_randao_reveal_async)
+    replace_method_in_dvspec("get_fork_version", failing_get_fork_version)
+    try:
+        serve_proposer_duty(state, proposer_duty)
+        assert False
+    except ValueError:
+        pass
+    finally:
+        replace_method_in_dvspec("sign_randao_reveal_async", sign_randao_reveal_async)
+        replace_method_in_dvspec("get_fork_version", get_fork_version)
+    # The cancelled signing fails its waiters & is retried by the next duty rather than left pending
+    assert waited_signings[0].done() and key not in RANDAO_REVEAL_CACHE.randao_reveals
+    serve_proposer_duty(state, proposer_duty)
+    assert RANDAO_REVEAL_CACHE.randao_reveals[key].result() != BLSSignature()
+
+
+def test_share_aggregator() -> None:
+    combined: List[List[SignatureShare]] = []
+    aggregator = create_share_aggregator(3, combined.append, max_slots=4)
+    set_share_aggregator_slot(aggregator, 10)
+
+    def build_share(co_validator_index: int, slot: int = 10, signing_root: bytes = bytes(32),
+                    pubkey: bytes = bytes(48)) -> SignatureShare:
+        return SignatureShare(pubkey=BLSPubkey(pubkey), slot=slot, signing_root=Root(signing_root),
+                              co_validator_index=co_validator_index, signature=BLSSignature())
+
+    assert add_signature_share(aggregator, build_share(0))
+    assert not add_signature_share(aggregator, build_share(0))
+    # Shares of another validator or signing root go to other buckets
+    assert add_signature_share(aggregator, build_share(1, pubkey=bytes([1]) * 48))
+    assert add_signature_share(aggregator, build_share(1, signing_root=bytes([1]) * 32))
+    assert add_signature_share(aggregator, build_share(1))
+    assert combined == []
+    # The combination fires as soon as the threshold is reached, & later shares are dropped
+    assert add_signature_share(aggregator, build_share(2))
+    assert [[share.co_validator_index for share in shares] for shares in combined] == [[0, 1, 2]]
+    assert not add_signature_share(aggregator, build_share(3))
+    # Shares of slots outside the window are dropped, & old buckets are evicted
+    assert not add_signature_share(aggregator, build_share(0, slot=5))
+    assert not add_signature_share(aggregator, build_share(0, slot=12, signing_root=bytes([2]) * 32))
+    set_share_aggregator_slot(aggregator, 15)
+    assert aggregator.buckets == {}
+    # A co-validator can only open a bounded number of buckets per validator & slot
+    for i in range(SHARE_AGGREGATOR_MAX_SHARES_PER_SLOT + 2):
+        add_signature_share(aggregator, build_share(3, slot=15, signing_root=i.to_bytes(32, "little")))
+    assert len(aggregator.buckets) == SHARE_AGGREGATOR_MAX_SHARES_PER_SLOT
+    assert (aggregator.num_duplicate, aggregator.num_late, aggregator.num_early, aggregator.num_excess) == (1, 2, 1, 2)
+
+
+def test_combine_signature_shares() -> None:
+    rng = random.Random(22)
+    distributed_validator = build_state(1).distributed_validators[0]
+    # Shares of a secret key with threshold 3, for the co-validators at co-validator index + 1
+    polynomial = [rng.randrange(1, curve_order) for _ in range(3)]
+    secret_keys = [sum(coefficient * (i + 1) ** power for power, coefficient in enumerate(polynomial)) % curve_order
+                   for i in range(len(distributed_validator.co_validators))]
+    signing_root = Root(bytes([5]) * 32)
+    signature_shares = [
+        SignatureShare(pubkey=distributed_validator.validator_identity.pubkey, slot=0, signing_root=signing_root,
+                       co_validator_index=i, signature=BLSSignature(milagro_bls.Sign(secret_key.to_bytes(32, "big"),
+                                                                                     bytes(signing_root))))
+        for i, secret_key in enumerate(secret_keys)
+    ]
+    signature = milagro_bls.Sign(polynomial[0].to_bytes(32, "big"), bytes(signing_root))
+    for subset in [[0, 1, 2], [3, 1, 0], [0, 1, 3]]:
+        assert combine_signature_shares(distributed_validator, [signature_shares[i] for i in subset]) == signature
+
+
+def test_verify_signature_shares() -> None:
+    state = build_state(2)
+    secret_keys: Dict[Tuple[bytes, int], bytes] = {}
+    for distributed_validator in state.distributed_validators:
+        for co_validator in distributed_validator.co_validators:
+            secret_key = (len(secret_keys) + 1).to_bytes(32, "big")
+            co_validator.pubkey = BLSPubkey(milagro_bls.SkToPk(secret_key))
+            secret_keys[bytes(distributed_validator.validator_identity.pubkey), int(co_validator.index)] = secret_key
+    signature_shares = [
+        SignatureShare(pubkey=pubkey, slot=10, signing_root=Root(bytes([i]) * 32), co_validator_index=j,
+                       signature=BLSSignature(milagro_bls.Sign(secret_key, bytes([i]) * 32)))
+        for (pubkey, j), secret_key in secret_keys.items() for i in range(2)
+    ]
+    # A share over another signing root, a share that is not a G2 point & a share of an unknown co-validator
+    signature_shares[3].signature = signature_shares[2].signature
+    signature_shares[12].signature = BLSSignature(bytes([1]) * 96)
+    signature_shares.append(SignatureShare(pubkey=signature_shares[0].pubkey, slot=10, signing_root=Root(),
+                                           co_validator_index=4, signature=signature_shares[0].signature))
+    signature_sets = [(BLSPubkey(milagro_bls.SkToPk(secret_keys[bytes(share.pubkey), int(share.co_validator_index)])),
+                       share.signing_root, share.signature) for share in signature_shares[:-1]]
+    assert find_invalid_signature_sets(signature_sets) == [3, 12]
+    assert find_invalid_signature_sets(signature_sets[4:12]) == []
+    # Only the valid shares reach the aggregator
+    combined: List[List[SignatureShare]] = []
+    aggregator = create_share_aggregator(3, combined.append)
+    set_share_aggregator_slot(aggregator, 10)
+    verifier = ShareVerifier()
+    for share in signature_shares:
+        queue_signature_share(verifier, share)
+    flush_signature_shares(state, verifier, aggregator)
+    assert verifier.pending == []
+    assert (verifier.num_verified, verifier.num_invalid, verifier.num_batches) == (14, 3, 1)
+    # The buckets with an invalid share are completed by the share of the fourth co-validator
+    assert sorted((int(shares[0].pubkey == signature_shares[8].pubkey), bytes(shares[0].signing_root)[0],
+                   [int(share.co_validator_index) for share in shares]) for shares in combined) == [
+        (0, 0, [0, 1, 2]), (0, 1, [0, 2, 3]), (1, 0, [0, 1, 3]), (1, 1, [0, 1, 2])]
+
+
+def test_signature_share_messages() -> None:
+    state = build_state(5)
+    distributed_validator = state.distributed_validators[3]
+    fields = (ValidatorIndex(3), DUTY_TYPE_BLOCK, Slot(7), Root(bytes([1]) * 32), ValidatorIndex(2),
+              BLSSignature(bytes([2]) * 96))
+    message = encode_signature_share_message(*fields)
+    assert message == SignatureShareMessage(
+        validator_index=3, duty_type=DUTY_TYPE_BLOCK, slot=7, signing_root=fields[3], co_validator_index=2,
+        signature=fields[5]).encode_bytes()
+    assert len(message) == SIGNATURE_SHARE_MESSAGE_SIZE
+    # Messages are decoded in place from a buffer holding several of them
+    unknown_validator_message = encode_signature_share_message(ValidatorIndex(9), *fields[1:])
+    view = memoryview(unknown_validator_message + message)
+    assert decode_signature_share(state, view, SIGNATURE_SHARE_MESSAGE_SIZE) == (DUTY_TYPE_BLOCK, SignatureShare(
+        pubkey=distributed_validator.validator_identity.pubkey, slot=Slot(7), signing_root=fields[3],
+        co_validator_index=ValidatorIndex(2), signature=fields[5]))
+    assert decode_signature_share(state, view) is None
+    # Messages of other duty types, e.g. randao reveals, are dropped
+    randao_reveal_message = SignatureShareMessage(validator_index=3, duty_type=2, slot=7, signing_root=fields[3],
+                                                  co_validator_index=2, signature=fields[5]).encode_bytes()
+    assert decode_signature_share(state, memoryview(randao_reveal_message)) is None
+    # Duty flows queue one message with the signing root & the signature share only on the batcher of the state
+    state.share_batcher = ShareBatcher(window_seconds=1)
+    attestation_duty = fill_attestation_duties_with_val_index(
+        state, bn_get_attestation_duties_for_epoch(get_validator_indices(state), 7))[0]
+    serve_attestation_duty(state, attestation_duty)
+    attestation_data = bn_produce_attestation_data(attestation_duty.slot, attestation_duty.committee_index)
+    signing_root = compute_attestation_signing_root(attestation_data)
+    signature_share = rs_sign_attestation(attestation_data, get_fork_version(attestation_duty.slot), signing_root)
+    assert state.share_batcher.pending == [SignatureShareMessage(
+        validator_index=attestation_duty.validator_index, duty_type=DUTY_TYPE_ATTESTATION, slot=attestation_duty.slot,
+        signing_root=signing_root, co_validator_index=get_co_validator_index(attestation_duty.pubkey),
+        signature=signature_share).encode_bytes()]
+    assert decode_signature_share(state, memoryview(state.share_batcher.pending[0])) == (
+        DUTY_TYPE_ATTESTATION, SignatureShare(pubkey=attestation_duty.pubkey, slot=attestation_duty.slot,
+                                              signing_root=signing_root, co_validator_index=ValidatorIndex(0),
+                                              signature=signature_share))
+
+
+def test_share_combination() -> None:
+    rng = random.Random(23)
+    state = build_state(1)
+    distributed_validator = state.distributed_validators[0]
+    # Shares of a secret key with threshold 3, for the co-validators at co-validator index + 1.
+    # This node runs the first co-validator
+    polynomial = [rng.randrange(1, curve_order) for _ in range(3)]
+    secret_keys = [(sum(coefficient * (i + 1) ** power for power, coefficient in enumerate(polynomial))
+                    % curve_order).to_bytes(32, "big") for i in range(len(distributed_validator.co_validators))]
+    for co_validator, secret_key in zip(distributed_validator.co_validators, secret_keys):
+        co_validator.pubkey = BLSPubkey(milagro_bls.SkToPk(secret_key))
+    secret_key = polynomial[0].to_bytes(32, "big")
+    combiner = create_share_combiner(state, 3)
+    submitted_attestations: List[eth2spec.Attestation] = []
+    submitted_blocks: List[eth2spec.SignedBeaconBlock] = []
+    block_signing_roots: List[Root] = []
+
+    def rs_sign_with_share(value: object, fork_version: eth2spec.Version, signing_root: Root) -> BLSSignature:
+        return BLSSignature(milagro_bls.Sign(secret_keys[0], bytes(signing_root)))
+
+    def rs_sign_block_with_share(block: BeaconBlock, fork_version: eth2spec.Version,
+                                 signing_root: Root) -> BLSSignature:
+        block_signing_roots.append(signing_root)
+        return rs_sign_with_share(block, fork_version, signing_root)
+
+    def receive_peer_shares(duty_type: int, slot: Slot, signing_root: Root, co_validator_indices: List[int],
+                            signing_co_validator_indices: Optional[List[int]] = None) -> None:
+        signing_indices = signing_co_validator_indices or co_validator_indices
+        batch = encode_signature_share_batch([encode_signature_share_message(
+            ValidatorIndex(0), duty_type, slot, signing_root, ValidatorIndex(i),
+            BLSSignature(milagro_bls.Sign(secret_keys[j], bytes(signing_root))))
+            for i, j in zip(co_validator_indices, signing_indices)])
+        receive_signature_share_batch(state, memoryview(batch), combiner.verifier)
+        flush_share_combiner(state, combiner, slot)
+
+    attestation_duty = fill_attestation_duties_with_val_index(
+        state, bn_get_attestation_duties_for_epoch(get_validator_indices(state), 7))[0]
+    attestation_data = bn_produce_attestation_data(attestation_duty.slot, attestation_duty.committee_index)
+    attestation_signing_root = compute_attestation_signing_root(attestation_data)
+    _, proposer_duty = route_duty(state, ProposerDuty(pubkey=BLSPubkey(), validator_index=0,
+                                                      slot=attestation_duty.slot + 1))
+    replace_method_in_dvspec("rs_sign_attestation", rs_sign_with_share)
+    replace_method_in_dvspec("rs_sign_block", rs_sign_block_with_share)
+    replace_method_in_dvspec("bn_submit_attestation", submitted_attestations.append)
+    replace_method_in_dvspec("bn_submit_block", submitted_blocks.append)
+    try:
+        # The shares of the DV peers reach the threshold before this node decides the attestation data
+        receive_peer_shares(DUTY_TYPE_ATTESTATION, attestation_duty.slot, attestation_signing_root, [1, 2, 3])
+        assert submitted_attestations == []
+        serve_attestation_duty(state, attestation_duty)
+        # This node decides the block first, & an invalid share of a DV peer is dropped
+        serve_proposer_duty(state, proposer_duty)
+        receive_peer_shares(DUTY_TYPE_BLOCK, proposer_duty.slot, block_signing_roots[0], [1, 2], [1, 3])
+        assert submitted_blocks == []
+        receive_peer_shares(DUTY_TYPE_BLOCK, proposer_duty.slot, block_signing_roots[0], [3])
+    finally:
+        replace_method_in_dvspec("rs_sign_attestation", rs_sign_attestation)
+        replace_method_in_dvspec("rs_sign_block", rs_sign_block)
+        replace_method_in_dvspec("bn_submit_attestation", bn_submit_attestation)
+        replace_method_in_dvspec("bn_submit_block", bn_submit_block)
+    # Each value is submitted once, signed with the secret key of the validator
+    assert [(attestation.data, list(attestation.aggregation_bits), attestation.signature)
+            for attestation in submitted_attestations] == [
+        (attestation_data, [i == attestation_duty.validator_committee_index
+                            for i in range(attestation_duty.committee_length)],
+         milagro_bls.Sign(secret_key, bytes(attestation_signing_root)))]
+    assert len(submitted_blocks) == 1 and submitted_blocks[0].message.slot == proposer_duty.slot
+    assert submitted_blocks[0].signature == milagro_bls.Sign(secret_key, bytes(block_signing_roots[0]))
+    assert block_signing_roots == [compute_block_signing_root(submitted_blocks[0].message)]
+    assert (combiner.num_submitted, combiner.verifier.num_invalid) == (2, 1)
+
+
+def test_share_batcher() -> None:
+    state = build_state(10)
+    messages = [encode_signature_share_message(ValidatorIndex(i), DUTY_TYPE_ATTESTATION, Slot(7), Root(bytes([i]) * 32),
+                                               ValidatorIndex(0), BLSSignature())
+                for i in range(10)]
+    # The shares of all validators in a window go out as one batch per peer, & wait for the peers to be known
+    batcher = ShareBatcher(window_seconds=0.001)
+    del TEST_SIGNATURE_SHARE_BATCHES[:]
+    queue_signature_share_messages(messages, batcher)
+    flush_share_batcher(batcher)
+    assert len(batcher.pending) == 10 and TEST_SIGNATURE_SHARE_BATCHES == []
+    thread = start_share_batcher([ValidatorIndex(1), ValidatorIndex(2), ValidatorIndex(3)], batcher)
+    deadline = time.monotonic() + 5
+    while batcher.num_batches < 3 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    stop_share_batcher(batcher)
+    thread.join()
+    assert [peer for peer, _ in TEST_SIGNATURE_SHARE_BATCHES] == [1, 2, 3]
+    assert (batcher.num_messages, batcher.num_batches, batcher.pending) == (10, 3, [])
+    # The receiving side demultiplexes the batch into the shares of each validator
+    verifier = ShareVerifier()
+    receive_signature_share_batch(state, memoryview(TEST_SIGNATURE_SHARE_BATCHES[0][1]), verifier)
+    assert [(bytes(share.pubkey), bytes(share.signing_root)) for share in verifier.pending] == [
+        (bytes(dv.validator_identity.pubkey), bytes([i]) * 32) for i, dv in enumerate(state.distributed_validators)]
+    # Full batches are sent without waiting for the window
+    queue_signature_share_messages(messages * (SIGNATURE_SHARE_BATCH_MAX_MESSAGES // 10 + 1), batcher)
+    assert batcher.num_batches == 6 and len(batcher.pending) == 10 - SIGNATURE_SHARE_BATCH_MAX_MESSAGES % 10
+    # Failed sends are retried, & a peer that stays unreachable is counted without holding back the others
+    send_attempts: List[int] = []
+
+    def flaky_send_signature_share_batch(peer_index: ValidatorIndex, signature_share_batch: bytes) -> None:
+        send_attempts.append(int(peer_index))
+        if int(peer_index) == 3 or send_attempts.count(int(peer_index)) == 1:
+            raise ConnectionError()
+        send_signature_share_batch(peer_index, signature_share_batch)
+
+    replace_method_in_dvspec("send_signature_share_batch", flaky_send_signature_share_batch)
+    try:
+        flush_share_batcher(batcher)
+    finally:
+        replace_method_in_dvspec("send_signature_share_batch", send_signature_share_batch)
+    assert send_attempts == [1, 1, 2, 2, 3, 3, 3]
+    assert batcher.num_batches == 8 and batcher.num_send_failures == {3: 1} and batcher.pending == []